@@ -0,0 +1,34 @@
+# accounts/services.py
+
+from django.db.models import Sum
+
+from core.cache import cached_tile
+from lectures.models import Lecture
+from students.models import Student
+
+
+DASHBOARD_TILES = ("total_students", "today_attendance", "defaulters")
+
+
+def total_students_tile(today):
+    return cached_tile(
+        "total_students",
+        today,
+        lambda: Student.objects.filter(is_active=True).count(),
+    )
+
+
+def today_present_percent_tile(today):
+    def compute():
+        # Trigger-maintained per-lecture counters: one indexed aggregate
+        totals = Lecture.objects.filter(date=today).aggregate(
+            expected=Sum("expected_count"),
+            present=Sum("present_count"),
+        )
+        expected = totals["expected"] or 0
+        present = totals["present"] or 0
+        if expected > 0:
+            return round((present / expected) * 100, 2)
+        return 0
+
+    return cached_tile("today_attendance", today, compute)
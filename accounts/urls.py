@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import login_view, admin_dashboard, volunteer_dashboard, logout_view, dashboard_redirect,CustomPasswordChangeView
+from .views import login_view, admin_dashboard, volunteer_dashboard, logout_view, dashboard_redirect,CustomPasswordChangeView, dashboard_cache_stats
 
 urlpatterns = [
     path("", dashboard_redirect, name="root"),
@@ -8,6 +8,7 @@ urlpatterns = [
     path("dashboard/", dashboard_redirect, name="dashboard"),
     path("dashboard/admin/", admin_dashboard, name="admin_dashboard"),
     path("dashboard/volunteer/", volunteer_dashboard, name="volunteer_dashboard"),
+    path("dashboard/cache-stats/", dashboard_cache_stats, name="dashboard_cache_stats"),
     path("change_password/", CustomPasswordChangeView.as_view(), name="password_change"),
 
 ]
\ No newline at end of file
@@ -2,21 +2,18 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from datetime import date
+from datetime import date, timedelta
 from auditlog.utils import create_audit_log
-from students.models import Student
-from lectures.models import Lecture
-from attendance.models import AttendanceRecord
+from attendance.services import get_defaulters
+from core.cache import tile_stats
+from django.http import JsonResponse
+from .services import DASHBOARD_TILES, total_students_tile, today_present_percent_tile
 from auditlog.models import AuditLog
 from django.utils import timezone
 from django.contrib.auth.views import PasswordChangeView
 from django.urls import reverse_lazy
-from auditlog.utils import create_audit_log
-from django.db import models
-
 
 
-today = timezone.localdate()
 
 def login_view(request):
     if request.method == "POST":
@@ -73,77 +70,19 @@ class CustomPasswordChangeView(PasswordChangeView):
 @login_required
 def admin_dashboard(request):
 
-    total_students = Student.objects.filter(is_active=True).count()
-
-    todays_lectures = Lecture.objects.filter(date=today).select_related("batch")
-
-
-    total_expected_today = 0
-    total_present_today = 0
-
-    for lecture in todays_lectures:
-        students_qs = Student.objects.filter(
-            batch=lecture.batch,
-            is_active=True,
-        )
-
-        total_expected_today += students_qs.count()
-
-        total_present_today += AttendanceRecord.objects.filter(
-            lecture=lecture,
-            status="P",
-        ).count()
-
-    if total_expected_today > 0:
-        today_present_percent = round(
-            (total_present_today / total_expected_today) * 100, 2
-        )
-    else:
-        today_present_percent = 0
-
-    critical_defaulters = []
-
-    # Optimize with prefetch_related
-    students = Student.objects.filter(is_active=True).select_related("batch", "branch").prefetch_related(
-        models.Prefetch(
-            'attendancerecord_set',
-            queryset=AttendanceRecord.objects.filter(status="P", lecture__date__lte=today)
-        )
-    )
-    
-    # Pre-fetch lecture counts per batch
-    from django.db.models import Count, Q
-    batch_lecture_counts = dict(
-        Lecture.objects.filter(date__lte=today).values('batch').annotate(count=Count('id')).values_list('batch', 'count')
-    )
-
-    for student in students:
-        total_lectures = batch_lecture_counts.get(student.batch_id, 0)
-
-        if total_lectures == 0:
-            continue
-
-        present_count = student.attendancerecord_set.count()
-
-        attendance_percent = round((present_count / total_lectures) * 100, 2)
+    today = timezone.localdate()
 
-        if attendance_percent < 75:  # Changeable value 
-            critical_defaulters.append({
-                "id": student.id,
-                "roll_no": student.roll_number,
-                "full_name": student.full_name,
-                "attendance_percent": attendance_percent,
-            })
+    total_students = total_students_tile(today)
+    today_present_percent = today_present_percent_tile(today)
 
-    # Limit to top 5 worst defaulters
-    critical_defaulters = sorted(
-        critical_defaulters,
-        key=lambda x: x["attendance_percent"]
-    )[:5]
+    critical_defaulters = get_defaulters(today=today)
 
 
+    # A rolling window rather than the calendar month, so the panel is not
+    # empty after rollover; it still prunes to at most two partitions
     recent_audits = (
         AuditLog.objects
+        .filter(timestamp__gte=timezone.now() - timedelta(days=31))
         .select_related("actor")
         .order_by("-timestamp")[:10]
     )
@@ -167,34 +106,10 @@ def volunteer_dashboard(request):
     if request.user.role != "VOLUNTEER":
         return redirect("login")
     
-    total_students = Student.objects.filter(is_active=True).count()
-
-    todays_lectures = Lecture.objects.filter(date=today).select_related("batch")
-
-
-    total_expected_today = 0
-    total_present_today = 0
-
-    for lecture in todays_lectures:
-        students_count = Student.objects.filter(
-            batch=lecture.batch,
-            is_active=True,
-        ).count()
-
-        total_expected_today += students_count
-
-        total_present_today += AttendanceRecord.objects.filter(
-            lecture=lecture,
-            status="P",
-        ).count()
-
-    if total_expected_today > 0:
-        today_present_percent = round(
-            (total_present_today / total_expected_today) * 100, 2
-        )
-    else:
-        today_present_percent = 0
+    today = timezone.localdate()
 
+    total_students = total_students_tile(today)
+    today_present_percent = today_present_percent_tile(today)
 
     return render(
         request,
@@ -212,3 +127,11 @@ def dashboard_redirect(request):
     elif request.user.role == "VOLUNTEER":
         return redirect("volunteer_dashboard")
     return redirect("login")
+
+
+@login_required
+def dashboard_cache_stats(request):
+    """Tile cache hit/miss counters for monitoring (superusers only)."""
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(tile_stats(DASHBOARD_TILES))
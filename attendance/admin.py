@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AttendanceRecord
+from .models import AttendanceImport, AttendanceRecord
 
 from attendance.models import AttendanceRecord
 
@@ -29,4 +29,21 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Only superusers can delete in Django admin
         return request.user.is_superuser
-    
\ No newline at end of file
+
+
+@admin.register(AttendanceImport)
+class AttendanceImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "original_name",
+        "status",
+        "sheets_done",
+        "sheets_total",
+        "rows_processed",
+        "error_count",
+        "uploaded_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("original_name", "content_hash")
+    readonly_fields = ("content_hash", "summary", "error", "uploaded_by", "created_at", "finished_at")
@@ -0,0 +1,80 @@
+# attendance/analytics.py
+
+from django.db.models import Count, Q
+
+from .models import AttendanceRecord
+
+
+PRESENT_COUNT = Count("id", filter=Q(status="P"))
+ABSENT_COUNT = Count("id", filter=Q(status="A"))
+
+
+def _records(lectures, students):
+    return AttendanceRecord.objects.filter(lecture__in=lectures, student__in=students)
+
+
+def student_counts(lectures, students):
+    """
+    Present/absent counts per student over the given lectures.
+    Returns {student_id: {"present": p, "absent": a}} in one grouped query.
+    """
+    rows = (
+        _records(lectures, students)
+        .values("student_id")
+        .annotate(present=PRESENT_COUNT, absent=ABSENT_COUNT)
+        .order_by()
+    )
+    return {
+        row["student_id"]: {"present": row["present"], "absent": row["absent"]}
+        for row in rows
+    }
+
+
+def daily_counts(lectures, students):
+    """
+    Per-day session count plus present/absent counts over the given lectures.
+    Returns {date: {"sessions": n, "present": p, "absent": a}} ordered by date,
+    using one query for sessions and one for attendance.
+    """
+    days = {
+        row["date"]: {"sessions": row["sessions"], "present": 0, "absent": 0}
+        for row in lectures.values("date").annotate(sessions=Count("id")).order_by("date")
+    }
+    rows = (
+        _records(lectures, students)
+        .values("lecture__date")
+        .annotate(present=PRESENT_COUNT, absent=ABSENT_COUNT)
+        .order_by()
+    )
+    for row in rows:
+        day = days.get(row["lecture__date"])
+        if day is not None:
+            day["present"] = row["present"]
+            day["absent"] = row["absent"]
+    return days
+
+
+def branch_counts(lectures, students):
+    """
+    Student count plus present/absent counts per branch name.
+    Returns a list of {"name", "count", "present", "absent"} ordered by name.
+    """
+    attendance = {
+        row["student__branch__name"]: row
+        for row in (
+            _records(lectures, students)
+            .values("student__branch__name")
+            .annotate(present=PRESENT_COUNT, absent=ABSENT_COUNT)
+            .order_by()
+        )
+    }
+    result = []
+    for row in students.values("branch__name").annotate(count=Count("id")).order_by("branch__name"):
+        counts = attendance.get(row["branch__name"], {})
+        result.append({
+            "name": row["branch__name"] or "Unknown",
+            "count": row["count"],
+            "present": counts.get("present", 0),
+            "absent": counts.get("absent", 0),
+        })
+    return result
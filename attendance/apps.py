@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AttendanceConfig(AppConfig):
     name = 'attendance'
+
+    def ready(self):
+        from .summaries import install_on_migrate
+
+        post_migrate.connect(install_on_migrate, sender=self)
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import as_completed
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.models import EODAttendanceRun
+from core.parallel import django_process_pool
+from attendance.services import mark_absent_for_date
+from lectures.models import Lecture
+
+
+def _backfill_chunk(dates):
+    """Mark absences for a chunk of dates inside one bounded transaction."""
+    rows = 0
+    with transaction.atomic():
+        for d in dates:
+            rows += sum(mark_absent_for_date(d).values())
+    return len(dates), rows
+
+
+class Command(BaseCommand):
+    help = "Backfill EOD absence marking over a date range, skipping dates already recorded"
+
+    def add_arguments(self, parser):
+        parser.add_argument("start_date", type=str, help="First date (YYYY-MM-DD)")
+        parser.add_argument("end_date", type=str, help="Last date, inclusive (YYYY-MM-DD)")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=7,
+            help="Dates committed per transaction (default: 7)",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of worker processes (default: 1)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the dates that would be processed without writing",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options["start_date"])
+            end_date = date.fromisoformat(options["end_date"])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        if start_date > end_date:
+            raise CommandError("start_date must not be after end_date")
+        # Today's lectures may still be scanned; the nightly EOD run owns today
+        if end_date >= timezone.localdate():
+            raise CommandError("end_date must be before today")
+
+        chunk_size = max(options["chunk_size"], 1)
+        parallel = max(options["parallel"], 1)
+
+        done = set(
+            EODAttendanceRun.objects.filter(run_date__range=(start_date, end_date))
+            .values_list("run_date", flat=True)
+        )
+        lecture_dates = set(
+            Lecture.objects.filter(date__range=(start_date, end_date))
+            .values_list("date", flat=True)
+            .distinct()
+        )
+
+        pending = []
+        d = start_date
+        while d <= end_date:
+            if d in lecture_dates and d not in done:
+                pending.append(d)
+            d += timedelta(days=1)
+
+        self.stdout.write(
+            f"{len(pending)} date(s) pending, {len(done)} already recorded, "
+            f"{(end_date - start_date).days + 1 - len(pending) - len(done)} without lectures"
+        )
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("Nothing to backfill"))
+            return
+
+        if options["dry_run"]:
+            for d in pending:
+                self.stdout.write(f"  [WOULD PROCESS] {d}")
+            return
+
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+        started = time.monotonic()
+        dates_done = 0
+        rows_done = 0
+
+        if parallel == 1:
+            for chunk in chunks:
+                n_dates, rows = _backfill_chunk(chunk)
+                dates_done += n_dates
+                rows_done += rows
+                self._report_chunk(chunk, rows)
+        else:
+            with django_process_pool(parallel) as pool:
+                futures = {pool.submit(_backfill_chunk, chunk): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        n_dates, rows = future.result()
+                    except Exception as e:
+                        self.stdout.write(
+                            self.style.ERROR(f"  ERROR {chunk[0]} → {chunk[-1]}: {e}")
+                        )
+                        continue
+                    dates_done += n_dates
+                    rows_done += rows
+                    self._report_chunk(chunk, rows)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(self.style.SUCCESS("BACKFILL SUMMARY"))
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"Dates processed:   {dates_done}/{len(pending)}")
+        self.stdout.write(f"Absences inserted: {rows_done}")
+        self.stdout.write(f"Elapsed:           {elapsed:.2f}s")
+        self.stdout.write(f"Throughput:        {rows_done / elapsed:.1f} rows/sec, {dates_done / elapsed:.2f} dates/sec")
+        self.stdout.write("=" * 60)
+
+    def _report_chunk(self, chunk, rows):
+        self.stdout.write(f"  [DONE] {chunk[0]} → {chunk[-1]} ({len(chunk)} date(s), {rows} absent)")
@@ -1,15 +1,147 @@
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
+from django.db import connection, transaction
 from datetime import datetime
 from openpyxl import load_workbook
 from lectures.models import Batch, Lecture
 from students.models import Student
 from attendance.models import AttendanceRecord
+from core.cache import attendance_changed
 from django.contrib.auth import get_user_model
-import re
+from core.parallel import django_process_pool
+import time
 
 User = get_user_model()
 
+# Sr No., Full Name, Roll No., Branch, Present, Absent, Attendance (columns A-G)
+FIXED_COLS = 7
+ROLL_COL = 2  # Column C, 0-based
+UPSERT_CHUNK_SIZE = 5000
+
+STAT_KEYS = (
+    "batches_processed",
+    "batches_not_found",
+    "lectures_created",
+    "lectures_found",
+    "attendance_records",
+    "students_not_found",
+    "rows_read",
+    "inserted",
+    "updated",
+    "unchanged",
+)
+DIFF_REPORT_LIMIT = 20
+
+
+def _parse_date(value):
+    """Attempt to parse a date string in multiple formats, or convert datetime objects."""
+    # If already a datetime object, just extract the date
+    if hasattr(value, 'date'):
+        return value.date()
+
+    # If already a date object, return as-is
+    if hasattr(value, 'year') and hasattr(value, 'month') and hasattr(value, 'day'):
+        return value
+
+    # Try parsing as string
+    formats = [
+        "%d-%m-%Y",
+        "%d/%m/%Y",
+        "%d-%b-%Y",
+        "%d %b %Y",
+        "%Y-%m-%d",
+        "%m-%d-%Y",
+    ]
+    for fmt in formats:
+        try:
+            return datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_status(value):
+    if not value:
+        return None
+    value = str(value).strip().upper()
+    if value in ("P", "PRESENT"):
+        return "P"
+    if value in ("A", "ABSENT"):
+        return "A"
+    # Holidays and anything else are skipped
+    return None
+
+
+def parse_header(date_row, session_row):
+    """
+    Extract (date, session_type, 0-based column) for each attendance column.
+
+    Row 1 holds dates from column H onwards (afternoon columns are usually
+    blank and reuse the previous date); row 2 holds the session type
+    (Morning Session / Afternoon Session / Holiday).
+    """
+    date_sessions = []
+    last_date = None
+    width = max(len(date_row), len(session_row))
+
+    for col in range(FIXED_COLS, width):
+        date_value = date_row[col] if col < len(date_row) else None
+        session_value = session_row[col] if col < len(session_row) else None
+
+        if date_value:
+            last_date = _parse_date(date_value)
+        if not last_date or not session_value:
+            continue
+
+        session_str = str(session_value).strip().lower()
+        date_str = str(date_value or "").strip().lower()
+        if "holiday" in date_str or "holiday" in session_str:
+            continue
+        if "morning" in session_str:
+            date_sessions.append((last_date, "MS", col))
+        elif "afternoon" in session_str:
+            date_sessions.append((last_date, "AS", col))
+
+    return date_sessions
+
+
+def parse_sheet(ws):
+    """
+    Stream a worksheet into compact tuples without touching the database.
+
+    Returns (date_sessions, rows) where rows is a list of
+    (roll_number, ((session_index, status), ...)).
+    """
+    rows_iter = ws.iter_rows(values_only=True)
+    date_row = next(rows_iter, ()) or ()
+    session_row = next(rows_iter, ()) or ()
+    date_sessions = parse_header(date_row, session_row)
+
+    rows = []
+    for row in rows_iter:
+        if len(row) <= ROLL_COL or not row[ROLL_COL]:
+            continue
+        roll_number = str(row[ROLL_COL]).strip()
+        if not roll_number:
+            continue
+
+        marks = []
+        for i, (_, _, col) in enumerate(date_sessions):
+            status = _parse_status(row[col]) if col < len(row) else None
+            if status:
+                marks.append((i, status))
+        rows.append((roll_number, tuple(marks)))
+
+    return date_sessions, rows
+
+
+def parse_sheet_from_file(file_path, sheet_name):
+    """Process-pool entry point: open the workbook and parse one sheet."""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return parse_sheet(wb[sheet_name])
+    finally:
+        wb.close()
+
 
 class Command(BaseCommand):
     help = "Import attendance from Excel file with format: dates as columns, students as rows"
@@ -26,244 +158,276 @@ class Command(BaseCommand):
             action="store_true",
             help="Preview import without making changes to database",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Parse sheets in N worker processes (default: 1, in-process)",
+        )
+        parser.add_argument(
+            "--diff",
+            action="store_true",
+            help="Compare with existing attendance and write only inserted or changed cells",
+        )
 
     def handle(self, *args, **options):
-        file_path = options["file_path"]
-        clear = options.get("clear", False)
         dry_run = options.get("dry_run", False)
+        started = time.monotonic()
+
+        stats = self.run_import(
+            options["file_path"],
+            clear=options.get("clear", False),
+            dry_run=dry_run,
+            workers=options.get("workers") or 1,
+            diff=options.get("diff", False),
+        )
+        self._print_summary(stats, time.monotonic() - started, dry_run)
+
+    def run_import(self, file_path, clear=False, dry_run=False, workers=1, diff=False, progress=None):
+        """
+        Import a workbook and return the merged stats dict. `progress`, if
+        given, is called as progress(sheets_done, sheets_total, rows_read,
+        errors) after each sheet. Warnings and errors are also collected in
+        self.errors.
+        """
+        workers = max(workers, 1)
+        self.diff = diff
+        self.errors = []
 
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY-RUN MODE: No changes will be made to the database"))
 
         try:
-            wb = load_workbook(file_path)
+            wb = load_workbook(file_path, read_only=True, data_only=True)
         except Exception as e:
             raise CommandError(f"Failed to load Excel file: {e}")
 
-        if clear and not dry_run:
-            AttendanceRecord.objects.all().delete()
-            Lecture.objects.all().delete()
-            self.stdout.write(self.style.WARNING("Cleared all attendance and lecture records"))
-        elif clear and dry_run:
-            self.stdout.write(self.style.WARNING("[DRY-RUN] Would clear all attendance and lecture records"))
-
-        # Get or create a system user for lectures
-        system_user, _ = User.objects.get_or_create(
-            email="admin@tpc.com",
-            defaults={"full_name": "System Import", "role": "ADMIN"},
+        self.query_count = 0
+
+        with connection.execute_wrapper(self._count_query):
+            if clear and not dry_run:
+                AttendanceRecord.objects.all().delete()
+                Lecture.objects.all().delete()
+                self.stdout.write(self.style.WARNING("Cleared all attendance and lecture records"))
+            elif clear and dry_run:
+                self.stdout.write(self.style.WARNING("[DRY-RUN] Would clear all attendance and lecture records"))
+
+            # Get or create a system user for lectures
+            system_user, _ = User.objects.get_or_create(
+                email="admin@tpc.com",
+                defaults={"full_name": "System Import", "role": "ADMIN"},
+            )
+
+            batches = {b.name: b for b in Batch.objects.all()}
+            stats = dict.fromkeys(STAT_KEYS, 0)
+
+            sheet_batches = []
+            for sheet_name in wb.sheetnames:
+                # Extract batch name from sheet (e.g., "Batch 1", "batch1", etc.)
+                batch = batches.get(sheet_name.strip())
+                if batch is None:
+                    self._error(f"Batch '{sheet_name.strip()}' not found. Skipping sheet.")
+                    stats["batches_not_found"] += 1
+                    continue
+                sheet_batches.append((sheet_name, batch))
+
+            if progress:
+                progress(0, len(sheet_batches), 0, len(self.errors))
+
+            for (sheet_name, batch), (date_sessions, rows) in zip(
+                sheet_batches, self._parse_sheets(wb, file_path, sheet_batches, workers)
+            ):
+                self.stdout.write(f"\nProcessing sheet: {sheet_name}")
+                self.stdout.write(f"Found {len(date_sessions)} date/session combinations")
+
+                sheet_stats = self._import_sheet(batch, date_sessions, rows, system_user, dry_run)
+                for key, value in sheet_stats.items():
+                    stats[key] += value
+                stats["batches_processed"] += 1
+
+                self.stdout.write(self.style.SUCCESS(f"Completed processing for {batch.name}"))
+                if progress:
+                    progress(stats["batches_processed"], len(sheet_batches), stats["rows_read"], len(self.errors))
+
+            if not dry_run:
+                attendance_changed()
+
+        wb.close()
+        return stats
+
+    def _parse_sheets(self, wb, file_path, sheet_batches, workers):
+        """
+        Yield (date_sessions, rows) per sheet in workbook order. With
+        workers > 1 sheets are parsed concurrently in a process pool while
+        finished sheets are written by this process.
+        """
+        if workers == 1 or len(sheet_batches) < 2:
+            for sheet_name, _ in sheet_batches:
+                yield parse_sheet(wb[sheet_name])
+            return
+
+        with django_process_pool(min(workers, len(sheet_batches))) as pool:
+            futures = [
+                pool.submit(parse_sheet_from_file, file_path, sheet_name)
+                for sheet_name, _ in sheet_batches
+            ]
+            for future in futures:
+                yield future.result()
+
+    def _error(self, message, warning=False):
+        self.errors.append(message.strip())
+        style = self.style.WARNING if warning else self.style.ERROR
+        self.stdout.write(style(message))
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    def _import_sheet(self, batch, date_sessions, rows, system_user, dry_run):
+        """Write one sheet's lectures and attendance in a single transaction."""
+        stats = dict.fromkeys(STAT_KEYS, 0)
+        stats["rows_read"] = len(rows)
+
+        # Preload roll -> student id for the batch
+        students = dict(
+            Student.objects.filter(batch=batch).values_list("roll_number", "id")
         )
 
-        # Track statistics
-        stats = {
-            "batches_processed": 0,
-            "lectures_created": 0,
-            "attendance_records": 0,
-            "students_not_found": 0,
-            "batches_not_found": 0,
+        keys = sorted({(d, session) for d, session, _ in date_sessions})
+        lecture_ids = {
+            (d, t): lid
+            for lid, d, t in Lecture.objects.filter(
+                batch=batch,
+                date__in={d for d, _ in keys},
+            ).values_list("id", "date", "lecture_type")
         }
+        missing = [key for key in keys if key not in lecture_ids]
+        stats["lectures_found"] = len(keys) - len(missing)
+        stats["lectures_created"] = len(missing)
 
-        for sheet_name in wb.sheetnames:
-            self.stdout.write(f"\nProcessing sheet: {sheet_name}")
-            ws = wb[sheet_name]
+        for d, session in missing:
+            self.stdout.write(f"  [{'WOULD CREATE' if dry_run else 'CREATE'}] Lecture: {d.strftime('%d-%b-%Y')} {session}")
 
-            # Extract batch name from sheet (e.g., "Batch 1", "batch1", etc.)
-            batch_name = sheet_name.strip()
-            try:
-                batch = Batch.objects.get(name=batch_name)
-                stats["batches_processed"] += 1
-            except Batch.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f"Batch '{batch_name}' not found. Skipping sheet.")
-                )
-                stats["batches_not_found"] += 1
+        # Keyed so duplicate rows/columns collapse (last wins) before the upsert
+        records = {}
+        for roll_number, marks in rows:
+            student_id = students.get(roll_number)
+            if student_id is None:
+                self._error(f"  Student {roll_number} not found in batch {batch.name}", warning=True)
+                stats["students_not_found"] += 1
                 continue
+            for session_index, status in marks:
+                d, session, _ = date_sessions[session_index]
+                records[(student_id, (d, session))] = status
 
-            # Parse header to extract dates and session types
-            # Row 1: Sr No., Full Name, Roll No., Branch, Present, Absent, Attendance, then DATE columns
-            # Row 2: blank, blank, blank, blank, blank, blank, blank, then SESSION TYPE (Morning Session / Afternoon Session / Holiday)
-            # Use explicit cell access for reliability
-            
-            fixed_cols = 7  # Sr No., Full Name, Roll No., Branch, Present, Absent, Attendance (columns A-G)
-
-            # Extract dates and sessions from columns H onwards (col_idx 8+)
-            date_sessions = []
-            col_idx = fixed_cols + 1  # Start from column H (1-based indexing)
-            last_date_obj = None  # Track the last date for None columns (afternoon sessions)
-            
-            while col_idx <= ws.max_column:
-                # Get date from row 1 and session type from row 2
-                date_cell_value = ws.cell(row=1, column=col_idx).value
-                session_cell_value = ws.cell(row=2, column=col_idx).value
-                
-                # Determine the date for this column
-                if date_cell_value:
-                    # New date found
-                    date_obj = self._parse_date(date_cell_value)
-                    last_date_obj = date_obj
-                else:
-                    # No date, use the last date (for afternoon sessions paired with morning)
-                    date_obj = last_date_obj
-                
-                # Process if we have both a date and a session
-                if date_obj and session_cell_value:
-                    session_str = str(session_cell_value).strip().lower()
-                    
-                    # Check for holidays
-                    date_str = str(date_cell_value if date_cell_value else "").strip().lower()
-                    if "holiday" in date_str or "holiday" in session_str:
-                        # Skip holidays
-                        col_idx += 1
-                        continue
-                    elif "morning" in session_str:
-                        session_type = "MS"
-                    elif "afternoon" in session_str:
-                        session_type = "AS"
-                    else:
-                        col_idx += 1
-                        continue
-
-                    # Add this date/session combo
-                    date_sessions.append({
-                        "date": date_obj,
-                        "session": session_type,
-                        "col": col_idx
-                    })
-
-                col_idx += 1
-
-            self.stdout.write(f"Found {len(date_sessions)} date/session combinations")
-
-            # Create lectures for each date/session
-            lectures_by_date_session = {}
-            for ds in date_sessions:
-                key = (ds["date"], ds["session"])
-                if key not in lectures_by_date_session:
-                    if not dry_run:
-                        lecture, created = Lecture.objects.get_or_create(
-                            batch=batch,
-                            date=ds["date"],
-                            lecture_type=ds["session"],
-                            defaults={
-                                "title": f"{batch_name} - {ds['session']} - {ds['date'].strftime('%d-%b-%Y')}",
-                                "created_by": system_user,
-                            },
-                        )
-                        lectures_by_date_session[key] = lecture
-                        if created:
-                            self.stdout.write(
-                                f"  [CREATE] Lecture: {ds['date'].strftime('%d-%b-%Y')} {ds['session']}"
-                            )
-                            stats["lectures_created"] += 1
-                        else:
-                            self.stdout.write(
-                                f"  [FOUND] Lecture: {ds['date'].strftime('%d-%b-%Y')} {ds['session']}"
-                            )
-                    else:
-                        # In dry-run, create a mock lecture object for tracking
-                        mock_lecture = type('Lecture', (), {
-                            'date': ds['date'],
-                            'lecture_type': ds['session'],
-                            'batch': batch
-                        })()
-                        lectures_by_date_session[key] = mock_lecture
-                        self.stdout.write(
-                            f"  [WOULD CREATE] Lecture: {ds['date'].strftime('%d-%b-%Y')} {ds['session']}"
-                        )
-                        stats["lectures_created"] += 1
-
-            # Parse student rows and mark attendance
-            # Roll number is in column C (index 2), starting from row 3
-            row_num = 3  # Data starts at row 3
-            while row_num <= ws.max_row:
-                # Explicitly read from columns A-G (fixed columns)
-                try:
-                    roll_number_cell = ws.cell(row=row_num, column=3).value  # Column C
-                    if not roll_number_cell:
-                        row_num += 1
-                        continue
-                        
-                    roll_number = str(roll_number_cell).strip()
-                    if not roll_number:
-                        row_num += 1
-                        continue
-                except Exception:
-                    row_num += 1
-                    continue
+        stats["attendance_records"] = len(records)
+        if self.diff:
+            records = self._diff_records(batch, keys, lecture_ids, students, records, stats, dry_run)
+        if dry_run:
+            return stats
 
-                try:
-                    student = Student.objects.get(roll_number=roll_number, batch=batch)
-                except Student.DoesNotExist:
-                    self.stdout.write(
-                        self.style.WARNING(f"  Student {roll_number} not found in batch {batch_name}")
-                    )
-                    stats["students_not_found"] += 1
-                    row_num += 1
-                    continue
+        records = [(student_id, key, status) for (student_id, key), status in records.items()]
+        if not records and not missing:
+            return stats
 
-                # Mark attendance for each date/session
-                for i, ds in enumerate(date_sessions):
-                    col_idx = ds["col"]  # Already 1-based (openpyxl indexing)
-                    try:
-                        status_cell = ws.cell(row=row_num, column=col_idx).value
-                        if status_cell:
-                            status_str = str(status_cell).strip().upper()
-                            if status_str in ("P", "PRESENT"):
-                                status = "P"
-                            elif status_str in ("A", "ABSENT"):
-                                status = "A"
-                            elif "HOLIDAY" in status_str:
-                                status = None  # Skip holidays
-                            else:
-                                status = None
-
-                            if status:
-                                key = (ds["date"], ds["session"])
-                                lecture = lectures_by_date_session.get(key)
-                                if lecture:
-                                    if not dry_run:
-                                        try:
-                                            AttendanceRecord.objects.update_or_create(
-                                                student=student,
-                                                lecture=lecture,
-                                                defaults={"status": status, "marked_by": system_user},
-                                            )
-                                            stats["attendance_records"] += 1
-                                        except Exception as e:
-                                            self.stdout.write(
-                                                self.style.ERROR(
-                                                    f"  ERROR creating attendance for {student.roll_number} "
-                                                    f"on {ds['date']}: {e}"
-                                                )
-                                            )
-                                    else:
-                                        stats["attendance_records"] += 1
-                                elif not dry_run:
-                                    self.stdout.write(
-                                        self.style.WARNING(
-                                            f"  WARNING: No lecture found for {ds['date']} {ds['session']}"
-                                        )
-                                    )
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"  ERROR processing attendance cell at row {row_num}, "
-                                f"col {col_idx}: {e}"
-                            )
+        with transaction.atomic():
+            created = Lecture.objects.bulk_create([
+                Lecture(
+                    batch=batch,
+                    date=d,
+                    lecture_type=session,
+                    title=f"{batch.name} - {session} - {d.strftime('%d-%b-%Y')}",
+                    created_by=system_user,
+                )
+                for d, session in missing
+            ])
+            for lecture in created:
+                lecture_ids[(lecture.date, lecture.lecture_type)] = lecture.id
+
+            for start in range(0, len(records), UPSERT_CHUNK_SIZE):
+                AttendanceRecord.objects.bulk_create(
+                    [
+                        AttendanceRecord(
+                            student_id=student_id,
+                            lecture_id=lecture_ids[key],
+                            status=status,
+                            marked_by=system_user,
                         )
+                        for student_id, key, status in records[start:start + UPSERT_CHUNK_SIZE]
+                    ],
+                    update_conflicts=True,
+                    update_fields=["status", "marked_by", "updated_at"],
+                    unique_fields=["lecture", "student"],
+                )
+
+        return stats
+
+    def _diff_records(self, batch, keys, lecture_ids, students, records, stats, dry_run):
+        """
+        Classify incoming cells against stored attendance for the sheet's
+        batch and date range (one query) and return only the cells that
+        need writing. Unchanged rows keep their updated_at.
+        """
+        existing = {}
+        if keys and lecture_ids:
+            key_by_lecture = {lid: key for key, lid in lecture_ids.items()}
+            for student_id, lecture_id, status in AttendanceRecord.objects.filter(
+                lecture__batch=batch,
+                lecture__date__range=(keys[0][0], keys[-1][0]),
+            ).values_list("student_id", "lecture_id", "status"):
+                key = key_by_lecture.get(lecture_id)
+                if key is not None:
+                    existing[(student_id, key)] = status
 
-                row_num += 1
+        rolls = {student_id: roll for roll, student_id in students.items()}
+        changes = {}
+        updates = []
+        for record_key, status in records.items():
+            old = existing.get(record_key)
+            if old is None:
+                stats["inserted"] += 1
+            elif old != status:
+                stats["updated"] += 1
+                updates.append((rolls[record_key[0]], record_key[1], old, status))
+            else:
+                stats["unchanged"] += 1
+                continue
+            changes[record_key] = status
+
+        self.stdout.write(
+            f"  Diff: {stats['inserted']} insert(s), {stats['updated']} update(s), "
+            f"{stats['unchanged']} unchanged"
+        )
+        updates.sort()
+        for roll_number, (d, session), old, new in updates[:DIFF_REPORT_LIMIT]:
+            self.stdout.write(
+                f"  [{'WOULD UPDATE' if dry_run else 'UPDATE'}] {roll_number} "
+                f"{d.strftime('%d-%b-%Y')} {session}: {old} -> {new}"
+            )
+        if len(updates) > DIFF_REPORT_LIMIT:
+            self.stdout.write(f"  ... and {len(updates) - DIFF_REPORT_LIMIT} more update(s)")
 
-            self.stdout.write(self.style.SUCCESS(f"Completed processing for {batch_name}"))
+        return changes
+
+    def _print_summary(self, stats, elapsed, dry_run):
+        elapsed = max(elapsed, 1e-6)
 
-        # Print summary
         self.stdout.write("\n" + "="*60)
         self.stdout.write(self.style.SUCCESS("IMPORT SUMMARY"))
         self.stdout.write("="*60)
         self.stdout.write(f"Batches processed:        {stats['batches_processed']}")
         self.stdout.write(f"Batches not found:        {stats['batches_not_found']}")
-        self.stdout.write(f"Lectures created/found:   {stats['lectures_created']}")
+        self.stdout.write(f"Lectures created:         {stats['lectures_created']}")
+        self.stdout.write(f"Lectures found:           {stats['lectures_found']}")
         self.stdout.write(f"Attendance records:       {stats['attendance_records']}")
         self.stdout.write(f"Students not found:       {stats['students_not_found']}")
+        self.stdout.write(f"Rows read:                {stats['rows_read']}")
+        if self.diff:
+            self.stdout.write(f"Cells inserted:           {stats['inserted']}")
+            self.stdout.write(f"Cells updated:            {stats['updated']}")
+            self.stdout.write(f"Cells unchanged:          {stats['unchanged']}")
+        self.stdout.write(f"Elapsed:                  {elapsed:.2f}s ({stats['rows_read'] / elapsed:.1f} rows/sec)")
+        self.stdout.write(f"SQL queries:              {self.query_count}")
         self.stdout.write("="*60)
 
         if dry_run:
@@ -275,32 +439,3 @@ class Command(BaseCommand):
             )
         else:
             self.stdout.write(self.style.SUCCESS("\nAttendance import completed successfully!"))
-
-    def _parse_date(self, date_str):
-        """Attempt to parse a date string in multiple formats, or convert datetime objects."""
-        # If already a datetime object, just extract the date
-        if hasattr(date_str, 'date'):
-            # It's a datetime.datetime object
-            return date_str.date()
-        
-        # If already a date object, return as-is
-        if hasattr(date_str, 'year') and hasattr(date_str, 'month') and hasattr(date_str, 'day'):
-            if not hasattr(date_str, 'hour'):
-                # It's a date object
-                return date_str
-        
-        # Try parsing as string
-        formats = [
-            "%d-%m-%Y",
-            "%d/%m/%Y",
-            "%d-%b-%Y",
-            "%d %b %Y",
-            "%Y-%m-%d",
-            "%m-%d-%Y",
-        ]
-        for fmt in formats:
-            try:
-                return datetime.strptime(str(date_str), fmt).date()
-            except ValueError:
-                continue
-        return None
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from attendance.services import find_summary_drift, rebuild_attendance_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute StudentAttendanceSummary rows from raw attendance, or check them for drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report summaries that differ from raw attendance without writing",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            action="append",
+            dest="batch_ids",
+            help="Limit the rebuild to a batch id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        if options["check"]:
+            drifted, sample = find_summary_drift()
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS("No drift: all summaries match raw attendance"))
+                return
+
+            self.stdout.write(self.style.WARNING(f"{drifted} summary row(s) drifted"))
+            for student_id, stored_p, actual_p, stored_a, actual_a in sample:
+                self.stdout.write(
+                    f"  student {student_id}: present {stored_p} → {actual_p}, "
+                    f"absent {stored_a} → {actual_a}"
+                )
+            self.stdout.write("Run without --check to repair.")
+            return
+
+        with transaction.atomic():
+            written = rebuild_attendance_summaries(batch_ids=options["batch_ids"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {written} summary row(s) in {time.monotonic() - started:.2f}s"
+            )
+        )
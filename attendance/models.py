@@ -30,9 +30,49 @@ class AttendanceRecord(models.Model):
         return f"{self.student.roll_number} - {self.lecture} : {self.status}"
 
 
+class StudentAttendanceSummary(models.Model):
+    """
+    Present/absent counts per student over lectures of their current batch.
+    Kept current by the database triggers in attendance/summaries.py; the
+    lecture total is counted live, as it changes with the date.
+    """
+
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="attendance_summary",
+    )
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    last_attended_lecture = models.ForeignKey(
+        Lecture,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Student Attendance Summary"
+        verbose_name_plural = "Student Attendance Summaries"
+
+    def attendance_percent(self, total_lectures):
+        if total_lectures == 0:
+            return 0
+        return round((self.present_count / total_lectures) * 100, 2)
+
+    def __str__(self):
+        return f"{self.student_id}: {self.present_count}P/{self.absent_count}A"
+
+
 class EODAttendanceRun(models.Model):
     run_date = models.DateField(unique=True, db_index=True)
     executed_at = models.DateTimeField(auto_now_add=True)
+    rows_inserted = models.PositiveIntegerField(default=0)
+    lectures_processed = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
 
     class Meta:
         ordering = ['-run_date']
@@ -41,3 +81,56 @@ class EODAttendanceRun(models.Model):
 
     def __str__(self):
         return f"EOD Attendance Run - {self.run_date}"
+
+
+class AttendanceImport(models.Model):
+    """An uploaded attendance workbook imported in the background."""
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    file = models.FileField(upload_to="imports/attendance/")
+    original_name = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING", db_index=True)
+
+    sheets_done = models.PositiveIntegerField(default=0)
+    sheets_total = models.PositiveIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    summary = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Touched by the worker while running; a stale heartbeat means it died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["content_hash", "status"]),
+        ]
+        constraints = [
+            # One live import per workbook; failed ones may be retried
+            models.UniqueConstraint(
+                fields=["content_hash"],
+                condition=~models.Q(status="FAILED"),
+                name="attendance_import_active_hash_unique",
+            ),
+        ]
+
+    @property
+    def progress_percent(self):
+        if self.sheets_total == 0:
+            return 0
+        return round((self.sheets_done / self.sheets_total) * 100)
+
+    def __str__(self):
+        return f"{self.original_name} [{self.status}] {self.created_at:%Y-%m-%d %H:%M}"
@@ -1,73 +1,421 @@
 # attendance/services.py
 
-from datetime import date
+import hashlib
+import io
+import re
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from core.cache import attendance_changed, cached_tile
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
 
 from lectures.models import Lecture
 from students.models import Student
-from .models import AttendanceRecord, EODAttendanceRun
+from .models import AttendanceImport, AttendanceRecord, EODAttendanceRun, StudentAttendanceSummary
+from .summaries import recompute_sql, summary_select_sql
 from auditlog.models import AuditLog
+from auditlog.utils import create_audit_log
  
 
 
 ABSENT = "A"
 PRESENT = "P"
 
+ROLL_NUMBER_RE = re.compile(r'^(22|23|24|25)[A-Z]{2}\d{4}$')
+
+# Status written to each session for a given session_part
+SESSION_PART_STATUS = {
+    "BOTH": {"MS": PRESENT, "AS": PRESENT},
+    "MS": {"MS": PRESENT, "AS": ABSENT},
+    "AS": {"MS": ABSENT, "AS": PRESENT},
+}
+
+# Per-roll results returned by mark_present_bulk
+RESULT_OK = "ok"
+RESULT_INVALID = "invalid"
+RESULT_UNKNOWN = "unknown"
+RESULT_INACTIVE = "inactive"
+RESULT_NO_LECTURE = "no_lecture"
+
+
+def mark_present_bulk(roll_numbers, session_part="BOTH", marked_by=None, target_date: date | None = None):
+    """
+    Mark a batch of scanned roll numbers for target_date.
+
+    Students are resolved with one query, today's lectures with another,
+    and every AttendanceRecord is written by a single
+    INSERT ... ON CONFLICT (lecture, student) DO UPDATE.
+
+    Returns a list of {"roll_number", "result", "lectures"} dicts in the
+    order the roll numbers were given (duplicates collapsed).
+    """
+
+    if session_part not in SESSION_PART_STATUS:
+        raise ValueError(f"Invalid session part: {session_part}")
+
+    if target_date is None:
+        target_date = timezone.localdate()
+
+    rolls = []
+    seen = set()
+    for roll in roll_numbers:
+        roll = (roll or "").strip().upper()
+        if roll and roll not in seen:
+            seen.add(roll)
+            rolls.append(roll)
+
+    valid_rolls = [r for r in rolls if ROLL_NUMBER_RE.match(r)]
+
+    students = {
+        row["roll_number"]: row
+        for row in Student.objects.filter(roll_number__in=valid_rolls)
+        .values("id", "roll_number", "batch_id", "is_active")
+    }
+
+    batch_ids = {s["batch_id"] for s in students.values() if s["is_active"]}
+    lectures_by_batch = {}
+    for lec in Lecture.objects.filter(date=target_date, batch_id__in=batch_ids).values(
+        "id", "batch_id", "lecture_type"
+    ):
+        lectures_by_batch.setdefault(lec["batch_id"], []).append(lec)
+
+    statuses = SESSION_PART_STATUS[session_part]
+    records = []
+    results = []
+    for roll in rolls:
+        student = students.get(roll)
+        if not ROLL_NUMBER_RE.match(roll):
+            result, count = RESULT_INVALID, 0
+        elif student is None:
+            result, count = RESULT_UNKNOWN, 0
+        elif not student["is_active"]:
+            result, count = RESULT_INACTIVE, 0
+        elif not lectures_by_batch.get(student["batch_id"]):
+            result, count = RESULT_NO_LECTURE, 0
+        else:
+            lectures = lectures_by_batch[student["batch_id"]]
+            for lec in lectures:
+                records.append(
+                    AttendanceRecord(
+                        student_id=student["id"],
+                        lecture_id=lec["id"],
+                        status=statuses[lec["lecture_type"]],
+                        marked_by=marked_by,
+                    )
+                )
+            result, count = RESULT_OK, len(lectures)
+        results.append({"roll_number": roll, "result": result, "lectures": count})
+
+    if records:
+        # A stable row order means concurrent scanners lock rows in the same
+        # sequence, so overlapping batches serialize instead of deadlocking.
+        records.sort(key=lambda r: (r.lecture_id, r.student_id))
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                update_fields=["status", "marked_by", "updated_at"],
+                unique_fields=["lecture", "student"],
+            )
+            attendance_changed()
+
+    return results
+
+
 
 @transaction.atomic
 def mark_absent_for_date(target_date: date | None = None):
     """
     Automatically mark students ABSENT for lectures
     that occurred on target_date but were not marked PRESENT.
+
+    Runs as a single set-based INSERT ... SELECT over every lecture of the
+    day, so the number of round-trips does not depend on how many batches
+    or students there are. Returns {lecture_id: rows_inserted}.
     """
 
     if target_date is None:
         target_date = timezone.localdate()
 
-    lectures = Lecture.objects.filter(date=target_date).select_related('batch')
-
-    if not lectures.exists():
-        return  
-    
-    for lecture in lectures:
-        students = Student.objects.filter(
-            batch=lecture.batch,
-            is_active=True,
-        ).only('id')
-
-        present_student_ids = set(
-            AttendanceRecord.objects.filter(
-                lecture=lecture,
-                status=PRESENT,
-            ).values_list("student_id", flat=True)
-        )
-        
-        absent_students = [s for s in students if s.id not in present_student_ids]
-        
-        # Use bulk_create for better performance
-        absent_records = [
-            AttendanceRecord(
-                student=student,
-                lecture=lecture,
-                status=ABSENT,
-            )
-            for student in absent_students
-        ]
-        
-        AttendanceRecord.objects.bulk_create(
-            absent_records,
-            ignore_conflicts=True
+    started = time.monotonic()
+
+    sql = f"""
+        WITH inserted AS (
+            INSERT INTO {AttendanceRecord._meta.db_table}
+                (lecture_id, student_id, status, marked_by_id, marked_at, updated_at)
+            SELECT l.id, s.id, %s, NULL, now(), now()
+            FROM {Lecture._meta.db_table} l
+            JOIN {Student._meta.db_table} s
+                ON s.batch_id = l.batch_id AND s.is_active
+            WHERE l.date = %s
+            ON CONFLICT (lecture_id, student_id) DO NOTHING
+            RETURNING lecture_id
         )
-        
-        print(f"Marked {len(absent_records)} absent for lecture {lecture.id} on {target_date}")
-    
+        SELECT l.id, l.batch_id, COUNT(inserted.lecture_id)
+        FROM {Lecture._meta.db_table} l
+        LEFT JOIN inserted ON inserted.lecture_id = l.id
+        WHERE l.date = %s
+        GROUP BY l.id, l.batch_id
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [ABSENT, target_date, target_date])
+        rows = cursor.fetchall()
+
+    if not rows:
+        return {}
+
+    inserted_by_lecture = {lecture_id: count for lecture_id, _, count in rows}
+    rows_inserted = sum(inserted_by_lecture.values())
+
+    attendance_changed()
+
     # Create audit log once per run
     AuditLog.objects.create(
         action_type="SYSTEM",
-        description=f"EOD absence marking completed for {target_date}",
+        description=(
+            f"EOD absence marking completed for {target_date}: "
+            f"{rows_inserted} absent across {len(inserted_by_lecture)} lecture(s)"
+        ),
+    )
+
+    EODAttendanceRun.objects.update_or_create(
+        run_date=target_date,
+        defaults={
+            "rows_inserted": rows_inserted,
+            "lectures_processed": len(inserted_by_lecture),
+            "duration_seconds": round(time.monotonic() - started, 3),
+        },
+    )
+
+    return inserted_by_lecture
+
+
+def rebuild_attendance_summaries(student_ids=None, batch_ids=None):
+    """
+    Recompute StudentAttendanceSummary rows from raw attendance for the given
+    students or batches (all students when neither is given).
+
+    Day-to-day writes keep summaries current through the triggers in
+    attendance/summaries.py; this full recompute is only for repairs
+    (rebuild_attendance_summaries command). Returns rows written.
+    """
+
+    if student_ids is not None and not student_ids:
+        return 0
+    if batch_ids is not None and not batch_ids:
+        return 0
+
+    if student_ids is not None:
+        where, params = "s.id = ANY(%s)", [list(student_ids)]
+    elif batch_ids is not None:
+        where, params = "s.batch_id = ANY(%s)", [list(batch_ids)]
+    else:
+        where, params = "TRUE", []
+
+    with connection.cursor() as cursor:
+        cursor.execute(recompute_sql(where), params)
+        written = cursor.rowcount
+
+    attendance_changed()
+    return written
+
+
+def find_summary_drift(limit=20):
+    """
+    Compare stored summaries against a fresh computation without writing.
+    Returns (drifted_count, sample_rows) where each sample row is
+    (student_id, stored_present, actual_present, stored_absent, actual_absent).
+    """
+
+    sql = f"""
+        SELECT a.student_id, st.present_count, a.present_count,
+               st.absent_count, a.absent_count
+        FROM ({summary_select_sql("TRUE")}) a
+        LEFT JOIN {StudentAttendanceSummary._meta.db_table} st ON st.student_id = a.student_id
+        WHERE st.student_id IS NULL
+           OR st.present_count <> a.present_count
+           OR st.absent_count <> a.absent_count
+           OR st.last_attended_lecture_id IS DISTINCT FROM a.last_attended_lecture_id
+        ORDER BY a.student_id
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+
+    return len(rows), rows[:limit]
+
+
+def get_attendance_summary(student):
+    """Return the student's summary row, building it on first access."""
+    try:
+        return StudentAttendanceSummary.objects.select_related("last_attended_lecture").get(student=student)
+    except StudentAttendanceSummary.DoesNotExist:
+        rebuild_attendance_summaries(student_ids=[student.id])
+        return StudentAttendanceSummary.objects.select_related("last_attended_lecture").get(student=student)
+
+
+def get_defaulters(threshold=None, limit=None, today: date | None = None):
+    """
+    Worst-attending active students below `threshold` percent, worst first.
+
+    Percentages, filtering, ordering and LIMIT all run in the database over
+    the per-student summary rows and live per-batch lecture totals; the
+    result is cached per day and attendance data version.
+    """
+
+    if threshold is None:
+        threshold = settings.ATTENDANCE_DEFAULTER_THRESHOLD
+    if limit is None:
+        limit = settings.ATTENDANCE_DEFAULTER_LIMIT
+    if today is None:
+        today = timezone.localdate()
+
+    return cached_tile(
+        "defaulters",
+        f"{today}:{threshold}:{limit}",
+        lambda: _query_defaulters(threshold, limit, today),
+    )
+
+
+def _query_defaulters(threshold, limit, today):
+    # Denominator: the batch's lectures held so far, counted live so it
+    # moves with the date and with lecture writes
+    sql = f"""
+        WITH totals AS (
+            SELECT batch_id, COUNT(*) AS total
+            FROM {Lecture._meta.db_table}
+            WHERE date <= %s
+            GROUP BY batch_id
+        )
+        SELECT s.id, s.roll_number, s.full_name,
+               sm.present_count * 100.0 / t.total AS percent
+        FROM {StudentAttendanceSummary._meta.db_table} sm
+        JOIN {Student._meta.db_table} s ON s.id = sm.student_id
+        JOIN totals t ON t.batch_id = s.batch_id
+        WHERE s.is_active AND sm.present_count * 100.0 / t.total < %s
+        ORDER BY percent, s.roll_number
+        LIMIT %s
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [today, threshold, limit])
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "id": student_id,
+            "roll_no": roll_number,
+            "full_name": full_name,
+            "attendance_percent": round(float(percent), 2),
+        }
+        for student_id, roll_number, full_name, percent in rows
+    ]
+
+
+# Error lines kept in AttendanceImport.summary
+IMPORT_ERROR_LIMIT = 100
+
+
+def fail_stale_imports(**filters):
+    """
+    Mark RUNNING imports whose worker stopped sending heartbeats as FAILED,
+    so the workbook can be uploaded again. Returns the number of jobs failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.ATTENDANCE_IMPORT_STALE_SECONDS)
+    return (
+        AttendanceImport.objects
+        .filter(status="RUNNING", **filters)
+        .filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff))
+        .update(
+            status="FAILED",
+            error="Import stopped responding",
+            finished_at=timezone.now(),
+        )
     )
-    
-    EODAttendanceRun.objects.get_or_create(run_date=target_date)
 
 
+def request_attendance_import(uploaded_file, user):
+    """
+    Store an uploaded workbook and queue its import. Returns (job, created);
+    a byte-identical upload that is pending, running or done is reused
+    instead of importing the same file twice. A unique constraint on the
+    hash of live imports settles concurrent uploads of the same file.
+    """
+    from .tasks import import_attendance_task
+
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    fail_stale_imports(content_hash=content_hash)
+    active = AttendanceImport.objects.filter(content_hash=content_hash).exclude(status="FAILED")
+    existing = active.first()
+    if existing:
+        return existing, False
+
+    uploaded_file.seek(0)
+    job = AttendanceImport(
+        original_name=uploaded_file.name,
+        content_hash=content_hash,
+        uploaded_by=user,
+    )
+    job.file.save(f"{content_hash}.xlsx", uploaded_file, save=False)
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # Another upload of the same workbook won the race
+        job.file.delete(save=False)
+        return active.get(), False
+    transaction.on_commit(lambda: import_attendance_task.delay(job.id))
+    return job, True
+
+
+def run_attendance_import(job):
+    """Import `job`'s workbook, recording progress per sheet and the final summary."""
+    from .management.commands.import_attendance import Command
+
+    AttendanceImport.objects.filter(id=job.id).update(status="RUNNING", heartbeat_at=timezone.now())
+
+    def progress(sheets_done, sheets_total, rows, errors):
+        AttendanceImport.objects.filter(id=job.id).update(
+            sheets_done=sheets_done,
+            sheets_total=sheets_total,
+            rows_processed=rows,
+            error_count=errors,
+            heartbeat_at=timezone.now(),
+        )
+
+    started = time.monotonic()
+    command = Command(stdout=io.StringIO(), stderr=io.StringIO())
+    stats = command.run_import(job.file.path, progress=progress)
+
+    job.summary = {
+        **stats,
+        "duration_seconds": round(time.monotonic() - started, 2),
+        "sql_queries": command.query_count,
+        "errors": command.errors[:IMPORT_ERROR_LIMIT],
+    }
+    job.error_count = len(command.errors)
+    job.finished_at = timezone.now()
+    # A job already failed as stale stays FAILED, as a re-upload may be live
+    AttendanceImport.objects.filter(id=job.id, status="RUNNING").update(status="DONE")
+    job.save(update_fields=["summary", "error_count", "finished_at"])
+
+    create_audit_log(
+        actor=job.uploaded_by,
+        action_type="SYSTEM",
+        description=(
+            f"Imported attendance workbook {job.original_name}: "
+            f"{stats['batches_processed']} sheet(s), {stats['rows_read']} row(s), "
+            f"{stats['attendance_records']} record(s), {stats['lectures_created']} lecture(s) created, "
+            f"{job.error_count} error(s)"
+        ),
+        target=job,
+    )
+    return job.summary
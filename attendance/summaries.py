@@ -0,0 +1,231 @@
+# attendance/summaries.py
+"""
+PostgreSQL triggers that keep StudentAttendanceSummary in step with
+attendance, student and lecture writes.
+
+Counts cover the student's attendance on lectures of their current batch.
+Attendance triggers are statement-level with transition tables, so a
+scan batch, the EOD INSERT ... SELECT or a backfill day adds its net
+present/absent deltas once per statement, in the same transaction, and
+the cost follows the rows written rather than the batch's history.
+Rare structural changes (a student or lecture moving batch) recompute
+only the students involved.
+"""
+
+from django.db import connection
+
+from lectures.models import Lecture
+from students.models import Student
+from .models import AttendanceRecord, StudentAttendanceSummary
+
+
+SUMMARY = StudentAttendanceSummary._meta.db_table
+ATTENDANCE = AttendanceRecord._meta.db_table
+LECTURE = Lecture._meta.db_table
+STUDENT = Student._meta.db_table
+
+# (event, transition tables, (transition table, sign) sources)
+EVENTS = (
+    ("INSERT", "NEW TABLE AS new_rows", (("new_rows", 1),)),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows", (("new_rows", 1), ("old_rows", -1))),
+    ("DELETE", "OLD TABLE AS old_rows", (("old_rows", -1),)),
+)
+
+
+def summary_select_sql(where):
+    """
+    SELECT producing one summary row per student matching `where`
+    (a condition on the student table aliased as s).
+    """
+    return f"""
+        SELECT
+            s.id AS student_id,
+            COUNT(r.id) FILTER (WHERE r.status = 'P') AS present_count,
+            COUNT(r.id) FILTER (WHERE r.status = 'A') AS absent_count,
+            (
+                SELECT pr.lecture_id
+                FROM {ATTENDANCE} pr
+                JOIN {LECTURE} pl ON pl.id = pr.lecture_id
+                WHERE pr.student_id = s.id AND pr.status = 'P' AND pl.batch_id = s.batch_id
+                ORDER BY pl.date DESC, pl.lecture_type DESC
+                LIMIT 1
+            ) AS last_attended_lecture_id
+        FROM {STUDENT} s
+        LEFT JOIN (
+            {ATTENDANCE} r JOIN {LECTURE} l ON l.id = r.lecture_id
+        ) ON r.student_id = s.id AND l.batch_id = s.batch_id
+        WHERE {where}
+        GROUP BY s.id, s.batch_id
+    """
+
+
+def recompute_sql(where):
+    """Upsert freshly computed summary rows for the students matching `where`."""
+    return f"""
+        INSERT INTO {SUMMARY}
+            (student_id, present_count, absent_count, last_attended_lecture_id, updated_at)
+        SELECT summary.*, now() FROM ({summary_select_sql(where)}) summary
+        ON CONFLICT (student_id) DO UPDATE SET
+            present_count = EXCLUDED.present_count,
+            absent_count = EXCLUDED.absent_count,
+            last_attended_lecture_id = EXCLUDED.last_attended_lecture_id,
+            updated_at = EXCLUDED.updated_at
+    """
+
+
+RECOMPUTE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION attendance_summary_recompute(ids bigint[]) RETURNS void AS $$
+{recompute_sql("s.id = ANY(ids)")};
+$$ LANGUAGE sql;
+"""
+
+
+def _attendance_function(event, sources):
+    changes = "\n            UNION ALL\n".join(
+        f"""            SELECT t.student_id, {sign} * (t.status = 'P')::int AS p, {sign} * (t.status = 'A')::int AS a
+            FROM {table} t
+            JOIN {LECTURE} l ON l.id = t.lecture_id
+            JOIN {STUDENT} s ON s.id = t.student_id AND s.batch_id = l.batch_id"""
+        for table, sign in sources
+    )
+    if event == "UPDATE":
+        # Re-marking a row with the same status leaves the last attended lecture alone
+        present_students = """        SELECT n.student_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE 'P' IN (n.status, o.status)
+          AND (n.status, n.lecture_id, n.student_id) IS DISTINCT FROM (o.status, o.lecture_id, o.student_id)
+        UNION
+        SELECT o.student_id
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        WHERE o.status = 'P' AND o.student_id <> n.student_id"""
+    else:
+        present_students = "\n        UNION\n".join(
+            f"        SELECT student_id FROM {table} WHERE status = 'P'"
+            for table, _ in sources
+        )
+    return f"""
+CREATE OR REPLACE FUNCTION attendance_summary_{event.lower()}() RETURNS trigger AS $$
+BEGIN
+    UPDATE {SUMMARY} sm
+    SET present_count = sm.present_count + delta.p,
+        absent_count = sm.absent_count + delta.a,
+        updated_at = now()
+    FROM (
+        SELECT student_id, SUM(p) AS p, SUM(a) AS a
+        FROM (
+{changes}
+        ) changes
+        GROUP BY student_id
+        HAVING SUM(p) <> 0 OR SUM(a) <> 0
+    ) delta
+    WHERE sm.student_id = delta.student_id;
+
+    -- Only a present mark gained or lost can move the last attended lecture
+    UPDATE {SUMMARY} sm
+    SET last_attended_lecture_id = (
+        SELECT pr.lecture_id
+        FROM {ATTENDANCE} pr
+        JOIN {LECTURE} pl ON pl.id = pr.lecture_id
+        JOIN {STUDENT} ps ON ps.id = pr.student_id AND ps.batch_id = pl.batch_id
+        WHERE pr.student_id = sm.student_id AND pr.status = 'P'
+        ORDER BY pl.date DESC, pl.lecture_type DESC
+        LIMIT 1
+    )
+    WHERE sm.student_id IN (
+{present_students}
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+STUDENT_FUNCTIONS = f"""
+CREATE OR REPLACE FUNCTION attendance_summary_student_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO {SUMMARY}
+        (student_id, present_count, absent_count, last_attended_lecture_id, updated_at)
+    SELECT id, 0, 0, NULL, now() FROM new_rows
+    ON CONFLICT (student_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION attendance_summary_student_batch() RETURNS trigger AS $$
+BEGIN
+    PERFORM attendance_summary_recompute(ARRAY[NEW.id]::bigint[]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION attendance_summary_lecture_batch() RETURNS trigger AS $$
+BEGIN
+    PERFORM attendance_summary_recompute(
+        ARRAY(SELECT DISTINCT student_id FROM {ATTENDANCE} WHERE lecture_id = NEW.id)::bigint[]
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def install_sql():
+    parts = [RECOMPUTE_FUNCTION]
+    for event, referencing, sources in EVENTS:
+        name = f"attendance_summary_{event.lower()}"
+        parts.append(_attendance_function(event, sources))
+        parts.append(f"""
+DROP TRIGGER IF EXISTS {name} ON {ATTENDANCE};
+CREATE TRIGGER {name}
+    AFTER {event} ON {ATTENDANCE}
+    REFERENCING {referencing}
+    FOR EACH STATEMENT EXECUTE FUNCTION {name}();
+""")
+    parts.append(STUDENT_FUNCTIONS)
+    parts.append(f"""
+DROP TRIGGER IF EXISTS attendance_summary_student_insert ON {STUDENT};
+CREATE TRIGGER attendance_summary_student_insert
+    AFTER INSERT ON {STUDENT}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_summary_student_insert();
+
+DROP TRIGGER IF EXISTS attendance_summary_student_batch ON {STUDENT};
+CREATE TRIGGER attendance_summary_student_batch
+    AFTER UPDATE OF batch_id ON {STUDENT}
+    FOR EACH ROW WHEN (OLD.batch_id IS DISTINCT FROM NEW.batch_id)
+    EXECUTE FUNCTION attendance_summary_student_batch();
+
+DROP TRIGGER IF EXISTS attendance_summary_lecture_batch ON {LECTURE};
+CREATE TRIGGER attendance_summary_lecture_batch
+    AFTER UPDATE OF batch_id ON {LECTURE}
+    FOR EACH ROW WHEN (OLD.batch_id IS DISTINCT FROM NEW.batch_id)
+    EXECUTE FUNCTION attendance_summary_lecture_batch();
+""")
+    return "\n".join(parts)
+
+
+def triggers_installed():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM pg_trigger WHERE tgname LIKE 'attendance_summary_%' AND NOT tgisinternal"
+        )
+        return cursor.fetchone()[0] == len(EVENTS) + 3
+
+
+def install_triggers():
+    """Create or replace the summary functions and triggers (idempotent)."""
+    with connection.cursor() as cursor:
+        cursor.execute(install_sql())
+
+
+def install_on_migrate(sender, using="default", **kwargs):
+    """post_migrate hook: install triggers, rebuilding summaries on first install."""
+    if connection.vendor != "postgresql":
+        return
+    first_install = not triggers_installed()
+    install_triggers()
+    if first_install:
+        with connection.cursor() as cursor:
+            cursor.execute(recompute_sql("TRUE"))
@@ -1,5 +1,7 @@
+from datetime import date
 from celery import shared_task
-from attendance.services import mark_absent_for_date
+from attendance.models import AttendanceImport
+from attendance.services import fail_stale_imports, mark_absent_for_date, run_attendance_import
 from django.utils import timezone
 
 
@@ -11,10 +13,36 @@ def mark_absent_for_date_task(self, target_date=None):
     """
     if target_date is None:
         target_date = timezone.localdate()
+    elif isinstance(target_date, str):
+        target_date = date.fromisoformat(target_date)
+
+    inserted = mark_absent_for_date(target_date)
+
+    # JSON result backend needs string keys
+    return {str(lecture_id): count for lecture_id, count in inserted.items()}
+
+
+@shared_task(bind=True)
+def import_attendance_task(self, job_id):
+    """
+    Celery task to import an uploaded attendance workbook.
+    """
+    job = AttendanceImport.objects.get(id=job_id)
 
     try:
-        mark_absent_for_date(target_date)
+        return run_attendance_import(job)
     except Exception as exc:
-        raise self.retry(exc=exc)
+        AttendanceImport.objects.filter(id=job_id).update(
+            status="FAILED",
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        raise
+
 
-    mark_absent_for_date(target_date)
\ No newline at end of file
+@shared_task
+def fail_stale_imports_task():
+    """
+    Celery task to fail attendance imports whose worker stopped responding.
+    """
+    return fail_stale_imports()
@@ -1,3 +1,125 @@
-from django.test import TestCase
+import random
+import threading
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from lectures.models import Batch, Lecture
+from students.models import Branch, Student
+from .models import AttendanceRecord
+from .services import SESSION_PART_STATUS, mark_present_bulk
+
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "postgresql", "Concurrent upserts need PostgreSQL")
+class MarkPresentBulkConcurrencyTests(TransactionTestCase):
+    """Overlapping scanner batches must not lose, duplicate or deadlock on rows."""
+
+    THREADS = 6
+    STUDENTS = 40
+    # Every thread scans every roll each round; rounds are separated by a
+    # barrier so the last round's session part is the expected final status
+    ROUNDS = ("BOTH", "AS", "MS")
+
+    def setUp(self):
+        self.user = User.objects.create_user("scanner@example.com", "scanner", role="VOLUNTEER")
+        batch = Batch.objects.create(name="Concurrency Batch")
+        branch = Branch.objects.create(name="Concurrency Branch")
+        self.today = timezone.localdate()
+        self.lectures = {
+            lecture_type: Lecture.objects.create(
+                batch=batch,
+                date=self.today,
+                title=f"{lecture_type} session",
+                lecture_type=lecture_type,
+                created_by=self.user,
+            )
+            for lecture_type in ("MS", "AS")
+        }
+        self.rolls = [f"25CS{i:04d}" for i in range(self.STUDENTS)]
+        Student.objects.bulk_create([
+            Student(
+                full_name=f"Student {roll}",
+                roll_number=roll,
+                batch=batch,
+                branch=branch,
+                email=f"{roll.lower()}@example.com",
+                contact_number="9000000000",
+                parent_contact_number="9000000000",
+                parent_email=f"parent.{roll.lower()}@example.com",
+            )
+            for roll in self.rolls
+        ])
+
+    def _scanner(self, seed, barrier, errors):
+        rng = random.Random(seed)
+        try:
+            for session_part in self.ROUNDS:
+                rolls = self.rolls[:]
+                rng.shuffle(rolls)
+                barrier.wait()
+                mark_present_bulk(rolls, session_part, marked_by=self.user, target_date=self.today)
+        except Exception as exc:
+            errors.append(exc)
+            barrier.abort()
+        finally:
+            connection.close()
+
+    def test_overlapping_batches_keep_one_row_with_last_status(self):
+        barrier = threading.Barrier(self.THREADS, timeout=60)
+        errors = []
+        threads = [
+            threading.Thread(target=self._scanner, args=(seed, barrier, errors))
+            for seed in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        rows = list(AttendanceRecord.objects.values_list("lecture_id", "student__roll_number", "status"))
+        self.assertEqual(len(rows), len(self.rolls) * len(self.lectures))
+        self.assertEqual(len({(lecture_id, roll) for lecture_id, roll, _ in rows}), len(rows))
+
+        expected = {
+            self.lectures[lecture_type].id: status
+            for lecture_type, status in SESSION_PART_STATUS[self.ROUNDS[-1]].items()
+        }
+        for lecture_id, roll, status in rows:
+            self.assertEqual(status, expected[lecture_id], f"{roll} on lecture {lecture_id}")
+
+        # Trigger-maintained counters saw every statement exactly once
+        for lecture in Lecture.objects.filter(id__in=expected):
+            present = expected[lecture.id] == "P"
+            self.assertEqual(lecture.present_count, self.STUDENTS if present else 0)
+            self.assertEqual(lecture.absent_count, 0 if present else self.STUDENTS)
+
+
+class MarkAttendanceBulkViewTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("scanner@example.com", "scanner", role="VOLUNTEER")
+        self.client.force_login(user)
+
+    def test_non_object_json_body_is_rejected(self):
+        for body in ("[]", '"25CS0001"', "7", "null"):
+            response = self.client.post(
+                reverse("mark_attendance_bulk"), data=body, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn("error", response.json())
+
+    def test_non_string_session_part_is_rejected(self):
+        response = self.client.post(
+            reverse("mark_attendance_bulk"),
+            data={"roll_numbers": [], "session_part": ["MS"]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
@@ -2,9 +2,14 @@ from django.urls import path
 from .views import (
     admin_attendance_list,
     mark_attendance,
+    mark_attendance_bulk,
     mark_absent,
     batch_analysis_index,
     batch_attendance_analysis,
+    export_attendance_records,
+    import_attendance_upload,
+    import_attendance_status,
+    import_attendance_progress,
 )
 
 urlpatterns = [
@@ -15,7 +20,20 @@ urlpatterns = [
         batch_attendance_analysis,
         name="batch_attendance_analysis",
     ),
+    path(
+        "admin_view/batch-analysis/<int:batch_id>/export/",
+        export_attendance_records,
+        name="export_attendance_records",
+    ),
     path("attendance/mark/", mark_attendance, name="mark_attendance"),
+    path("attendance/mark/bulk/", mark_attendance_bulk, name="mark_attendance_bulk"),
     path("mark-absent/<int:lecture_id>/", mark_absent, name="mark-absent"),
+    path("attendance/import/", import_attendance_upload, name="import_attendance_upload"),
+    path("attendance/import/<int:job_id>/", import_attendance_status, name="import_attendance_status"),
+    path(
+        "attendance/import/<int:job_id>/progress/",
+        import_attendance_progress,
+        name="import_attendance_progress",
+    ),
 
 ]
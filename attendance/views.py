@@ -1,17 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.utils import timezone
-from .models import AttendanceRecord
+from .models import AttendanceImport, AttendanceRecord
 from lectures.models import Lecture, Batch
 from django.contrib.auth.decorators import login_required, user_passes_test
 from students.models import Student, Branch
 from django.core.paginator import Paginator
 from django.urls import reverse
-from django.db.models import Q, Count
+from django.db.models import Q
 from urllib.parse import urlencode
 from datetime import datetime, timedelta
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+import json
 import re
+from django.utils.text import slugify
 from auditlog.utils import create_audit_log
+from core.cache import attendance_changed
+from core.streaming import EXPORT_CHUNK_SIZE, csv_response
+from . import analytics
+from .services import (
+    ROLL_NUMBER_RE,
+    SESSION_PART_STATUS,
+    RESULT_OK,
+    RESULT_UNKNOWN,
+    RESULT_INACTIVE,
+    RESULT_NO_LECTURE,
+    mark_present_bulk,
+    request_attendance_import,
+)
 
 
 
@@ -78,71 +95,67 @@ def mark_attendance(request):
         messages.error(request, "Roll number and status are required.")
         return redirect("mark_attendance")
 
-    if not re.match(r'^(22|23|24|25)[A-Z]{2}\d{4}$', roll_number):
+    if not ROLL_NUMBER_RE.match(roll_number):
         messages.error(request, "Invalid roll number format. Enter manually.")
         return redirect("mark_attendance")
 
-    try:
-        student = Student.objects.select_related('batch').get(roll_number=roll_number, is_active=True)
-    except Student.DoesNotExist:
-        messages.error(request, "Invalid roll number. Student not found.")
+    if session_part not in SESSION_PART_STATUS:
+        messages.error(request, "Invalid session selected.")
         return redirect("mark_attendance")
 
-    lectures_today = Lecture.objects.filter(date=today, batch=student.batch)
+    result = mark_present_bulk([roll_number], session_part, request.user, today)[0]["result"]
 
-    if not lectures_today.exists():
+    if result in (RESULT_UNKNOWN, RESULT_INACTIVE):
+        messages.error(request, "Invalid roll number. Student not found.")
+    elif result == RESULT_NO_LECTURE:
         messages.error(request, "No lectures exist for this student today.")
-        return redirect("mark_attendance")
-
-    if session_part == "BOTH":
-        for lecture in lectures_today:
-            AttendanceRecord.objects.update_or_create(
-                student=student,
-                lecture=lecture,
-                defaults={"status": "P", "marked_by": request.user},
-            )
-        messages.success(request, f"{student.roll_number} marked Present for BOTH Morning and Afternoon sessions.")
-        return redirect("mark_attendance")
-
-    if session_part == "MS":
-        ms = lectures_today.filter(lecture_type="MS").first()
-        as_ = lectures_today.filter(lecture_type="AS").first()
-
-        if ms:
-            AttendanceRecord.objects.update_or_create(
-                student=student,
-                lecture=ms,
-                defaults={"status": "P", "marked_by": request.user},
-            )
-        if as_:
-            AttendanceRecord.objects.update_or_create(
-                student=student,
-                lecture=as_,
-                defaults={"status": "A", "marked_by": request.user},
-            )
+    elif session_part == "BOTH":
+        messages.success(request, f"{roll_number} marked Present for BOTH Morning and Afternoon sessions.")
+    elif session_part == "MS":
+        messages.success(request, f"{roll_number} marked: Morning (Present), Afternoon (Absent)")
+    else:
+        messages.success(request, f"{roll_number} marked: Morning (Absent), Afternoon (Present)")
 
-        messages.success(request, f"{student.roll_number} marked: Morning (Present), Afternoon (Absent)")
-        return redirect("mark_attendance")
+    return redirect("mark_attendance")
 
-    if session_part == "AS":
-        ms = lectures_today.filter(lecture_type="MS").first()
-        as_ = lectures_today.filter(lecture_type="AS").first()
 
-        if as_:
-            AttendanceRecord.objects.update_or_create(
-                student=student,
-                lecture=as_,
-                defaults={"status": "P", "marked_by": request.user},
-            )
-        if ms:
-            AttendanceRecord.objects.update_or_create(
-                student=student,
-                lecture=ms,
-                defaults={"status": "A", "marked_by": request.user},
-            )
+@login_required
+@require_POST
+def mark_attendance_bulk(request):
+    """
+    Batch scan ingestion. Accepts JSON {"roll_numbers": [...], "session_part": "BOTH"}
+    or form fields roll_numbers (comma/newline separated) and session_part.
+    """
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body."}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({"error": "JSON body must be an object."}, status=400)
+        roll_numbers = payload.get("roll_numbers") or []
+        session_part = payload.get("session_part", "BOTH")
+    else:
+        roll_numbers = re.split(r"[\s,]+", request.POST.get("roll_numbers", ""))
+        session_part = request.POST.get("session_part", "BOTH")
+
+    if not isinstance(roll_numbers, list) or not all(isinstance(r, str) for r in roll_numbers):
+        return JsonResponse({"error": "roll_numbers must be a list of strings."}, status=400)
+
+    if not isinstance(session_part, str) or session_part not in SESSION_PART_STATUS:
+        return JsonResponse({"error": "session_part must be one of BOTH, MS, AS."}, status=400)
+
+    results = mark_present_bulk(roll_numbers, session_part, request.user)
+    marked = sum(1 for r in results if r["result"] == RESULT_OK)
+
+    if marked:
+        create_audit_log(
+            request=request,
+            action_type="ATTENDANCE",
+            description=f"Bulk scan marked {marked} of {len(results)} students ({session_part})",
+        )
 
-        messages.success(request, f"{student.roll_number} marked: Morning (Absent), Afternoon (Present)")
-        return redirect("mark_attendance")
+    return JsonResponse({"marked": marked, "results": results})
 
 
 @login_required
@@ -189,6 +202,7 @@ def mark_absent(request, lecture_id):
         update_fields=['status', 'marked_by'],
         unique_fields=['student', 'lecture']
     )
+    attendance_changed()
 
     messages.success(
         request,
@@ -240,8 +254,7 @@ def batch_attendance_analysis(request, batch_id: int):
         start_date = datetime.strptime("2025-12-15", "%Y-%m-%d").date()
 
     # Lectures for the batch in range
-    lectures = Lecture.objects.filter(batch=batch, date__range=(start_date, end_date)).order_by("date", "lecture_type")
-    total_sessions = lectures.count()
+    lectures = Lecture.objects.filter(batch=batch, date__range=(start_date, end_date))
 
     students = Student.objects.filter(batch=batch)
     if active_only:
@@ -250,59 +263,44 @@ def batch_attendance_analysis(request, batch_id: int):
         students = students.filter(branch_id=branch_id)
     if query:
         students = students.filter(Q(roll_number__icontains=query) | Q(full_name__icontains=query))
-    students = students.order_by("roll_number")
 
     base_students = Student.objects.filter(batch=batch)
     if active_only:
         base_students = base_students.filter(is_active=True)
 
-    # Present counts per student
-    present_qs = AttendanceRecord.objects.filter(
-        lecture__in=lectures,
-        status="P",
-    ).values("student_id")
-
-    present_by_student = {}
-    for row in present_qs:
-        sid = row["student_id"]
-        present_by_student[sid] = present_by_student.get(sid, 0) + 1
-
-    # Absent recorded counts per student (ACTUAL absences marked as 'A')
-    absent_qs = AttendanceRecord.objects.filter(
-        lecture__in=lectures,
-        status="A",
-    ).values("student_id")
-    absent_by_student = {}
-    for row in absent_qs:
-        sid = row["student_id"]
-        absent_by_student[sid] = absent_by_student.get(sid, 0) + 1
+    # Grouped counts: constant query count regardless of range length
+    days = analytics.daily_counts(lectures, students)
+    counts_by_student = analytics.student_counts(lectures, students)
+    branch_rows = analytics.branch_counts(lectures, base_students)
+
+    total_sessions = sum(day["sessions"] for day in days.values())
 
     # Build per-student data
-    percent_values = []
     present_total = 0
     absent_total_recorded = 0
 
     student_data = []
-    for s in students:
-        p = present_by_student.get(s.id, 0)
-        a = absent_by_student.get(s.id, 0)
+    for s in students.values("id", "roll_number", "full_name", "branch__name", "is_active").order_by("roll_number"):
+        counts = counts_by_student.get(s["id"], {})
+        p = counts.get("present", 0)
+        a = counts.get("absent", 0)
         present_total += p
         absent_total_recorded += a
         pct = round((p / total_sessions) * 100, 2) if total_sessions > 0 else 0
-        percent_values.append(pct)
         student_data.append({
-            "id": s.id,
-            "roll_number": s.roll_number,
-            "name": s.full_name,
-            "branch": s.branch.name if s.branch else "",
-            "is_active": s.is_active,
+            "id": s["id"],
+            "roll_number": s["roll_number"],
+            "name": s["full_name"],
+            "branch": s["branch__name"] or "",
+            "is_active": s["is_active"],
             "present": p,
             "absent": a,
             "percent": pct,
         })
+    students_count = len(student_data)
 
     # Missing records considered absent for aggregate
-    potential_records = students.count() * total_sessions
+    potential_records = students_count * total_sessions
     missing_records = max(potential_records - (present_total + absent_total_recorded), 0)
     absent_total = absent_total_recorded + missing_records
 
@@ -323,57 +321,25 @@ def batch_attendance_analysis(request, batch_id: int):
     filter_query = params.urlencode()
 
     # Day-wise attendance percentage
-    dates_in_range = sorted(set(lec.date for lec in lectures))
-    daily_labels = [d.strftime("%d %b") for d in dates_in_range]
+    daily_labels = [d.strftime("%d %b") for d in days]
     daily_percentages = []
-
-    for d in dates_in_range:
-        day_lectures = [lec for lec in lectures if lec.date == d]
-        day_session_count = len(day_lectures)
-        if day_session_count == 0:
-            daily_percentages.append(0)
-            continue
-        # Count present for this day
-        day_present = AttendanceRecord.objects.filter(
-            lecture__in=day_lectures,
-            status="P"
-        ).count()
-        expected = students.count() * day_session_count
-        day_pct = round((day_present / expected) * 100, 2) if expected > 0 else 0
-        daily_percentages.append(day_pct)
+    for day in days.values():
+        expected = students_count * day["sessions"]
+        daily_percentages.append(round((day["present"] / expected) * 100, 2) if expected > 0 else 0)
 
     # Overall attendance rate
     attendance_rate = 0
-    denominator = students.count() * total_sessions
+    denominator = students_count * total_sessions
     if denominator > 0:
         attendance_rate = round((present_total / denominator) * 100, 2)
 
-    branch_counts = (
-        base_students
-        .values("branch__name")
-        .annotate(count=Count("id"))
-        .order_by("branch__name")
-    )
     branch_stats = []
-    for row in branch_counts:
-        branch_name = row["branch__name"] or "Unknown"
-        if row["branch__name"] is None:
-            branch_students = base_students.filter(branch__isnull=True)
-        else:
-            branch_students = base_students.filter(branch__name=row["branch__name"])
-
-        branch_present = AttendanceRecord.objects.filter(
-            lecture__in=lectures,
-            student__in=branch_students,
-            status="P",
-        ).count()
-        branch_denominator = branch_students.count() * total_sessions
-        branch_attendance_rate = round((branch_present / branch_denominator) * 100, 2) if branch_denominator > 0 else 0
-
+    for row in branch_rows:
+        branch_denominator = row["count"] * total_sessions
         branch_stats.append({
-            "name": branch_name,
+            "name": row["name"],
             "count": row["count"],
-            "attendance_rate": branch_attendance_rate,
+            "attendance_rate": round((row["present"] / branch_denominator) * 100, 2) if branch_denominator > 0 else 0,
         })
 
     top_branch_by_count = max(branch_stats, key=lambda x: x["count"], default=None)
@@ -387,7 +353,7 @@ def batch_attendance_analysis(request, batch_id: int):
         "absent_total": absent_total,
         "attendance_rate": attendance_rate,
         "total_sessions": total_sessions,
-        "students_count": students.count(),
+        "students_count": students_count,
         "defaulters": defaulters,
         "daily_labels": daily_labels,
         "daily_percentages": daily_percentages,
@@ -403,3 +369,92 @@ def batch_attendance_analysis(request, batch_id: int):
     }
 
     return render(request, "attendance/batch_analysis.html", context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_attendance_records(request, batch_id: int):
+    """Raw attendance rows for a batch and date range as streamed CSV."""
+    batch = get_object_or_404(Batch, id=batch_id)
+
+    try:
+        start_date = datetime.strptime(request.GET.get("start_date", ""), "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.GET.get("end_date", ""), "%Y-%m-%d").date()
+    except ValueError:
+        end_date = timezone.localdate()
+        start_date = datetime.strptime("2025-12-15", "%Y-%m-%d").date()
+
+    rows = (
+        AttendanceRecord.objects
+        .filter(lecture__batch=batch, lecture__date__range=(start_date, end_date))
+        .order_by("lecture__date", "lecture__lecture_type", "student__roll_number")
+        .values_list(
+            "lecture__date", "lecture__lecture_type", "student__roll_number",
+            "student__full_name", "student__branch__name", "status",
+            "marked_by__email", "marked_at",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    local = timezone.get_current_timezone()
+    filename = f"{slugify(batch.name) or 'batch'}_attendance_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv"
+    return csv_response(
+        filename,
+        ["Date", "Session", "Roll No", "Name", "Branch", "Status", "Marked By", "Marked At"],
+        (
+            (day.isoformat(), session, roll, name, branch, status, marked_by,
+             marked_at.astimezone(local).strftime("%Y-%m-%d %H:%M:%S") if marked_at else "")
+            for day, session, roll, name, branch, status, marked_by, marked_at in rows
+        ),
+    )
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_attendance_upload(request):
+    if request.method == "POST":
+        upload = request.FILES.get("workbook")
+        if not upload or not upload.name.lower().endswith(".xlsx"):
+            messages.error(request, "Please choose an .xlsx attendance workbook.")
+            return redirect("import_attendance_upload")
+
+        job, created = request_attendance_import(upload, request.user)
+        if created:
+            create_audit_log(
+                request=request,
+                action_type="ATTENDANCE",
+                description=f"Uploaded attendance workbook {upload.name} for import",
+                target=job,
+            )
+        else:
+            messages.success(request, "This workbook was already uploaded; showing the existing import.")
+
+        return redirect("import_attendance_status", job_id=job.id)
+
+    return render(
+        request,
+        "attendance/import_upload.html",
+        {"imports": AttendanceImport.objects.select_related("uploaded_by")[:10]},
+    )
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_attendance_status(request, job_id):
+    job = get_object_or_404(AttendanceImport, id=job_id)
+    return render(request, "attendance/import_job.html", {"job": job})
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_attendance_progress(request, job_id):
+    job = get_object_or_404(AttendanceImport, id=job_id)
+    return JsonResponse({
+        "status": job.status,
+        "sheets_done": job.sheets_done,
+        "sheets_total": job.sheets_total,
+        "rows_processed": job.rows_processed,
+        "error_count": job.error_count,
+        "progress_percent": job.progress_percent,
+        "summary": job.summary,
+        "error": job.error,
+    })
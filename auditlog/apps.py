@@ -1,5 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _flush_audit_writer(**kwargs):
+    from .writer import writer
+    writer.flush()
 
 
 class AuditlogConfig(AppConfig):
     name = 'auditlog'
+
+    def ready(self):
+        from celery.signals import worker_process_shutdown, worker_shutdown
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+
+        from .partitions import install_on_migrate as ensure_partitions_on_migrate
+        from .search import install_on_migrate
+        from .services import invalidate_actor_choices
+
+        post_migrate.connect(install_on_migrate, sender=self)
+        post_migrate.connect(ensure_partitions_on_migrate, sender=self)
+
+        # atexit does not run in Celery's prefork children; flush explicitly
+        worker_process_shutdown.connect(_flush_audit_writer, weak=False)
+        worker_shutdown.connect(_flush_audit_writer, weak=False)
+
+        # The cached actor dropdown lists every user
+        user_model = get_user_model()
+        post_save.connect(invalidate_actor_choices, sender=user_model, weak=False)
+        post_delete.connect(invalidate_actor_choices, sender=user_model, weak=False)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auditlog.partitions import (
+    archive_partition,
+    archive_path,
+    default_partition_months,
+    ensure_partitions,
+    expired_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = "Export audit log partitions past the retention window to MEDIA_ROOT and drop them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=None,
+            help="Months kept in the database before the current one (default: AUDIT_LOG_RETENTION_MONTHS)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Write the archive files but do not drop the partitions",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the partitions that would be archived",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql" or not is_partitioned():
+            raise CommandError("Audit log is not partitioned; run partition_audit_log --convert first")
+
+        # Rows that fell into the default partition only age out once they
+        # have a monthly partition of their own
+        stray = default_partition_months()
+        if options["dry_run"]:
+            for start, rows in stray:
+                self.stdout.write(f"  {rows} rows for {start:%Y-%m} in the default partition would be moved")
+        elif stray:
+            for name, moved in ensure_partitions().items():
+                if moved:
+                    self.stdout.write(f"  moved {moved} rows from the default partition into {name}")
+
+        expired = expired_partitions(options["retention_months"])
+        if not expired:
+            self.stdout.write("No partitions past the retention window")
+            return
+
+        total = 0
+        for start, name in expired:
+            if options["dry_run"]:
+                self.stdout.write(f"  would archive {name} -> {archive_path(start)}")
+                continue
+            rows = archive_partition(start, name, drop=not options["keep"])
+            total += rows
+            action = "archived" if options["keep"] else "archived and dropped"
+            self.stdout.write(f"  {name}: {rows} rows {action} -> {archive_path(start)}")
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"✓ {len(expired)} partition(s), {total} rows archived"))
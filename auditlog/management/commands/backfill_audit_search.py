@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auditlog.search import backfill_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Fill the search vector of audit log rows written before the search triggers existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows updated per transaction (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Audit log search requires PostgreSQL")
+
+        total = 0
+        for rows in backfill_search_vectors(max(options["batch_size"], 1)):
+            total += rows
+            self.stdout.write(f"  {total} rows filled")
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Search vectors backfilled ({total} rows)"))
@@ -0,0 +1,50 @@
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from auditlog.models import AuditLog
+from auditlog.utils import create_audit_log
+from auditlog.writer import writer
+
+
+class Command(BaseCommand):
+    help = "Compare caller-side latency of synchronous vs buffered create_audit_log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=500)
+
+    def handle(self, *args, **options):
+        marker = f"audit-benchmark-{uuid.uuid4().hex[:8]}"
+        calls = options["calls"]
+
+        self.stdout.write(self.style.SUCCESS("AUDIT WRITER BENCHMARK"))
+        try:
+            for label, is_async in (("synchronous", False), ("buffered", True)):
+                with override_settings(AUDIT_LOG_ASYNC=is_async):
+                    timings = []
+                    for i in range(calls):
+                        started = time.perf_counter()
+                        create_audit_log(action_type="SYSTEM", description=f"{marker} {label} {i}")
+                        timings.append((time.perf_counter() - started) * 1000)
+
+                flush_started = time.perf_counter()
+                writer.flush()
+                flush_ms = (time.perf_counter() - flush_started) * 1000
+
+                timings.sort()
+                self.stdout.write(
+                    f"  {label:<12} mean {statistics.mean(timings):7.3f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:7.3f} ms  "
+                    f"(final flush {flush_ms:.1f} ms)"
+                )
+
+            # Let the writer thread finish any batch it already took off the queue
+            time.sleep(settings.AUDIT_LOG_FLUSH_SECONDS)
+            written = AuditLog.objects.filter(description__startswith=marker).count()
+            self.stdout.write(f"  rows written: {written} / {calls * 2}")
+        finally:
+            AuditLog.objects.filter(description__startswith=marker).delete()
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auditlog.partitions import (
+    convert_to_partitioned,
+    default_partition_months,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Convert the audit log to monthly partitions and create upcoming partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Rebuild the existing table as a partitioned table (locks it while copying)",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="Partitions to keep ahead of the current month (default: AUDIT_LOG_PARTITIONS_AHEAD)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Audit log partitioning requires PostgreSQL")
+
+        if not is_partitioned():
+            if not options["convert"]:
+                raise CommandError("Audit log table is not partitioned yet; run with --convert")
+            copied = convert_to_partitioned(options["months_ahead"])
+            self.stdout.write(self.style.SUCCESS(f"✓ Audit log partitioned ({copied} rows copied)"))
+
+        created = ensure_partitions(options["months_ahead"])
+        for name, moved in created.items():
+            note = f" ({moved} rows moved from the default partition)" if moved else ""
+            self.stdout.write(f"  created {name}{note}")
+
+        for start, rows in default_partition_months():
+            self.stdout.write(self.style.WARNING(f"  {rows} rows for {start:%Y-%m} left in the default partition"))
+
+        partitions = list_partitions()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {len(partitions)} monthly partitions "
+                f"({partitions[0][0]:%Y-%m} to {partitions[-1][0]:%Y-%m})"
+            )
+        )
@@ -1,7 +1,13 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 class AuditLog(models.Model):
+    # Once partitioned (auditlog/partitions.py) the database primary key is
+    # (id, timestamp) while Django keeps addressing rows by id. Schema
+    # changes to id or timestamp need a hand-written RunSQL migration.
     ACTION_CHOICES = [
         ("CREATE", "Create"),
         ("UPDATE", "Update"),
@@ -29,13 +35,19 @@ class AuditLog(models.Model):
 
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the entry is created, not when the buffered writer inserts it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+
+    # Maintained by the triggers in auditlog/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
-        ordering = ["-timestamp"]
         indexes = [
             models.Index(fields=['-timestamp', 'action_type']),
+            # Keyset pagination order for the audit log list
+            models.Index(fields=['-timestamp', '-id']),
             models.Index(fields=['target_type', 'target_id']),
+            GinIndex(fields=['search_vector'], name='auditlog_search_gin'),
         ]
 
     def __str__(self):
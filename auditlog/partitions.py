@@ -0,0 +1,347 @@
+# auditlog/partitions.py
+"""
+Monthly range partitioning of the audit log table on PostgreSQL.
+
+The table is partitioned by month on "timestamp" (UTC month boundaries)
+with a DEFAULT partition as a safety net. Partitions are created a few
+months ahead; months older than the retention window are exported to
+gzipped JSON-lines files under MEDIA_ROOT and dropped, and can still be
+read back from there.
+
+The primary key becomes (id, timestamp), as PostgreSQL requires the
+partition key in every unique constraint; the ORM still addresses rows
+by id, which stays unique through the shared identity sequence.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+
+AUDIT = AuditLog._meta.db_table
+USER = get_user_model()._meta.db_table
+DEFAULT_PARTITION = f"{AUDIT}_default"
+PARTITION_RE = re.compile(rf"^{AUDIT}_p(\d{{4}})_(\d{{2}})$")
+
+ARCHIVE_FIELDS = (
+    "id", "timestamp", "actor_id", "actor_email", "action_type",
+    "description", "target_type", "target_id", "ip_address",
+)
+
+
+def month_start(value=None):
+    """First instant (UTC) of the month containing `value` (default: now)."""
+    value = value or timezone.now()
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start):
+    return f"{AUDIT}_p{start.year:04d}_{start.month:02d}"
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [AUDIT])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions():
+    """[(month start, table name)] of the monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [AUDIT],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            partitions.append((datetime(year, month, 1, tzinfo=dt_timezone.utc), name))
+    return sorted(partitions)
+
+
+def _create_partition_sql(start):
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {AUDIT} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def default_partition_months():
+    """[(month start, rows)] of entries that landed in the DEFAULT partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+        if cursor.fetchone()[0] is None:
+            return []
+        cursor.execute(
+            f"""
+            SELECT date_trunc('month', "timestamp" AT TIME ZONE 'UTC') AS month, COUNT(*)
+            FROM {DEFAULT_PARTITION}
+            GROUP BY month
+            ORDER BY month
+            """
+        )
+        return [(month.replace(tzinfo=dt_timezone.utc), rows) for month, rows in cursor.fetchall()]
+
+
+def _create_partition(cursor, start, in_default):
+    """
+    Create the partition for `start`. PostgreSQL refuses to create a
+    partition while DEFAULT holds rows in its range, so when it does
+    (`in_default`) DEFAULT is detached, its rows for the month are moved
+    into the new partition, and it is re-attached. Must run inside a
+    transaction. Returns rows moved.
+    """
+    if not in_default:
+        cursor.execute(_create_partition_sql(start))
+        return 0
+
+    name = partition_name(start)
+    bounds = [start, add_months(start, 1)]
+    cursor.execute(f"ALTER TABLE {AUDIT} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(_create_partition_sql(start))
+    cursor.execute(
+        f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s',
+        bounds,
+    )
+    moved = cursor.rowcount
+    cursor.execute(
+        f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s',
+        bounds,
+    )
+    cursor.execute(f"ALTER TABLE {AUDIT} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return moved
+
+
+def ensure_partitions(months_ahead=None):
+    """
+    Create partitions from this month through `months_ahead` months ahead,
+    plus any month with rows sitting in DEFAULT, moving those rows into
+    their partition so they age out and are archived like the rest.
+    Runs in one transaction. Returns {name: rows moved from DEFAULT} for
+    the partitions created.
+    """
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_LOG_PARTITIONS_AHEAD
+
+    created = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Hold off writers so no row reaches DEFAULT between the check and the move
+        cursor.execute(f"LOCK TABLE {AUDIT} IN SHARE ROW EXCLUSIVE MODE")
+        existing = {name for _, name in list_partitions()}
+        current = month_start()
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        stray = {start for start, _ in default_partition_months()}
+
+        for start in sorted(months | stray):
+            if partition_name(start) not in existing:
+                created[partition_name(start)] = _create_partition(cursor, start, start in stray)
+    return created
+
+
+def convert_to_partitioned(months_ahead=None):
+    """
+    One-off: rebuild the audit table as a monthly partitioned table and
+    copy existing rows across. Runs in one transaction and holds an
+    exclusive lock on the table while copying. Returns rows copied.
+
+    Indexes, the primary key and foreign keys are recreated from the
+    table's own definitions under their existing names, so the names
+    Django's migration state knows stay valid. The primary key widens to
+    (id, timestamp) in the database only; see the note on AuditLog.
+    """
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_LOG_PARTITIONS_AHEAD
+    legacy = f"{AUDIT}_legacy"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {AUDIT} IN ACCESS EXCLUSIVE MODE")
+
+        # Captured before the rename, so the definitions name the new table.
+        # Unique indexes other than the key cannot exist on a partitioned
+        # table without the partition key; the model declares none.
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary AND NOT i.indisunique
+            """,
+            [AUDIT],
+        )
+        index_sql = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype = 'f'
+            """,
+            [AUDIT],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [AUDIT],
+        )
+        pk_name = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {AUDIT} RENAME TO {legacy}")
+
+        # Index and constraint names are schema-wide; free them for the new table
+        cursor.execute(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')
+            """,
+            [legacy],
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {legacy} DROP CONSTRAINT "{name}"')
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [legacy])
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'DROP INDEX "{name}"')
+
+        cursor.execute(
+            f"""
+            CREATE TABLE {AUDIT} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY)
+            PARTITION BY RANGE ("timestamp")
+            """
+        )
+        cursor.execute(f'ALTER TABLE {AUDIT} ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, "timestamp")')
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {AUDIT} DEFAULT")
+
+        cursor.execute(f'SELECT MIN("timestamp") FROM {legacy}')
+        oldest = cursor.fetchone()[0]
+        start = month_start(oldest) if oldest else month_start()
+        last = add_months(month_start(), months_ahead)
+        while start <= last:
+            cursor.execute(_create_partition_sql(start))
+            start = add_months(start, 1)
+
+        cursor.execute(f"INSERT INTO {AUDIT} SELECT * FROM {legacy}")
+        copied = cursor.rowcount
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT MAX(id) FROM {AUDIT}), 1))",
+            [AUDIT],
+        )
+        cursor.execute(f"DROP TABLE {legacy}")
+
+        # Recreated on the parent; PostgreSQL cascades them to every partition
+        for sql in index_sql:
+            cursor.execute(sql)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {AUDIT} ADD CONSTRAINT "{name}" {definition}')
+
+    # Triggers on the old table went with it
+    from .search import install_search_triggers
+    install_search_triggers()
+    return copied
+
+
+def archive_path(start):
+    return Path(settings.MEDIA_ROOT) / "audit_archive" / f"{start:%Y-%m}.jsonl.gz"
+
+
+def archived_months():
+    """Month starts with an archive file, newest first."""
+    months = []
+    for path in (Path(settings.MEDIA_ROOT) / "audit_archive").glob("*.jsonl.gz"):
+        try:
+            day = datetime.strptime(path.name[:7], "%Y-%m")
+        except ValueError:
+            continue
+        months.append(day.replace(tzinfo=dt_timezone.utc))
+    return sorted(months, reverse=True)
+
+
+def _export_partition(name, path):
+    """Stream one partition to a gzipped JSON-lines file. Returns rows written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    rows = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as out, connection.chunked_cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT a.id, a."timestamp", a.actor_id, u.email, a.action_type,
+                   a.description, a.target_type, a.target_id, a.ip_address
+            FROM {name} a
+            LEFT JOIN {USER} u ON u.id = a.actor_id
+            ORDER BY a."timestamp", a.id
+            """
+        )
+        for row in cursor:
+            record = dict(zip(ARCHIVE_FIELDS, row))
+            record["timestamp"] = record["timestamp"].isoformat()
+            out.write(json.dumps(record, default=str) + "\n")
+            rows += 1
+    os.replace(tmp, path)
+    return rows
+
+
+def expired_partitions(retention_months=None):
+    """Monthly partitions entirely older than the retention window."""
+    if retention_months is None:
+        retention_months = settings.AUDIT_LOG_RETENTION_MONTHS
+    cutoff = add_months(month_start(), -retention_months)
+    return [(start, name) for start, name in list_partitions() if start < cutoff]
+
+
+def archive_partition(start, name, drop=True):
+    """
+    Export a partition to its archive file, then detach and drop it.
+    The export is written to a temporary file and renamed, so a partition
+    is only dropped once its archive is complete. Returns rows archived.
+    """
+    path = archive_path(start)
+    # A server-side cursor needs a transaction
+    with transaction.atomic():
+        rows = _export_partition(name, path)
+    if drop:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {AUDIT} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+    return rows
+
+
+def read_archive(start):
+    """Yield archived entries for a month as dicts, oldest first."""
+    path = archive_path(start)
+    if not path.exists():
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            record = json.loads(line)
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            yield record
+
+
+def install_on_migrate(sender, using="default", **kwargs):
+    """post_migrate hook: keep future partitions in place once partitioned."""
+    if connection.vendor != "postgresql" or not is_partitioned():
+        return
+    ensure_partitions()
@@ -0,0 +1,130 @@
+# auditlog/search.py
+"""
+PostgreSQL full-text search over audit logs.
+
+AuditLog.search_vector holds a weighted tsvector of the description (A),
+target type (B) and actor email (C). A BEFORE row trigger fills it on
+insert and when those columns change, and a trigger on the user table
+refreshes a user's entries when their email changes, so search is a GIN
+index lookup instead of an ILIKE scan joined to users.
+"""
+
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+
+from .models import AuditLog
+
+
+AUDIT = AuditLog._meta.db_table
+USER = get_user_model()._meta.db_table
+
+# 'simple' keeps roll numbers, names and emails unstemmed so prefixes match
+SEARCH_CONFIG = "simple"
+
+# Characters outside these are tsquery operators or separators
+TERM_RE = re.compile(r"[\w@.\-]+")
+
+
+def _vector_sql(description, target_type, email):
+    return (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({description}, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({target_type}, '')), 'B') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({email}, '')), 'C')"
+    )
+
+
+INSTALL_SQL = f"""
+CREATE OR REPLACE FUNCTION auditlog_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {_vector_sql(
+        "NEW.description",
+        "NEW.target_type",
+        f"(SELECT email FROM {USER} WHERE id = NEW.actor_id)",
+    )};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS auditlog_search_vector ON {AUDIT};
+CREATE TRIGGER auditlog_search_vector
+    BEFORE INSERT OR UPDATE OF description, target_type, actor_id ON {AUDIT}
+    FOR EACH ROW EXECUTE FUNCTION auditlog_search_vector();
+
+CREATE OR REPLACE FUNCTION auditlog_search_actor_email() RETURNS trigger AS $$
+BEGIN
+    UPDATE {AUDIT} SET actor_id = actor_id WHERE actor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS auditlog_search_actor_email ON {USER};
+CREATE TRIGGER auditlog_search_actor_email
+    AFTER UPDATE OF email ON {USER}
+    FOR EACH ROW WHEN (OLD.email IS DISTINCT FROM NEW.email)
+    EXECUTE FUNCTION auditlog_search_actor_email();
+"""
+
+
+def install_search_triggers():
+    """Create or replace the search vector triggers (idempotent)."""
+    with connection.cursor() as cursor:
+        cursor.execute(INSTALL_SQL)
+
+
+def backfill_search_vectors(batch_size=5000):
+    """
+    Fill search_vector for rows written before the trigger existed, walking
+    the table once in id order. Each batch commits on its own, so locks stay
+    short. Yields the rows updated per batch.
+    """
+    last_id = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {AUDIT} a
+                SET search_vector = {_vector_sql(
+                    "a.description",
+                    "a.target_type",
+                    f"(SELECT email FROM {USER} WHERE id = a.actor_id)",
+                )}
+                WHERE a.id IN (
+                    SELECT id FROM {AUDIT}
+                    WHERE id > %s AND search_vector IS NULL
+                    ORDER BY id
+                    LIMIT %s
+                )
+                RETURNING a.id
+            """, [last_id, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return
+        last_id = max(ids)
+        yield len(ids)
+
+
+def search_query(text):
+    """
+    SearchQuery matching every term in `text` as a prefix, or None if
+    nothing searchable is left: "ram att" finds "Ramesh ... attendance".
+    """
+    terms = TERM_RE.findall(text)
+    if not terms:
+        return None
+    return SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+def install_on_migrate(sender, using="default", **kwargs):
+    """
+    post_migrate hook: install the triggers. Rows that predate them are
+    filled once with the backfill_audit_search command.
+    """
+    if connection.vendor != "postgresql":
+        return
+    install_search_triggers()
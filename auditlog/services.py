@@ -0,0 +1,141 @@
+# auditlog/services.py
+
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchRank
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AuditLog
+from .search import search_query
+
+
+PAGE_SIZE = 100
+ACTOR_CHOICES_KEY = "auditlog:actor_choices"
+ACTOR_CHOICES_TIMEOUT = 60 * 60
+
+
+def _day_start(value):
+    """Aware midnight for a YYYY-MM-DD string, or None if it does not parse."""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_audit_logs(params, logs=None):
+    """
+    Apply the audit log list filters (q, action, user, start_date, end_date)
+    from a GET-style mapping. Date filters are half-open timestamp ranges so
+    the timestamp indexes stay usable; on PostgreSQL `q` is a prefix
+    full-text match against the GIN-indexed search vector.
+    """
+    if logs is None:
+        logs = AuditLog.objects.all()
+
+    q = params.get("q")
+    action = params.get("action")
+    user = params.get("user")
+    start = _day_start(params.get("start_date"))
+    end = _day_start(params.get("end_date"))
+
+    if q and connection.vendor == "postgresql":
+        query = search_query(q)
+        logs = logs.filter(search_vector=query) if query else logs.none()
+    elif q:
+        logs = logs.filter(
+            Q(description__icontains=q)
+            | Q(target_type__icontains=q)
+            | Q(actor__email__icontains=q)
+        )
+    if action:
+        logs = logs.filter(action_type=action)
+    if user:
+        logs = logs.filter(actor_id=user)
+    if start:
+        logs = logs.filter(timestamp__gte=start)
+    if end:
+        logs = logs.filter(timestamp__lt=end + timedelta(days=1))
+    return logs
+
+
+def encode_cursor(log):
+    return f"{log.timestamp.isoformat()}_{log.id}"
+
+
+def decode_cursor(value):
+    """(timestamp, id) from a cursor string, or None if it is malformed."""
+    try:
+        ts, pk = value.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(logs, before=None, after=None, size=PAGE_SIZE):
+    """
+    One page of `logs`, newest first, keyed on (timestamp, id).
+
+    `before` pages towards older entries and `after` towards newer ones, so
+    a deep page costs one index range scan of `size` rows, not an OFFSET.
+    Returns (rows, older_cursor, newer_cursor); cursors are None at the ends.
+    """
+    before = decode_cursor(before) if before else None
+    after = decode_cursor(after) if after else None
+
+    if after:
+        ts, pk = after
+        rows = list(
+            logs.filter(Q(timestamp__gt=ts) | Q(timestamp=ts, id__gt=pk))
+            .order_by("timestamp", "id")[:size + 1]
+        )
+        has_newer = len(rows) > size
+        rows = rows[:size][::-1]
+        has_older = True
+    else:
+        if before:
+            ts, pk = before
+            logs = logs.filter(Q(timestamp__lt=ts) | Q(timestamp=ts, id__lt=pk))
+        rows = list(logs.order_by("-timestamp", "-id")[:size + 1])
+        has_older = len(rows) > size
+        rows = rows[:size]
+        has_newer = before is not None
+
+    if not rows:
+        return rows, None, None
+    return (
+        rows,
+        encode_cursor(rows[-1]) if has_older else None,
+        encode_cursor(rows[0]) if has_newer else None,
+    )
+
+
+def ranked_page(logs, text, size=PAGE_SIZE):
+    """
+    The `size` best matches for `text`, by rank then recency. Ranking is
+    only computed for rows the GIN index already matched.
+    """
+    query = search_query(text)
+    if query is None or connection.vendor != "postgresql":
+        return []
+    return list(
+        logs.annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-timestamp", "-id")[:size]
+    )
+
+
+def actor_choices():
+    """(id, email) for the actor filter dropdown, cached until a user changes."""
+    choices = cache.get(ACTOR_CHOICES_KEY)
+    if choices is None:
+        choices = list(get_user_model().objects.order_by("email").values_list("id", "email"))
+        cache.set(ACTOR_CHOICES_KEY, choices, ACTOR_CHOICES_TIMEOUT)
+    return choices
+
+
+def invalidate_actor_choices(**kwargs):
+    cache.delete(ACTOR_CHOICES_KEY)
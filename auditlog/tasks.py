@@ -0,0 +1,15 @@
+from celery import shared_task
+from django.db import connection
+
+from auditlog.partitions import ensure_partitions, is_partitioned
+
+
+@shared_task
+def ensure_audit_partitions_task():
+    """
+    Celery task to create upcoming monthly audit log partitions, moving
+    any rows that landed in the default partition into their month.
+    """
+    if connection.vendor != "postgresql" or not is_partitioned():
+        return {}
+    return ensure_partitions()
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import audit_log_list
+from .views import audit_log_archive, audit_log_export, audit_log_list
 
 urlpatterns = [
     path("", audit_log_list, name="audit_logs"),
+    path("export/", audit_log_export, name="audit_log_export"),
+    path("archive/", audit_log_archive, name="audit_log_archive"),
 ]
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.db import transaction
+
 from auditlog.models import AuditLog
 
+
 def create_audit_log(
     *,
     request=None,
@@ -8,8 +12,12 @@ def create_audit_log(
     description,
     target=None,
 ):
-    AuditLog.objects.create(
-        actor=actor if actor else getattr(request, "user", None),
+    if actor is None and request is not None:
+        user = getattr(request, "user", None)
+        actor = user if user is not None and user.is_authenticated else None
+
+    entry = AuditLog(
+        actor=actor,
         action_type=action_type,
         description=description,
         target_type=target.__class__.__name__ if target else None,
@@ -19,3 +27,12 @@ def create_audit_log(
             if request else None
         ),
     )
+
+    if not settings.AUDIT_LOG_ASYNC:
+        entry.save()
+        return
+
+    from auditlog.writer import writer
+
+    # Entries written inside a transaction that rolls back are dropped, as before
+    transaction.on_commit(lambda: writer.submit(entry))
@@ -1,44 +1,125 @@
 # auditlog/views.py
-from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render
+from django.utils import timezone
+
+from core.streaming import EXPORT_CHUNK_SIZE, csv_response
 from .models import AuditLog
-from accounts.models import User
+from .partitions import archived_months, read_archive
+from .services import actor_choices, filter_audit_logs, keyset_page, ranked_page
+
+
+ARCHIVE_RESULT_LIMIT = 500
+
+
+def is_admin(user):
+    return user.is_authenticated and user.role == "ADMIN"
 
 
 @login_required
 def audit_log_list(request):
-    logs = AuditLog.objects.select_related("actor").all()
-
+    logs = filter_audit_logs(request.GET, AuditLog.objects.select_related("actor"))
     q = request.GET.get("q")
-    action = request.GET.get("action")
-    user = request.GET.get("user")
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-
-    if q:
-        logs = logs.filter(
-            Q(description__icontains=q)
-            | Q(target_type__icontains=q)
-            | Q(actor__email__icontains=q)
+
+    if q and request.GET.get("sort") == "relevance":
+        # Best matches only; ranked results are not paged
+        rows, older, newer = ranked_page(logs, q), None, None
+    else:
+        rows, older, newer = keyset_page(
+            logs,
+            before=request.GET.get("before"),
+            after=request.GET.get("after"),
         )
 
-    if action:
-        logs = logs.filter(action_type=action)
+    # Filters carried over to the paging links
+    filters = request.GET.copy()
+    filters.pop("before", None)
+    filters.pop("after", None)
 
-    if user:
-        logs = logs.filter(actor_id=user)
+    context = {
+        "logs": rows,
+        "older_cursor": older,
+        "newer_cursor": newer,
+        "filter_query": filters.urlencode(),
+        "actions": AuditLog.ACTION_CHOICES,
+        "users": actor_choices(),
+    }
 
-    if start_date:
-        logs = logs.filter(timestamp__date__gte=start_date)
+    return render(request, "auditlog/auditlog.html", context)
 
-    if end_date:
-        logs = logs.filter(timestamp__date__lte=end_date)
+
+@login_required
+@user_passes_test(is_admin)
+def audit_log_export(request):
+    """Every entry matching the audit_log_list filters, newest first, as streamed CSV."""
+    rows = (
+        filter_audit_logs(request.GET)
+        .order_by("-timestamp", "-id")
+        .values_list(
+            "timestamp", "actor__email", "action_type", "description",
+            "target_type", "target_id", "ip_address",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    local = timezone.get_current_timezone()
+    return csv_response(
+        f"audit_logs_{timezone.localdate():%Y%m%d}.csv",
+        ["Time", "User", "Action", "Description", "Target Type", "Target ID", "IP"],
+        ((ts.astimezone(local).strftime("%Y-%m-%d %H:%M:%S"), *rest) for ts, *rest in rows),
+    )
+
+
+@login_required
+@user_passes_test(is_admin)
+def audit_log_archive(request):
+    """
+    Search one archived month. The month's file is scanned on demand and
+    the newest ARCHIVE_RESULT_LIMIT matches are shown.
+    """
+    months = archived_months()
+    month = None
+    try:
+        month = datetime.strptime(request.GET.get("month", ""), "%Y-%m").replace(tzinfo=dt_timezone.utc)
+    except ValueError:
+        pass
+
+    q = request.GET.get("q", "").strip().lower()
+    action = request.GET.get("action")
+    user = request.GET.get("user")
+
+    matches = deque(maxlen=ARCHIVE_RESULT_LIMIT)
+    scanned = 0
+    if month in months:
+        for record in read_archive(month):
+            scanned += 1
+            if action and record["action_type"] != action:
+                continue
+            if user and str(record["actor_id"]) != user:
+                continue
+            if q and not any(
+                q in (record[field] or "").lower()
+                for field in ("description", "target_type", "actor_email")
+            ):
+                continue
+            matches.append(record)
+
+    labels = dict(AuditLog.ACTION_CHOICES)
+    logs = [
+        {**record, "action_label": labels.get(record["action_type"], record["action_type"])}
+        for record in reversed(matches)
+    ]
 
     context = {
-        "logs": logs[:500],  # hard cap for sanity
+        "months": months,
+        "month": month,
+        "logs": logs,
+        "scanned": scanned,
+        "truncated": len(matches) == ARCHIVE_RESULT_LIMIT,
+        "limit": ARCHIVE_RESULT_LIMIT,
         "actions": AuditLog.ACTION_CHOICES,
-        "users": User.objects.all(),
+        "users": actor_choices(),
     }
-
-    return render(request, "auditlog/auditlog.html", context)
+    return render(request, "auditlog/archive.html", context)
@@ -0,0 +1,133 @@
+# auditlog/writer.py
+"""
+Buffered audit log writer.
+
+create_audit_log() hands unsaved AuditLog rows to a per-process queue; a
+daemon thread writes them with bulk_create once AUDIT_LOG_BUFFER_SIZE rows
+are waiting or AUDIT_LOG_FLUSH_SECONDS have passed. The queue is flushed at
+interpreter and Celery worker shutdown, and a full queue falls back to a
+synchronous insert so entries are never dropped under load. Entries that
+still cannot be saved are logged in full and counted in `failures`.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(entry):
+    return json.dumps({
+        "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
+        "actor_id": entry.actor_id,
+        "action_type": entry.action_type,
+        "description": entry.description,
+        "target_type": entry.target_type,
+        "target_id": entry.target_id,
+        "ip_address": entry.ip_address,
+    })
+
+
+class AuditWriter:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=settings.AUDIT_LOG_QUEUE_MAX)
+        self.failures = 0
+        self._lock = threading.Lock()
+        # Held from taking entries off the queue until they are written, so
+        # flush() never misses a batch the daemon thread is holding
+        self._drain_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Forked workers (gunicorn --preload, Celery prefork) need their own thread
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=settings.AUDIT_LOG_QUEUE_MAX)
+                # The parent's thread may have held it at fork time
+                self._drain_lock = threading.Lock()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, entry):
+        """Queue an unsaved AuditLog; write it now if the queue is full."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            entry.save()
+
+    def _run(self):
+        while True:
+            with self._drain_lock:
+                batch = self._collect()
+                if batch:
+                    self._write(batch)
+
+    def _collect(self):
+        batch_size = settings.AUDIT_LOG_BUFFER_SIZE
+        interval = settings.AUDIT_LOG_FLUSH_SECONDS
+        try:
+            batch = [self.queue.get(timeout=interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + interval
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """
+        Write everything still queued from the calling thread, after any
+        batch the daemon thread is writing.
+        """
+        with self._drain_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            AuditLog.objects.bulk_create(batch)
+        except Exception:
+            logger.warning("Audit log bulk insert of %d entries failed; saving one by one", len(batch), exc_info=True)
+            # One bad row must not lose the rest of the batch
+            for entry in batch:
+                try:
+                    entry.save()
+                except Exception:
+                    self.failures += 1
+                    logger.exception("Audit log entry lost: %s", _serialize(entry))
+
+
+writer = AuditWriter()
+atexit.register(writer.flush)
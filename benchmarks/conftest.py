@@ -0,0 +1,199 @@
+"""
+View benchmarks against the pytest-django test database.
+
+    pytest benchmarks --dataset-size ci
+    pytest benchmarks --dataset-size medium --update-baseline
+
+The session's test database is filled by generate_dataset at the chosen
+size, so nothing touches the configured database, and each view's
+cold-run query/row counts, median time and peak memory are compared with
+that size's baseline in benchmarks/baseline_<size>.json. A case with no
+baseline entry fails; the baselines are recorded on the reference
+machine with --update-baseline and committed alongside the change.
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings
+
+
+METRICS = ("time_ms", "queries", "rows", "peak_kb")
+
+
+# generate_dataset arguments per --dataset-size
+DATASET_PRESETS = {
+    "ci": {"batches": 2, "students": 50, "days": 20},
+    "medium": {"batches": 4, "students": 250, "days": 60},
+    "production": {"batches": 8, "students": 500, "days": 120},
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--dataset-size",
+        choices=sorted(DATASET_PRESETS),
+        default="ci",
+        help="Synthetic dataset size for the view benchmarks (default: ci)",
+    )
+    group.addoption(
+        "--update-baseline",
+        action="store_true",
+        help="Write this run's results to the baseline instead of asserting against it",
+    )
+    group.addoption(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed regression over the baseline as a fraction (default: 0.25)",
+    )
+    group.addoption("--repeat", type=int, default=3, help="Timed runs per view (default: 3)")
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker, request):
+    """Test database with the synthetic dataset generated once per session."""
+    preset = DATASET_PRESETS[request.config.getoption("--dataset-size")]
+    with django_db_blocker.unblock():
+        call_command("generate_dataset", reset=True, **preset)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def local_cache():
+    # Benchmarks clear the cache between cases; keep that away from Redis
+    with override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    ):
+        yield
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    """
+    Baseline cases keyed by name. With --update-baseline, results recorded
+    into "cases" during the session are written out at the end.
+    """
+    path = Path(__file__).with_name(f"baseline_{request.config.getoption('--dataset-size')}.json")
+    data = json.loads(path.read_text()) if path.exists() else {}
+    data.setdefault("cases", {})
+    results = {"dataset": None, "cases": {}}
+    yield {"stored": data, "results": results}
+
+    if request.config.getoption("--update-baseline") and results["cases"]:
+        merged = {"dataset": results["dataset"], "cases": {**data["cases"], **results["cases"]}}
+        path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+
+
+class QueryStats:
+    """execute_wrapper that counts statements and rows returned."""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        rowcount = getattr(context["cursor"], "rowcount", -1)
+        if sql.split(None, 1)[0].upper() in ("SELECT", "WITH") and rowcount > 0:
+            self.rows += rowcount
+        return result
+
+
+def measure(case, repeat):
+    """
+    Cold run (cache cleared) for query/row counts, `repeat` timed runs
+    for the median wall time, and a final traced run for peak memory.
+    """
+    cache.clear()
+    stats = QueryStats()
+    with connection.execute_wrapper(stats):
+        case()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        case()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "time_ms": round(statistics.median(timings), 1),
+        "queries": stats.queries,
+        "rows": stats.rows,
+        "peak_kb": peak // 1024,
+    }
+
+
+@pytest.fixture(scope="session")
+def dataset_counts(django_db_setup, django_db_blocker):
+    from attendance.models import AttendanceRecord
+    from lectures.models import Lecture
+    from students.models import Student
+
+    with django_db_blocker.unblock():
+        return {
+            "students": Student.objects.count(),
+            "lectures": Lecture.objects.count(),
+            "attendance_records": AttendanceRecord.objects.count(),
+        }
+
+
+@pytest.fixture
+def measure_case(request):
+    """measure_case(case): `measure` with the session's --repeat."""
+    return lambda case: measure(case, max(request.config.getoption("--repeat"), 1))
+
+
+@pytest.fixture
+def benchmark(baseline, dataset_counts, measure_case, request):
+    """
+    benchmark(name, case): measure `case` and check it against the
+    baseline entry `name`, or record it with --update-baseline.
+    Returns the measured metrics.
+    """
+    def run(name, case):
+        result = measure_case(case)
+        print(f"\n{name}: {result}")
+
+        if request.config.getoption("--update-baseline"):
+            baseline["results"]["dataset"] = dataset_counts
+            baseline["results"]["cases"][name] = result
+            return result
+
+        stored = baseline["stored"]
+        budget = stored["cases"].get(name)
+        if budget is None:
+            # A missing entry must not pass silently; only recording may create it
+            pytest.fail(
+                f"No baseline entry for {name} in baseline_{request.config.getoption('--dataset-size')}.json; "
+                "record one with --update-baseline and commit it"
+            )
+        if stored.get("dataset") != dataset_counts:
+            warnings.warn(f"Dataset {dataset_counts} differs from baseline {stored.get('dataset')}")
+
+        threshold = request.config.getoption("--threshold")
+        over = [
+            f"{metric}: {result[metric]} > {budget[metric]} (+{threshold:.0%})"
+            for metric in METRICS
+            if result[metric] > budget[metric] * (1 + threshold)
+        ]
+        assert not over, f"{name} exceeded its baseline: " + "; ".join(over)
+        return result
+
+    return run
@@ -0,0 +1,162 @@
+"""
+The dashboard's defaulter query against the loop it replaced.
+
+legacy_defaulters is the admin_dashboard code from before the summary
+table: it prefetches every present record of every active student and
+filters, sorts and slices in Python, so its cost grows with attendance
+history. The query reads one summary row per student and should not.
+"""
+
+import random
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Min, Prefetch
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from attendance.services import _query_defaulters
+from lectures.models import Lecture
+from students.models import Student
+
+pytestmark = pytest.mark.django_db
+
+# History is multiplied by this much between the two query measurements
+HISTORY_GROWTH = 3
+# Allowed slowdown of the query on the longer history, plus timer noise
+FLAT_RATIO = 1.5
+FLAT_SLACK_MS = 2.0
+
+
+def legacy_defaulters(threshold, limit, today):
+    critical_defaulters = []
+
+    # Optimize with prefetch_related
+    students = Student.objects.filter(is_active=True).select_related("batch", "branch").prefetch_related(
+        Prefetch(
+            'attendancerecord_set',
+            queryset=AttendanceRecord.objects.filter(status="P", lecture__date__lte=today)
+        )
+    )
+
+    # Pre-fetch lecture counts per batch
+    batch_lecture_counts = dict(
+        Lecture.objects.filter(date__lte=today).values('batch').annotate(count=Count('id')).values_list('batch', 'count')
+    )
+
+    for student in students:
+        total_lectures = batch_lecture_counts.get(student.batch_id, 0)
+
+        if total_lectures == 0:
+            continue
+
+        present_count = student.attendancerecord_set.count()
+
+        attendance_percent = round((present_count / total_lectures) * 100, 2)
+
+        if attendance_percent < threshold:
+            critical_defaulters.append({
+                "id": student.id,
+                "roll_no": student.roll_number,
+                "full_name": student.full_name,
+                "attendance_percent": attendance_percent,
+            })
+
+    return sorted(
+        critical_defaulters,
+        key=lambda x: x["attendance_percent"]
+    )[:limit]
+
+
+def add_history(factor):
+    """
+    Prepend (factor - 1) copies of each batch's lecture calendar, with
+    attendance for every student, before its first lecture. Rolled back
+    with the test's transaction.
+    """
+    user = get_user_model().objects.order_by("id").first()
+    rng = random.Random(7)
+    for batch_id, first in Lecture.objects.values_list("batch_id").annotate(first=Min("date")):
+        calendar = sorted(
+            Lecture.objects.filter(batch_id=batch_id).values_list("date", "lecture_type").distinct()
+        )
+        span = calendar[-1][0] - first + timedelta(days=1)
+        lectures = Lecture.objects.bulk_create([
+            Lecture(
+                batch_id=batch_id,
+                date=d - span * copy,
+                lecture_type=lecture_type,
+                title=f"History {copy} - {lecture_type} - {d - span * copy}",
+                created_by=user,
+            )
+            for copy in range(1, factor)
+            for d, lecture_type in calendar
+        ])
+        student_ids = list(Student.objects.filter(batch_id=batch_id).values_list("id", flat=True))
+        AttendanceRecord.objects.bulk_create(
+            (
+                AttendanceRecord(
+                    lecture=lecture,
+                    student_id=student_id,
+                    status="P" if rng.random() < 0.8 else "A",
+                )
+                for lecture in lectures
+                for student_id in student_ids
+            ),
+            batch_size=5000,
+        )
+
+
+@pytest.fixture
+def args():
+    return (
+        settings.ATTENDANCE_DEFAULTER_THRESHOLD,
+        settings.ATTENDANCE_DEFAULTER_LIMIT,
+        timezone.localdate(),
+    )
+
+
+def test_defaulter_query_matches_legacy(args):
+    query = _query_defaulters(*args)
+    legacy = legacy_defaulters(*args)
+
+    # Equal percentages may come out in either order
+    assert [row["attendance_percent"] for row in query] == [row["attendance_percent"] for row in legacy]
+
+
+CASES = {
+    "defaulters_legacy": legacy_defaulters,
+    "defaulters_query": _query_defaulters,
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_defaulters_within_baseline(name, args, benchmark):
+    benchmark(name, lambda: CASES[name](*args))
+
+
+def test_defaulter_query_beats_legacy(args, measure_case):
+    legacy = measure_case(lambda: legacy_defaulters(*args))
+    query = measure_case(lambda: _query_defaulters(*args))
+
+    # Rows fetched are bounded by the limit rather than the student count
+    assert query["rows"] <= args[1]
+    assert query["rows"] < legacy["rows"]
+    assert query["peak_kb"] <= legacy["peak_kb"]
+
+
+def test_defaulter_query_flat_in_history(args, measure_case):
+    records = AttendanceRecord.objects.count()
+    base = measure_case(lambda: _query_defaulters(*args))
+
+    add_history(HISTORY_GROWTH)
+    assert AttendanceRecord.objects.count() >= records * HISTORY_GROWTH
+    grown = measure_case(lambda: _query_defaulters(*args))
+
+    assert grown["queries"] == base["queries"]
+    assert grown["rows"] <= args[1]
+    assert grown["time_ms"] <= base["time_ms"] * FLAT_RATIO + FLAT_SLACK_MS, (
+        f"{HISTORY_GROWTH}x history took {grown['time_ms']} ms against {base['time_ms']} ms"
+    )
@@ -0,0 +1,70 @@
+import tempfile
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+
+from lectures.models import Batch
+from reports.services import build_lecture_attendance_matrix
+from students.models import Student
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+def get(client, url, params=None):
+    response = client.get(url, params or {})
+    assert response.status_code == 200, f"GET {url} returned {response.status_code}"
+    # Drain streaming bodies so their queries are measured
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    response.close()
+
+
+def matrix(batch):
+    with tempfile.TemporaryFile() as tmp:
+        build_lecture_attendance_matrix([batch], batch.first_date, batch.last_date, tmp)
+
+
+@pytest.fixture(scope="session")
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        user = User.objects.create_user("benchmark-admin@example.com", "benchmark", role="ADMIN")
+        batch = (
+            Batch.objects.filter(student__is_active=True)
+            .annotate(first_date=Min("lecture__date"), last_date=Max("lecture__date"))
+            .filter(first_date__isnull=False)
+            .order_by("name")
+            .first()
+        )
+        student = Student.objects.filter(batch=batch, is_active=True).order_by("roll_number").first()
+        client = Client()
+        client.force_login(user)
+    return {"client": client, "batch": batch, "student": student}
+
+
+CASES = {
+    "admin_dashboard": lambda d: get(d["client"], reverse("admin_dashboard")),
+    "admin_attendance_list": lambda d: get(d["client"], reverse("admin_attendance_list")),
+    "batch_attendance_analysis": lambda d: get(
+        d["client"],
+        reverse("batch_attendance_analysis", args=[d["batch"].id]),
+        {"start_date": d["batch"].first_date.isoformat(), "end_date": d["batch"].last_date.isoformat()},
+    ),
+    "student_profile": lambda d: get(d["client"], reverse("student_profile", args=[d["student"].id])),
+    "student_attendance_report": lambda d: get(
+        d["client"], reverse("student_attendance_report"), {"roll_number": d["student"].roll_number}
+    ),
+    "lecture_attendance_matrix": lambda d: matrix(d["batch"]),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_view_within_baseline(name, dataset, benchmark):
+    benchmark(name, lambda: CASES[name](dataset))
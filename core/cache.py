@@ -0,0 +1,114 @@
+# core/cache.py
+"""
+Versioned caching for dashboard tiles.
+
+Tiles are keyed by date and a global attendance data version. Every
+attendance write bumps the version, so a tile is recomputed once per
+change rather than once per request, and stale entries simply expire.
+The cache is an optimisation only: when it is unreachable tiles are
+computed uncached and version bumps are skipped.
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+ATTENDANCE_VERSION_KEY = "attendance:data_version"
+TILE_TIMEOUT = 60 * 60 * 24
+STATS_KEY = "tile_stats:{name}:{outcome}"
+
+logger = logging.getLogger(__name__)
+
+
+def get_attendance_version():
+    """The current attendance data version, or None if the cache is unavailable."""
+    try:
+        version = cache.get(ATTENDANCE_VERSION_KEY)
+        if version is None:
+            # Seed from the clock so a lost key never re-issues an old version
+            cache.add(ATTENDANCE_VERSION_KEY, int(time.time() * 1000), timeout=None)
+            version = cache.get(ATTENDANCE_VERSION_KEY)
+    except Exception:
+        logger.warning("Cache unavailable; reading attendance version failed", exc_info=True)
+        return None
+    return version
+
+
+def bump_attendance_version():
+    try:
+        try:
+            return cache.incr(ATTENDANCE_VERSION_KEY)
+        except ValueError:
+            get_attendance_version()
+            return cache.incr(ATTENDANCE_VERSION_KEY)
+    except Exception:
+        # Runs from on_commit: the write is already committed and must not fail
+        logger.warning("Cache unavailable; attendance version bump skipped", exc_info=True)
+        return None
+
+
+def attendance_changed():
+    """Bump the attendance version once the current transaction commits."""
+    transaction.on_commit(bump_attendance_version)
+
+
+def _count(name, outcome):
+    key = STATS_KEY.format(name=name, outcome=outcome)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+    except Exception:
+        logger.warning("Cache unavailable; tile %s %s not counted", name, outcome, exc_info=True)
+
+
+def cached_tile(name, day, compute, timeout=TILE_TIMEOUT):
+    """
+    Return the cached value of tile `name` for `day` at the current
+    attendance version, computing and storing it on a miss. Falls back to
+    computing it uncached when the cache is unavailable.
+    """
+    version = get_attendance_version()
+    if version is None:
+        return compute()
+
+    key = f"tile:{name}:{day}:{version}"
+    try:
+        value = cache.get(key)
+    except Exception:
+        logger.warning("Cache unavailable; computing tile %s uncached", name, exc_info=True)
+        return compute()
+    if value is not None:
+        _count(name, "hit")
+        return value
+
+    _count(name, "miss")
+    value = compute()
+    try:
+        cache.set(key, value, timeout)
+    except Exception:
+        logger.warning("Cache unavailable; tile %s not stored", name, exc_info=True)
+    return value
+
+
+def tile_stats(names):
+    """Hit/miss counters for the given tile names (zeros if the cache is unavailable)."""
+    keys = {
+        (name, outcome): STATS_KEY.format(name=name, outcome=outcome)
+        for name in names
+        for outcome in ("hit", "miss")
+    }
+    try:
+        values = cache.get_many(keys.values())
+    except Exception:
+        logger.warning("Cache unavailable; tile stats not read", exc_info=True)
+        values = {}
+    stats = {}
+    for (name, outcome), key in keys.items():
+        stats.setdefault(name, {})[outcome] = values.get(key, 0)
+    return stats
@@ -1,6 +1,6 @@
 from datetime import date
 from django.core.management.base import BaseCommand
-from lectures.models import Batch, Slot, Lecture
+from lectures.models import Batch, Lecture
 from accounts.models import User
 
 
@@ -19,30 +19,13 @@ class Command(BaseCommand):
 
         ]
 
-        batch_slot_map = {
-            "Batch 1": "Slot 1",
-            "Batch 2": "Slot 1",
-            "Batch 3": "Slot 2",
-            "Batch 4": "Slot 3",
-        }
+        batch_names = ["Batch 1", "Batch 2", "Batch 3", "Batch 4"]
 
         lecture_types = [
             ("MS", "Morning Session"),
             ("AS", "Afternoon Session"),
         ]
 
-        created = 0
-        skipped = 0
-
-        for slot_name in {"Slot 1", "Slot 2", "Slot 3"}:
-            if not Slot.objects.filter(name=slot_name).exists():
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Slot '{slot_name}' does not exist. Run seed slots first."
-                    )
-                )
-                return
-
         try:
             user = User.objects.get(email="admin@tpc.com")
         except User.DoesNotExist:
@@ -51,36 +34,37 @@ class Command(BaseCommand):
             )
             return
 
-        for d in dates:
-            for batch_name, slot_name in batch_slot_map.items():
-                slot = Slot.objects.get(name=slot_name)
+        batches = {b.name: b for b in Batch.objects.filter(name__in=batch_names)}
+        for batch_name in batch_names:
+            if batch_name not in batches:
+                self.stdout.write(
+                    self.style.ERROR(f"Batch '{batch_name}' does not exist. Run seed first.")
+                )
 
-                try:
-                    batch = Batch.objects.get(name=batch_name, slot=slot)
-                except Batch.DoesNotExist:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Batch '{batch_name}' with slot '{slot_name}' does not exist."
-                        )
-                    )
-                    continue
+        existing = set(
+            Lecture.objects.filter(batch__in=batches.values(), date__in=dates)
+            .values_list("batch_id", "date", "lecture_type")
+        )
 
+        new_lectures = []
+        skipped = 0
+        for d in dates:
+            for batch_name, batch in batches.items():
                 for lec_type, lec_label in lecture_types:
-                    obj, was_created = Lecture.objects.get_or_create(
-                        batch=batch,
-                        slot=slot,
-                        date=d,
-                        lecture_type=lec_type,
-                        defaults={
-                            "title": f"{lec_label} - {batch_name}",
-                            "created_by": user,
-                        },
+                    if (batch.id, d, lec_type) in existing:
+                        skipped += 1
+                        continue
+                    new_lectures.append(
+                        Lecture(
+                            batch=batch,
+                            date=d,
+                            lecture_type=lec_type,
+                            title=f"{lec_label} - {batch_name}",
+                            created_by=user,
+                        )
                     )
 
-                    if was_created:
-                        created += 1
-                    else:
-                        skipped += 1
+        created = len(Lecture.objects.bulk_create(new_lectures))
 
         self.stdout.write(
             self.style.SUCCESS(
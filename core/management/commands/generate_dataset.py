@@ -0,0 +1,277 @@
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from core.cache import attendance_changed
+from lectures.models import Batch, Lecture
+from students.models import Branch, Student
+
+User = get_user_model()
+
+# Synthetic roll numbers are 22 + two letters counting down from ZZ, which
+# keeps them valid for ROLL_NUMBER_RE without colliding with real branch codes
+ROLL_YEAR = "22"
+ROLLS_PER_CODE = 10000
+MAX_STUDENTS = 676 * ROLLS_PER_CODE
+COPY_CHUNK_ROWS = 200_000
+
+
+def synthetic_roll(index):
+    code, serial = divmod(index, ROLLS_PER_CODE)
+    first, second = divmod(code, 26)
+    return f"{ROLL_YEAR}{chr(90 - first)}{chr(90 - second)}{serial:04d}"
+
+
+def lecture_calendar(end_date, days, holiday_ratio, rng):
+    """Working days (Mon-Sat) in the `days` before end_date, minus random holidays."""
+    dates = []
+    for offset in range(days - 1, -1, -1):
+        d = end_date - timedelta(days=offset)
+        if d.weekday() == 6 or rng.random() < holiday_ratio:
+            continue
+        dates.append(d)
+    return dates
+
+
+def student_profile(rng, present_ratio, chronic_ratio):
+    """Per-student probability of attending a session."""
+    if rng.random() < chronic_ratio:
+        return rng.uniform(0.2, 0.55)
+    return min(max(rng.gauss(present_ratio, 0.08), 0.5), 0.99)
+
+
+def attendance_statuses(rng, sessions, attend_p, streak):
+    """
+    Yield one status per session. With probability `streak` a session repeats
+    the previous status, otherwise it is drawn from attend_p, so runs of
+    presence/absence appear while the long-run ratio stays attend_p.
+    """
+    previous = None
+    for _ in range(sessions):
+        if previous is None or rng.random() >= streak:
+            previous = "P" if rng.random() < attend_p else "A"
+        yield previous
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic dataset (batches, students, lectures, attendance) for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batches", type=int, default=4, help="Number of batches (default: 4)")
+        parser.add_argument("--students", type=int, default=100, help="Students per batch (default: 100)")
+        parser.add_argument("--days", type=int, default=60, help="Calendar days of lectures (default: 60)")
+        parser.add_argument(
+            "--end-date",
+            type=str,
+            help="Last lecture date (YYYY-MM-DD). Defaults to yesterday",
+        )
+        parser.add_argument(
+            "--present-ratio",
+            type=int,
+            default=80,
+            help="Typical percentage of sessions a regular student attends (default: 80)",
+        )
+        parser.add_argument(
+            "--chronic-ratio",
+            type=int,
+            default=8,
+            help="Percentage of students who are chronic absentees (default: 8)",
+        )
+        parser.add_argument(
+            "--streak",
+            type=float,
+            default=0.6,
+            help="Probability a session repeats the previous status (default: 0.6)",
+        )
+        parser.add_argument(
+            "--holiday-ratio",
+            type=float,
+            default=0.05,
+            help="Probability a working day is a holiday (default: 0.05)",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+        parser.add_argument(
+            "--prefix",
+            type=str,
+            default="Dataset Batch",
+            help="Name prefix for generated batches (default: 'Dataset Batch')",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete previously generated batches with this prefix first",
+        )
+
+    def handle(self, *args, **options):
+        n_batches = options["batches"]
+        n_students = options["students"]
+        days = options["days"]
+        prefix = options["prefix"].strip()
+        rng = random.Random(options["seed"])
+
+        if n_batches < 1 or n_students < 1 or days < 1:
+            raise CommandError("--batches, --students and --days must be positive")
+        if n_batches * n_students > MAX_STUDENTS:
+            raise CommandError(f"At most {MAX_STUDENTS} synthetic students are supported")
+
+        end_date = (
+            timezone.datetime.fromisoformat(options["end_date"]).date()
+            if options["end_date"]
+            else timezone.localdate() - timedelta(days=1)
+        )
+
+        branch_ids = list(Branch.objects.order_by("id").values_list("id", flat=True))
+        if not branch_ids:
+            raise CommandError("No branches found. Run `manage.py seed` first.")
+
+        existing = Batch.objects.filter(name__startswith=f"{prefix} ")
+        if existing.exists():
+            if not options["reset"]:
+                raise CommandError(f"Batches named '{prefix} …' already exist. Use --reset to replace them.")
+            self.stdout.write(self.style.WARNING(f"Deleting {existing.count()} existing generated batch(es)"))
+            existing.delete()
+
+        system_user, _ = User.objects.get_or_create(
+            email="admin@tpc.com",
+            defaults={"full_name": "System Import", "role": "ADMIN"},
+        )
+
+        started = time.monotonic()
+        with transaction.atomic():
+            batches = Batch.objects.bulk_create(
+                [Batch(name=f"{prefix} {i + 1}") for i in range(n_batches)]
+            )
+            self._step(started, f"{len(batches)} batches")
+
+            students = Student.objects.bulk_create(
+                [
+                    self._student(rng, batch, b * n_students + s, branch_ids)
+                    for b, batch in enumerate(batches)
+                    for s in range(n_students)
+                ],
+                batch_size=5000,
+            )
+            self._step(started, f"{len(students)} students")
+
+            dates = lecture_calendar(end_date, days, options["holiday_ratio"], rng)
+            lectures = Lecture.objects.bulk_create(
+                [
+                    Lecture(
+                        batch=batch,
+                        date=d,
+                        lecture_type=session,
+                        title=f"{batch.name} - {session} - {d.strftime('%d-%b-%Y')}",
+                        created_by=system_user,
+                    )
+                    for batch in batches
+                    for d in dates
+                    for session in ("MS", "AS")
+                ],
+                batch_size=5000,
+            )
+            self._step(started, f"{len(lectures)} lectures over {len(dates)} days")
+
+            lectures_by_batch = {}
+            for lecture in lectures:
+                lectures_by_batch.setdefault(lecture.batch_id, []).append(lecture.id)
+
+            rows = self._attendance_rows(
+                rng,
+                students,
+                lectures_by_batch,
+                options["present_ratio"] / 100,
+                options["chronic_ratio"] / 100,
+                options["streak"],
+            )
+            written = self._write_attendance(rows)
+            self._step(started, f"{written} attendance records")
+
+            attendance_changed()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"DATASET READY → {len(batches)} batches, {len(students)} students, "
+                f"{len(lectures)} lectures, {written} attendance records in {elapsed:.1f}s "
+                f"({written / max(elapsed, 1e-6):.0f} rows/sec)"
+            )
+        )
+
+    def _step(self, started, message):
+        self.stdout.write(f"  [{time.monotonic() - started:7.1f}s] {message}")
+
+    def _student(self, rng, batch, index, branch_ids):
+        roll = synthetic_roll(index)
+        return Student(
+            full_name=f"Student {roll}",
+            roll_number=roll,
+            batch=batch,
+            branch_id=rng.choice(branch_ids),
+            email=f"{roll.lower()}@dataset.example.com",
+            contact_number=f"9{rng.randrange(10**9):09d}",
+            parent_email=f"parent.{roll.lower()}@dataset.example.com",
+            parent_contact_number=f"8{rng.randrange(10**9):09d}",
+            is_active=rng.random() > 0.02,
+        )
+
+    def _attendance_rows(self, rng, students, lectures_by_batch, present_ratio, chronic_ratio, streak):
+        """Yield (lecture_id, student_id, status), lectures in date/session order per student."""
+        for student in students:
+            lecture_ids = lectures_by_batch.get(student.batch_id, [])
+            attend_p = student_profile(rng, present_ratio, chronic_ratio)
+            statuses = attendance_statuses(rng, len(lecture_ids), attend_p, streak)
+            for lecture_id, status in zip(lecture_ids, statuses):
+                yield lecture_id, student.id, status
+
+    def _write_attendance(self, rows):
+        if connection.vendor == "postgresql":
+            return self._copy_attendance(rows)
+
+        written = 0
+        chunk = []
+        for lecture_id, student_id, status in rows:
+            chunk.append(AttendanceRecord(lecture_id=lecture_id, student_id=student_id, status=status))
+            if len(chunk) >= 10000:
+                AttendanceRecord.objects.bulk_create(chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            AttendanceRecord.objects.bulk_create(chunk)
+            written += len(chunk)
+        return written
+
+    def _copy_attendance(self, rows):
+        """Stream rows into the attendance table with COPY in fixed-size chunks."""
+        opts = AttendanceRecord._meta
+        columns = ", ".join(
+            opts.get_field(name).column
+            for name in ("lecture", "student", "status", "marked_at", "updated_at")
+        )
+        sql = f"COPY {opts.db_table} ({columns}) FROM STDIN"
+        now = timezone.now().isoformat()
+
+        written = 0
+        with connection.cursor() as cursor:
+            buffer = io.StringIO()
+            pending = 0
+            for lecture_id, student_id, status in rows:
+                buffer.write(f"{lecture_id}\t{student_id}\t{status}\t{now}\t{now}\n")
+                pending += 1
+                if pending >= COPY_CHUNK_ROWS:
+                    buffer.seek(0)
+                    cursor.copy_expert(sql, buffer)
+                    written += pending
+                    buffer = io.StringIO()
+                    pending = 0
+            if pending:
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                written += pending
+        return written
@@ -5,6 +5,7 @@ from openpyxl import load_workbook
 from students.models import Student
 from lectures.models import Lecture, Batch
 from attendance.models import AttendanceRecord
+from core.cache import attendance_changed
 
 
 class Command(BaseCommand):
@@ -113,6 +114,9 @@ class Command(BaseCommand):
                     created += int(is_created)
                     updated += int(not is_created)
 
+        if not dry_run:
+            attendance_changed()
+
         if dry_run:
             self.stdout.write(
                 self.style.SUCCESS(
@@ -1,130 +1,255 @@
+import csv
 import json
-from django.core.management.base import BaseCommand
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from attendance.services import ROLL_NUMBER_RE
+from core.cache import attendance_changed
 from students.models import Student, Branch
 from lectures.models import Batch
-from django.utils.text import slugify
-import re
+
+
+# Column order written by readcsv.py / the onboarding sheet export
+CSV_COLUMNS = (
+    "name",
+    "roll_number",
+    "branch",
+    "batch",
+    "email_id",
+    "contact_number",
+    "parent_email",
+    "parent_contact",
+    "parent_alternate_email",
+    "parent_alternate_contact",
+)
+UPSERT_CHUNK_SIZE = 1000
+
+# Refreshed on existing students with --update-existing; email is unique and
+# often a placeholder, so it is left alone
+UPDATE_FIELDS = [
+    "full_name",
+    "batch",
+    "branch",
+    "contact_number",
+    "parent_email",
+    "parent_contact_number",
+]
+
+
+def _missing(value):
+    return not value or str(value).strip().lower() == "na"
+
+
+def _read_csv(file_path):
+    """Stream CSV rows as dicts; a header row (roll_number/name...) is skipped."""
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if not row:
+                continue
+            if i == 0 and len(row) > 1 and "roll" in row[1].lower():
+                continue
+            yield dict(zip(CSV_COLUMNS, (value.strip() for value in row)))
+
+
+def _read_json(file_path):
+    """JSON as produced by readcsv.py (object keyed by name) or a list of rows."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from (data.values() if isinstance(data, dict) else data)
 
 
 class Command(BaseCommand):
-    help = "Import students from JSON (batch-based, no slot)"
+    help = "Import students from CSV or JSON (batch-based, bulk upsert on roll number)"
 
     def add_arguments(self, parser):
-        parser.add_argument("file", type=str)
+        parser.add_argument("file", type=str, help="Path to a .csv or .json file")
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--update-existing",
+            action="store_true",
+            help="Update name, batch, branch and contact fields of students that already exist",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=UPSERT_CHUNK_SIZE,
+            help=f"Students per bulk upsert (default: {UPSERT_CHUNK_SIZE})",
+        )
 
     def handle(self, *args, **options):
         file_path = options["file"]
         dry_run = options["dry_run"]
+        update_existing = options["update_existing"]
+        chunk_size = max(options["chunk_size"], 1)
+
+        suffix = Path(file_path).suffix.lower()
+        if suffix == ".csv":
+            rows = _read_csv(file_path)
+        elif suffix == ".json":
+            rows = _read_json(file_path)
+        else:
+            raise CommandError("Expected a .csv or .json file")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        created = 0
-        skipped = 0
+        started = time.monotonic()
+        branches = {b.name.lower(): b.id for b in Branch.objects.all()}
+        batches = {b.name: b.id for b in Batch.objects.all()}
 
-        flags = {
+        self.counts = {"created": 0, "updated": 0, "skipped": 0}
+        self.touched_batch_ids = set()
+        self.flags = {
             "no_email": [],
             "no_parent_email": [],
             "used_alternate_parent_contact": [],
         }
 
-        for _, row in data.items():
-            try: 
-                roll = row.get("roll_number")
-            except AttributeError:
-                self.stdout.write(self.style.ERROR(f"Invalid row format: {row}"))
-                skipped += 1
-                continue
-            name = row.get("name")
-            branch_name = row.get("branch")
-            batch_name = row.get("batch")
-            if not re.match(r'^(22|23|24|25)[A-Z]{2}\d{4}$', roll or ""):
-                self.stdout.write(self.style.ERROR(f"Invalid roll number '{roll}'"))
-                skipped += 1
-                continue
-            if not roll or not branch_name or not batch_name:
-                skipped += 1
-                continue
-
-            try:
-                branch = Branch.objects.get(name__iexact=branch_name.strip())
-            except Branch.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f"Unknown branch '{branch_name}' for {roll}")
-                )
-                skipped += 1
-                continue
-
-            try:
-                batch = Batch.objects.get(name=batch_name.strip())
-            except Batch.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f"Unknown batch '{batch_name}' for {roll}")
-                )
-                skipped += 1
-                continue
-
-            email = row.get("email_id") or None
-            contact = row.get("contact") or ""
-
-            parent_email = row.get("parent_email")
-            parent_contact = row.get("parent_contact")
-
-            if not parent_email or parent_email.lower() == "na":
-                parent_email = row.get("parent_alternate_email")
-                flags["no_parent_email"].append(roll)
-            if not parent_contact or parent_contact.lower() == "na":
-               parent_contact = row.get("parent_alternate_contact")
-               flags["used_alternate_parent_contact"].append(roll)
-
-
-            if not email:
-                flags["no_email"].append(roll)
-
-            if not parent_email:
-                flags["no_parent_email"].append(roll)
-
-            if dry_run:
-                created += 1
-                continue
-
-            obj, was_created = Student.objects.get_or_create(
-                roll_number=roll,
-                defaults={
-                    "full_name": name,
-                    "branch": branch,
-                    "batch": batch,
-                    "email": email or f"{slugify(roll)}@example.com",
-                    "contact_number": contact,
-                    "parent_email": parent_email or "",
-                    "parent_contact_number": parent_contact,
-                    "is_active": True,
-                },
-            )
-
-            if was_created:
-                created += 1
-            else:
-                skipped += 1
-
+        seen = set()
+        chunk = []
+        try:
+            for row in rows:
+                student = self._build_student(row, branches, batches, seen)
+                if student is None:
+                    self.counts["skipped"] += 1
+                    continue
+                chunk.append(student)
+                if len(chunk) >= chunk_size:
+                    self._write_chunk(chunk, dry_run, update_existing)
+                    chunk = []
+            if chunk:
+                self._write_chunk(chunk, dry_run, update_existing)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Failed to read {file_path}: {e}")
+
+        if not dry_run and self.touched_batch_ids:
+            # Summary rows follow via triggers; cached tiles need a new version
+            attendance_changed()
+
+        elapsed = time.monotonic() - started
         if dry_run:
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"DRY RUN OK → {created} students validated (no DB writes)"
+                    f"DRY RUN OK → {self.counts['created']} new, "
+                    f"{self.counts['updated']} existing students validated (no DB writes)"
                 )
             )
         else:
             self.stdout.write(
-                self.style.SUCCESS(f"IMPORTED → {created} students")
+                self.style.SUCCESS(f"IMPORTED → {self.counts['created']} students")
             )
             self.stdout.write(
-                self.style.WARNING(f"SKIPPED → {skipped} students")
+                self.style.SUCCESS(f"UPDATED → {self.counts['updated']} students")
             )
+        self.stdout.write(
+            self.style.WARNING(f"SKIPPED → {self.counts['skipped']} students")
+        )
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s")
 
         self.stdout.write("\nFlags summary:")
-        self.stdout.write(f"• No email: {len(flags['no_email'])}")
-        self.stdout.write(f"• No parent email: {len(flags['no_parent_email'])}")
+        self.stdout.write(f"• No email: {len(self.flags['no_email'])}")
+        self.stdout.write(f"• No parent email: {len(self.flags['no_parent_email'])}")
         self.stdout.write(
-            f"• Used alternate parent contact: {len(flags['used_alternate_parent_contact'])}"
+            f"• Used alternate parent contact: {len(self.flags['used_alternate_parent_contact'])}"
+        )
+
+    def _build_student(self, row, branches, batches, seen):
+        """Validate one input row and return an unsaved Student, or None to skip."""
+        if not isinstance(row, dict):
+            self.stdout.write(self.style.ERROR(f"Invalid row format: {row}"))
+            return None
+
+        roll = (row.get("roll_number") or "").strip().upper()
+        branch_name = (row.get("branch") or "").strip()
+        batch_name = (row.get("batch") or "").strip()
+        if not ROLL_NUMBER_RE.match(roll):
+            self.stdout.write(self.style.ERROR(f"Invalid roll number '{roll}'"))
+            return None
+        if not branch_name or not batch_name:
+            return None
+        if roll in seen:
+            self.stdout.write(self.style.ERROR(f"Duplicate roll number '{roll}' in file"))
+            return None
+
+        branch_id = branches.get(branch_name.lower())
+        if branch_id is None:
+            self.stdout.write(self.style.ERROR(f"Unknown branch '{branch_name}' for {roll}"))
+            return None
+        batch_id = batches.get(batch_name)
+        if batch_id is None:
+            self.stdout.write(self.style.ERROR(f"Unknown batch '{batch_name}' for {roll}"))
+            return None
+
+        email = (row.get("email_id") or "").strip() or None
+        if email and email.lower() in seen:
+            self.stdout.write(self.style.ERROR(f"Duplicate email '{email}' in file ({roll})"))
+            return None
+        seen.add(roll)
+        if email:
+            seen.add(email.lower())
+        contact = row.get("contact_number") or row.get("contact") or ""
+        parent_email = row.get("parent_email")
+        parent_contact = row.get("parent_contact")
+
+        if _missing(parent_email):
+            parent_email = row.get("parent_alternate_email")
+        if _missing(parent_contact):
+            parent_contact = row.get("parent_alternate_contact")
+            self.flags["used_alternate_parent_contact"].append(roll)
+        if not email:
+            self.flags["no_email"].append(roll)
+        if _missing(parent_email):
+            parent_email = ""
+            self.flags["no_parent_email"].append(roll)
+
+        return Student(
+            roll_number=roll,
+            full_name=(row.get("name") or "").strip(),
+            branch_id=branch_id,
+            batch_id=batch_id,
+            email=email or f"{slugify(roll)}@example.com",
+            contact_number=contact,
+            parent_email=parent_email,
+            parent_contact_number=parent_contact or "",
+            is_active=True,
+        )
+
+    def _write_chunk(self, chunk, dry_run, update_existing):
+        """Upsert one chunk of students on roll_number (two lookups + one insert)."""
+        rolls = [s.roll_number for s in chunk]
+        existing = set(
+            Student.objects.filter(roll_number__in=rolls).values_list("roll_number", flat=True)
         )
+        # Emails are unique too: a new roll reusing another student's email
+        # would abort the whole chunk, so report and drop it up front
+        taken = set(
+            Student.objects.filter(email__in=[s.email for s in chunk])
+            .exclude(roll_number__in=rolls)
+            .values_list("email", flat=True)
+        )
+
+        students = []
+        for student in chunk:
+            if student.email in taken:
+                self.stdout.write(
+                    self.style.ERROR(f"Email '{student.email}' already used by another student ({student.roll_number})")
+                )
+                self.counts["skipped"] += 1
+            elif student.roll_number in existing and not update_existing:
+                self.counts["skipped"] += 1
+            else:
+                self.counts["updated" if student.roll_number in existing else "created"] += 1
+                students.append(student)
+
+        if dry_run or not students:
+            return
+
+        with transaction.atomic():
+            Student.objects.bulk_create(
+                students,
+                update_conflicts=True,
+                unique_fields=["roll_number"],
+                update_fields=UPDATE_FIELDS,
+            )
+        self.touched_batch_ids.update(s.batch_id for s in students)
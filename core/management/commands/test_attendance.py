@@ -7,6 +7,7 @@ from django.utils import timezone
 from lectures.models import Lecture
 from students.models import Student
 from attendance.models import AttendanceRecord
+from core.cache import attendance_changed
 
 
 class Command(BaseCommand):
@@ -52,20 +53,20 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("No lectures found for this date"))
             return
 
-        total_created = 0
-        total_updated = 0
+        students_by_batch = {}
+        for student_id, batch_id in Student.objects.filter(
+            batch__in=lectures.values("batch_id"),
+            is_active=True,
+        ).values_list("id", "batch_id"):
+            students_by_batch.setdefault(batch_id, []).append(student_id)
 
-        for lecture in lectures:
-            students = Student.objects.filter(
-                batch=lecture.batch,
-                slot=lecture.slot,
-                is_active=True,
-            )
+        total_written = 0
 
-            if not students.exists():
+        for lecture in lectures.select_related("batch"):
+            student_ids = students_by_batch.get(lecture.batch_id, [])
+            if not student_ids:
                 continue
 
-            student_ids = list(students.values_list("id", flat=True))
             random.shuffle(student_ids)
 
             present_cutoff = int(len(student_ids) * (present_ratio / 100))
@@ -78,29 +79,31 @@ class Command(BaseCommand):
                 f"{len(student_ids)} students"
             )
 
-            for student in students:
-                status = "P" if student.id in present_ids else "A"
-
-                if dry_run:
-                    continue
+            if dry_run:
+                continue
 
-                obj, created = AttendanceRecord.objects.update_or_create(
-                    student=student,
-                    lecture=lecture,
-                    defaults={
-                        "status": status,
-                        "marked_by": None,  # system-generated
-                    },
-                )
+            AttendanceRecord.objects.bulk_create(
+                [
+                    AttendanceRecord(
+                        student_id=student_id,
+                        lecture=lecture,
+                        status="P" if student_id in present_ids else "A",
+                        marked_by=None,  # system-generated
+                    )
+                    for student_id in student_ids
+                ],
+                update_conflicts=True,
+                update_fields=["status", "marked_by", "updated_at"],
+                unique_fields=["lecture", "student"],
+            )
+            total_written += len(student_ids)
 
-                if created:
-                    total_created += 1
-                else:
-                    total_updated += 1
+        if not dry_run:
+            attendance_changed()
 
         self.stdout.write(
             self.style.SUCCESS(
                 f"{'DRY RUN OK' if dry_run else 'DONE'} → "
-                f"Created: {total_created}, Updated: {total_updated}"
+                f"Written: {total_written}"
             )
         )
@@ -0,0 +1,33 @@
+# core/parallel.py
+"""
+Process pools for management commands that fan work out over CPUs.
+
+Workers are forked where the platform allows, so they inherit the
+configured Django without re-importing it; elsewhere (Windows, or
+wherever fork is unavailable) they are spawned and set Django up
+themselves. Either way no worker reuses the parent's DB sockets.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.db import connections
+
+
+def _init_worker():
+    if not apps.ready:
+        # Spawned: a fresh interpreter with only DJANGO_SETTINGS_MODULE inherited
+        django.setup()
+    # Forked: drop the parent's DB sockets; each worker opens its own
+    connections.close_all()
+
+
+def django_process_pool(max_workers):
+    """A ProcessPoolExecutor whose workers can use the ORM."""
+    # Close ours first so a forked child never inherits a live socket
+    connections.close_all()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker)
@@ -0,0 +1,263 @@
+# core/profiling.py
+"""
+Opt-in request profiling.
+
+ProfilingMiddleware samples requests, times them and their SQL, and adds
+the numbers to per-URL-name counters in the shared cache. Counters live in
+fixed time windows, so reading the last PROFILING_WINDOWS windows gives a
+rolling view across all gunicorn workers without any extra storage.
+Profiling is best effort: a cache failure is logged and the request is
+served as usual.
+"""
+
+import logging
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNTERS = ("requests", "wall_ms", "db_ms", "queries", "duplicate_queries")
+BUCKET_FIELDS = tuple(f"le_{bound}" for bound in LATENCY_BUCKETS_MS) + ("le_inf",)
+
+# URL names seen, as numbered slots so workers can register them with
+# atomic add/incr and readers can fetch them all with one get_many
+NAMES_COUNT_KEY = "profile:url_names:count"
+NAME_SLOT_KEY = "profile:url_names:{slot}"
+NAME_KEY = "profile:url_name:{name}"
+KEY = "profile:{window}:{name}:{field}"
+SLOW_SQL_CHARS = 500
+
+logger = logging.getLogger(__name__)
+
+# URL name -> window it was last registered in by this process
+_registered = {}
+
+
+def _window(now=None):
+    return int((now or time.time()) // settings.PROFILING_WINDOW_SECONDS)
+
+
+def _timeout():
+    return settings.PROFILING_WINDOW_SECONDS * (settings.PROFILING_WINDOWS + 1)
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=_timeout())
+        cache.incr(key, delta)
+
+
+def _bucket_field(wall_ms):
+    for bound, field in zip(LATENCY_BUCKETS_MS, BUCKET_FIELDS):
+        if wall_ms <= bound:
+            return field
+    return "le_inf"
+
+
+class QueryProfile:
+    """execute_wrapper recording each statement's duration and SQL text."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append(((time.perf_counter() - started) * 1000, sql))
+
+    @property
+    def db_ms(self):
+        return sum(ms for ms, _ in self.statements)
+
+    @property
+    def duplicate_queries(self):
+        # Same parameterised SQL run more than once: the N+1 signature
+        counts = Counter(sql for _, sql in self.statements)
+        return sum(n - 1 for n in counts.values() if n > 1)
+
+
+def _register_name(name, window):
+    # Once per window per process, so a flushed or evicted registry refills
+    if _registered.get(name) == window:
+        return
+    key = NAME_KEY.format(name=name)
+    slot = cache.get(key)
+    if slot is None:
+        try:
+            candidate = cache.incr(NAMES_COUNT_KEY)
+        except ValueError:
+            cache.add(NAMES_COUNT_KEY, 0, timeout=None)
+            candidate = cache.incr(NAMES_COUNT_KEY)
+        # Only one worker claims the name; a losing worker's slot stays empty
+        slot = candidate if cache.add(key, candidate, timeout=None) else cache.get(key)
+    if slot is not None:
+        # Also refills a slot left empty by a worker that died mid-registration
+        cache.add(NAME_SLOT_KEY.format(slot=slot), name, timeout=None)
+        _registered[name] = window
+
+
+def _registered_names():
+    count = cache.get(NAMES_COUNT_KEY) or 0
+    slots = cache.get_many([NAME_SLOT_KEY.format(slot=slot) for slot in range(1, count + 1)])
+    return set(slots.values())
+
+
+def record_request(name, wall_ms, profile):
+    """Add one sampled request to the current window's counters for `name`."""
+    window = _window()
+    _register_name(name, window)
+    values = {
+        "requests": 1,
+        "wall_ms": round(wall_ms),
+        "db_ms": round(profile.db_ms),
+        "queries": len(profile.statements),
+        "duplicate_queries": profile.duplicate_queries,
+        _bucket_field(wall_ms): 1,
+    }
+    for field, delta in values.items():
+        if delta:
+            _incr(KEY.format(window=window, name=name, field=field), delta)
+
+    if profile.statements:
+        _record_slow_sql(KEY.format(window=window, name=name, field="slow_sql"), profile.statements)
+
+
+def _record_slow_sql(key, statements):
+    limit = settings.PROFILING_SLOW_SQL_LIMIT
+    slowest = sorted(statements, reverse=True)[:limit]
+    stored = cache.get(key) or []
+    if len(stored) >= limit and slowest[0][0] <= stored[-1][0]:
+        return
+    # Best effort: concurrent writers may drop an entry, which is fine for sampling
+    merged = sorted(
+        stored + [(round(ms, 2), sql[:SLOW_SQL_CHARS]) for ms, sql in slowest],
+        reverse=True,
+    )[:limit]
+    cache.set(key, merged, timeout=_timeout())
+
+
+def profile_snapshot():
+    """
+    Aggregate the last PROFILING_WINDOWS windows per URL name. Returns
+    {name: {counters..., "buckets": [(bound, cumulative), ...], "slow_sql": [...]}}
+    sorted by total wall time.
+    """
+    names = sorted(_registered_names())
+    current = _window()
+    windows = range(current - settings.PROFILING_WINDOWS + 1, current + 1)
+    fields = COUNTERS + BUCKET_FIELDS + ("slow_sql",)
+    values = cache.get_many([
+        KEY.format(window=w, name=name, field=field)
+        for w in windows
+        for name in names
+        for field in fields
+    ])
+
+    snapshot = {}
+    for name in names:
+        totals = dict.fromkeys(COUNTERS + BUCKET_FIELDS, 0)
+        slow_sql = []
+        for w in windows:
+            for field in COUNTERS + BUCKET_FIELDS:
+                totals[field] += values.get(KEY.format(window=w, name=name, field=field), 0)
+            slow_sql += values.get(KEY.format(window=w, name=name, field="slow_sql"), [])
+        if not totals["requests"]:
+            continue
+
+        cumulative = 0
+        buckets = []
+        for bound, field in zip(LATENCY_BUCKETS_MS + ("+Inf",), BUCKET_FIELDS):
+            cumulative += totals[field]
+            buckets.append((bound, cumulative))
+
+        requests = totals["requests"]
+        snapshot[name] = {
+            **{field: totals[field] for field in COUNTERS},
+            "avg_wall_ms": round(totals["wall_ms"] / requests, 1),
+            "avg_db_ms": round(totals["db_ms"] / requests, 1),
+            "avg_queries": round(totals["queries"] / requests, 1),
+            "p50_ms": _percentile(buckets, requests, 0.5),
+            "p95_ms": _percentile(buckets, requests, 0.95),
+            "buckets": buckets,
+            "slow_sql": sorted(slow_sql, reverse=True)[:settings.PROFILING_SLOW_SQL_LIMIT],
+        }
+
+    return dict(sorted(snapshot.items(), key=lambda item: -item[1]["wall_ms"]))
+
+
+def _percentile(buckets, total, q):
+    """Upper bucket bound containing the q-th request."""
+    target = total * q
+    for bound, cumulative in buckets:
+        if cumulative >= target:
+            return bound
+    return "+Inf"
+
+
+def prometheus_text(snapshot):
+    """
+    Render a snapshot in the Prometheus text format. Values cover the
+    rolling window, so every series is exposed as a gauge.
+    """
+    series = (
+        ("tpc_view_requests", "Sampled requests in the rolling window", "requests"),
+        ("tpc_view_wall_ms", "Total sampled wall time (ms) in the rolling window", "wall_ms"),
+        ("tpc_view_db_ms", "Total sampled SQL time (ms) in the rolling window", "db_ms"),
+        ("tpc_view_queries", "SQL statements run by sampled requests", "queries"),
+        ("tpc_view_duplicate_queries", "Repeated identical SQL statements (N+1 signal)", "duplicate_queries"),
+    )
+    lines = []
+    for metric, help_text, field in series:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for name, stats in snapshot.items():
+            lines.append(f'{metric}{{view="{name}"}} {stats[field]}')
+
+    lines.append("# HELP tpc_view_latency_bucket Sampled requests at or under each latency bound (ms)")
+    lines.append("# TYPE tpc_view_latency_bucket gauge")
+    for name, stats in snapshot.items():
+        for bound, cumulative in stats["buckets"]:
+            lines.append(f'tpc_view_latency_bucket{{view="{name}",le="{bound}"}} {cumulative}')
+
+    return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    """
+    Profile a PROFILING_SAMPLE_RATE fraction of requests. Removed from the
+    stack at startup unless PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.view_name:
+            try:
+                record_request(match.view_name, wall_ms, profile)
+            except Exception:
+                logger.exception("Could not record request profile for %s", match.view_name)
+        return response
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+
+urlpatterns = [
+    path("", views.profiling_dashboard, name="profiling_dashboard"),
+    path("metrics/", views.profiling_metrics, name="profiling_metrics"),
+]
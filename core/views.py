@@ -1,3 +1,43 @@
+import secrets
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import HttpResponse
 from django.shortcuts import render
 
-# Create your views here.
+from .profiling import profile_snapshot, prometheus_text
+
+
+def is_superuser(user):
+    return user.is_authenticated and user.is_superuser
+
+
+@login_required
+@user_passes_test(is_superuser)
+def profiling_dashboard(request):
+    return render(
+        request,
+        "core/profiling.html",
+        {
+            "snapshot": profile_snapshot(),
+            "enabled": settings.PROFILING_ENABLED,
+            "sample_rate": settings.PROFILING_SAMPLE_RATE,
+            "window_minutes": settings.PROFILING_WINDOW_SECONDS * settings.PROFILING_WINDOWS // 60,
+        },
+    )
+
+
+def profiling_metrics(request):
+    """Prometheus scrape endpoint: superusers, or `Authorization: Bearer <PROFILING_METRICS_TOKEN>`."""
+    token = settings.PROFILING_METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    authorized = is_superuser(request.user) or (
+        token and secrets.compare_digest(header, f"Bearer {token}")
+    )
+    if not authorized:
+        return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+
+    return HttpResponse(
+        prometheus_text(profile_snapshot()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
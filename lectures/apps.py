@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class LecturesConfig(AppConfig):
     name = 'lectures'
+
+    def ready(self):
+        from .counters import install_on_migrate
+
+        post_migrate.connect(install_on_migrate, sender=self)
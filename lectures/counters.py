@@ -0,0 +1,194 @@
+# lectures/counters.py
+"""
+PostgreSQL triggers that keep Lecture.expected_count / present_count /
+absent_count in step with attendance and student writes.
+
+Attendance and student triggers are statement-level with transition
+tables, so a bulk upsert or the EOD INSERT ... SELECT adjusts each lecture
+row once per statement instead of once per attendance row.
+"""
+
+from django.db import connection
+
+from attendance.models import AttendanceRecord
+from students.models import Student
+from .models import Lecture
+
+
+LECTURE = Lecture._meta.db_table
+ATTENDANCE = AttendanceRecord._meta.db_table
+STUDENT = Student._meta.db_table
+
+# (event, transition tables, (transition table, sign) sources)
+EVENTS = (
+    ("INSERT", "NEW TABLE AS new_rows", (("new_rows", 1),)),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows", (("new_rows", 1), ("old_rows", -1))),
+    ("DELETE", "OLD TABLE AS old_rows", (("old_rows", -1),)),
+)
+
+
+def _attendance_function(event, sources):
+    changes = "\n            UNION ALL\n".join(
+        f"            SELECT lecture_id, {sign} * (status = 'P')::int AS p, {sign} * (status = 'A')::int AS a FROM {table}"
+        for table, sign in sources
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION lecture_counters_attendance_{event.lower()}() RETURNS trigger AS $$
+BEGIN
+    UPDATE {LECTURE} l
+    SET present_count = l.present_count + delta.p,
+        absent_count = l.absent_count + delta.a
+    FROM (
+        SELECT lecture_id, SUM(p) AS p, SUM(a) AS a
+        FROM (
+{changes}
+        ) changes
+        GROUP BY lecture_id
+        HAVING SUM(p) <> 0 OR SUM(a) <> 0
+    ) delta
+    WHERE l.id = delta.lecture_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _student_function(event, sources):
+    changes = "\n            UNION ALL\n".join(
+        f"            SELECT batch_id, {sign} AS n FROM {table} WHERE is_active"
+        for table, sign in sources
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION lecture_counters_student_{event.lower()}() RETURNS trigger AS $$
+BEGIN
+    UPDATE {LECTURE} l
+    SET expected_count = l.expected_count + delta.n
+    FROM (
+        SELECT batch_id, SUM(n) AS n
+        FROM (
+{changes}
+        ) changes
+        GROUP BY batch_id
+        HAVING SUM(n) <> 0
+    ) delta
+    WHERE l.batch_id = delta.batch_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+LECTURE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION lecture_counters_lecture_expected() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.batch_id IS DISTINCT FROM OLD.batch_id THEN
+        SELECT COUNT(*) INTO NEW.expected_count
+        FROM {STUDENT}
+        WHERE batch_id = NEW.batch_id AND is_active;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _statement_trigger(kind, table, event, referencing):
+    name = f"lecture_counters_{kind}_{event.lower()}"
+    return f"""
+DROP TRIGGER IF EXISTS {name} ON {table};
+CREATE TRIGGER {name}
+    AFTER {event} ON {table}
+    REFERENCING {referencing}
+    FOR EACH STATEMENT EXECUTE FUNCTION {name}();
+"""
+
+
+def install_sql():
+    parts = []
+    for event, referencing, sources in EVENTS:
+        parts.append(_attendance_function(event, sources))
+        parts.append(_statement_trigger("attendance", ATTENDANCE, event, referencing))
+        parts.append(_student_function(event, sources))
+        parts.append(_statement_trigger("student", STUDENT, event, referencing))
+    parts.append(LECTURE_FUNCTION)
+    parts.append(f"""
+DROP TRIGGER IF EXISTS lecture_counters_lecture_expected ON {LECTURE};
+CREATE TRIGGER lecture_counters_lecture_expected
+    BEFORE INSERT OR UPDATE OF batch_id ON {LECTURE}
+    FOR EACH ROW EXECUTE FUNCTION lecture_counters_lecture_expected();
+""")
+    return "\n".join(parts)
+
+
+def triggers_installed():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM pg_trigger WHERE tgname LIKE 'lecture_counters_%' AND NOT tgisinternal"
+        )
+        return cursor.fetchone()[0] == len(EVENTS) * 2 + 1
+
+
+def install_triggers():
+    """Create or replace the counter functions and triggers (idempotent)."""
+    with connection.cursor() as cursor:
+        cursor.execute(install_sql())
+
+
+ACTUAL_COUNTS_SQL = f"""
+    SELECT l.id,
+           (SELECT COUNT(*) FROM {STUDENT} s WHERE s.batch_id = l.batch_id AND s.is_active) AS expected,
+           COUNT(r.id) FILTER (WHERE r.status = 'P') AS present,
+           COUNT(r.id) FILTER (WHERE r.status = 'A') AS absent
+    FROM {LECTURE} l
+    LEFT JOIN {ATTENDANCE} r ON r.lecture_id = l.id
+    GROUP BY l.id
+"""
+
+
+def find_counter_drift(limit=20):
+    """
+    Compare stored lecture counters with raw rows without writing.
+    Returns (drifted_count, sample) where sample rows are
+    (lecture_id, stored (e, p, a), actual (e, p, a)).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT l.id, l.expected_count, l.present_count, l.absent_count,
+                   actual.expected, actual.present, actual.absent
+            FROM {LECTURE} l
+            JOIN ({ACTUAL_COUNTS_SQL}) actual ON actual.id = l.id
+            WHERE l.expected_count <> actual.expected
+               OR l.present_count <> actual.present
+               OR l.absent_count <> actual.absent
+            ORDER BY l.id
+        """)
+        rows = cursor.fetchall()
+    sample = [(r[0], r[1:4], r[4:7]) for r in rows[:limit]]
+    return len(rows), sample
+
+
+def repair_counters():
+    """Recompute every lecture's counters from raw rows. Returns rows fixed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {LECTURE} l
+            SET expected_count = actual.expected,
+                present_count = actual.present,
+                absent_count = actual.absent
+            FROM ({ACTUAL_COUNTS_SQL}) actual
+            WHERE actual.id = l.id
+              AND (l.expected_count <> actual.expected
+                   OR l.present_count <> actual.present
+                   OR l.absent_count <> actual.absent)
+        """)
+        return cursor.rowcount
+
+
+def install_on_migrate(sender, using="default", **kwargs):
+    """post_migrate hook: install triggers, seeding counters on first install."""
+    if connection.vendor != "postgresql":
+        return
+    first_install = not triggers_installed()
+    install_triggers()
+    if first_install:
+        repair_counters()
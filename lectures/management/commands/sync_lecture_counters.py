@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lectures.counters import find_counter_drift, install_triggers, repair_counters, triggers_installed
+
+
+class Command(BaseCommand):
+    help = "Verify trigger-maintained lecture counters against raw attendance and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite drifted counters from raw rows",
+        )
+        parser.add_argument(
+            "--install",
+            action="store_true",
+            help="(Re)install the counter triggers before verifying",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Lecture counters require PostgreSQL triggers")
+
+        if options["install"]:
+            install_triggers()
+            self.stdout.write(self.style.SUCCESS("✓ Counter triggers installed"))
+        elif not triggers_installed():
+            self.stdout.write(
+                self.style.WARNING("Counter triggers are missing. Run with --install.")
+            )
+
+        drifted, sample = find_counter_drift()
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All lecture counters match raw attendance"))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{drifted} lecture(s) drifted"))
+        for lecture_id, stored, actual in sample:
+            self.stdout.write(
+                f"  lecture {lecture_id}: expected/present/absent "
+                f"{'/'.join(map(str, stored))} → {'/'.join(map(str, actual))}"
+            )
+
+        if options["repair"]:
+            with transaction.atomic():
+                fixed = repair_counters()
+            self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} lecture(s)"))
+        else:
+            self.stdout.write("Run with --repair to fix.")
@@ -28,6 +28,13 @@ class Lecture(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained by database triggers (lectures/counters.py), never by Django
+    expected_count = models.PositiveIntegerField(default=0, editable=False)
+    present_count = models.PositiveIntegerField(default=0, editable=False)
+    absent_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("expected_count", "present_count", "absent_count")
+
     class Meta:
         unique_together = ("batch", "date", "lecture_type")
         indexes = [
@@ -35,5 +42,18 @@ class Lecture(models.Model):
             models.Index(fields=['batch', 'date', 'lecture_type']),
         ]
 
+    @property
+    def unmarked_count(self):
+        return max(self.expected_count - self.present_count - self.absent_count, 0)
+
+    def save(self, *args, **kwargs):
+        # Never write back stale in-memory counters over trigger-maintained values
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.title} ({self.date} {self.batch.name} {self.lecture_type})"
\ No newline at end of file
+        return f"{self.title} ({self.date} {self.batch.name} {self.lecture_type})"
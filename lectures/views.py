@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from attendance.models import AttendanceRecord
+from core.cache import attendance_changed
 from auditlog.models import AuditLog
 from django.utils import timezone
 from auditlog.utils import create_audit_log
@@ -15,13 +16,14 @@ def manage_lectures(request):
 
     if request.method == "POST":
         try:
-            Lecture.objects.create(
+            lecture = Lecture.objects.create(
                 date=request.POST["date"],
                 batch_id=request.POST["batch"],
                 title=request.POST.get("title", "").strip(),
                 lecture_type=request.POST["lecture_type"],
                 created_by=request.user,
             )
+            attendance_changed()
             messages.success(request, "Lecture created successfully.")
             return redirect("manage_lectures")
         except Exception as e:
@@ -53,6 +55,7 @@ def create_lecture(request):
             lecture_type=request.POST["lecture_type"],
             created_by=request.user,
         )
+        attendance_changed()
         messages.success(request, "Lecture created successfully.")
 
         create_audit_log(
@@ -84,6 +87,7 @@ def edit_lecture(request, lecture_id):
         lecture.title = request.POST.get("title", "")
 
         lecture.save()
+        attendance_changed()
         messages.success(request, "Lecture updated successfully.")
         create_audit_log(
         request=request,
@@ -112,6 +116,7 @@ def delete_lecture(request, lecture_id):
 
     AttendanceRecord.objects.filter(lecture=lecture).delete()
     lecture.delete()
+    attendance_changed()
     create_audit_log(
     request=request,
     action_type="DELETE",
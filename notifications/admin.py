@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import NotificationLog, NotificationOutbox
 
-# Register your models here.
+
+@admin.register(NotificationLog)
+class NotificationLogAdmin(admin.ModelAdmin):
+    list_display = ("lecture", "date", "enqueued_count", "sent_by", "sent_at")
+    list_filter = ("date",)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ("student", "date", "channel", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "channel", "date")
+    search_fields = ("student__roll_number", "recipient")
+    raw_id_fields = ("student",)
+    readonly_fields = ("last_error", "claimed_at", "created_at", "sent_at")
@@ -0,0 +1,130 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from notifications.utils import send_messages_pooled
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: accepts every message, optionally with a delay per command."""
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost benchmark SMTP")
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line in (b".\r\n", b".\n"):
+                    in_data = False
+                    self.server.accepted += 1
+                    self.reply("250 OK queued")
+                continue
+
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.latency = latency
+        self.accepted = 0
+        self.connections = 0
+
+    def verify_request(self, request, client_address):
+        self.connections += 1
+        return True
+
+
+class Command(BaseCommand):
+    help = "Compare per-message vs pooled SMTP delivery against a local SMTP stand-in"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=400)
+        parser.add_argument("--chunk-size", type=int, default=50)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=5,
+            help="Simulated server round-trip per SMTP command (default: 5ms)",
+        )
+
+    def handle(self, *args, **options):
+        server = _SMTPServer(options["latency_ms"] / 1000)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address
+
+        def connection_factory(**kwargs):
+            return get_connection(
+                "django.core.mail.backends.smtp.EmailBackend",
+                host=host,
+                port=port,
+                username="",
+                password="",
+                use_tls=False,
+                use_ssl=False,
+                **kwargs,
+            )
+
+        messages = [
+            (
+                i,
+                EmailMessage(
+                    f"Attendance Alert {i}",
+                    "Benchmark message",
+                    "bench@localhost",
+                    [f"parent{i}@localhost"],
+                ),
+            )
+            for i in range(options["messages"])
+        ]
+
+        try:
+            self.stdout.write(self.style.SUCCESS("NOTIFICATION EMAIL BENCHMARK"))
+            self.stdout.write(f"Messages: {len(messages)}, simulated latency: {options['latency_ms']}ms/command")
+
+            # One connection per message, as send_mail() does
+            self._run(server, "per-message", lambda: send_messages_pooled(messages, 1, connection_factory))
+            self._run(
+                server,
+                f"pooled (chunk {options['chunk_size']})",
+                lambda: send_messages_pooled(messages, options["chunk_size"], connection_factory),
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, server, label, send):
+        server.accepted = server.connections = 0
+        started = time.monotonic()
+        outcomes, chunk_stats = send()
+        elapsed = time.monotonic() - started
+        failed = sum(1 for error in outcomes.values() if error)
+        self.stdout.write(
+            f"  {label:<22} {elapsed:7.2f}s  {len(outcomes) / max(elapsed, 1e-6):8.1f} msg/s  "
+            f"{server.connections} connection(s)  {server.accepted} accepted  {failed} failed"
+        )
@@ -1,13 +1,59 @@
 from django.db import models
 from django.conf import settings
 from lectures.models import Lecture
+from students.models import Student
 
 
 class NotificationLog(models.Model):
+    """Records that absentee notifications were requested for a lecture."""
+
     lecture = models.ForeignKey(Lecture, on_delete=models.CASCADE)
     date = models.DateField()
     sent_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     sent_at = models.DateTimeField(auto_now_add=True)
+    enqueued_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("lecture", "date")
+
+
+class NotificationOutbox(models.Model):
+    """
+    One pending or delivered notification per (student, date, channel).
+    Rows are claimed by outbox workers with SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    CHANNEL_CHOICES = [("EMAIL", "Email")]
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("SENDING", "Sending"),
+        ("RETRY", "Retry"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+        ("SKIPPED", "Skipped"),
+    ]
+    PENDING_STATUSES = ("QUEUED", "SENDING", "RETRY")
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    date = models.DateField()
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default="EMAIL")
+    recipient = models.CharField(max_length=254, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="QUEUED")
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("student", "date", "channel")
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["date", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.date} {self.channel}: {self.status}"
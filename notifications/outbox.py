@@ -0,0 +1,231 @@
+# notifications/outbox.py
+"""
+Notification outbox: enqueue absentee notifications in one set-based
+insert, then let any number of workers claim and deliver them.
+
+Workers claim due rows with SELECT ... FOR UPDATE SKIP LOCKED, so
+concurrent workers never pick the same row. Failed sends are retried with
+exponential backoff up to NOTIFICATION_MAX_ATTEMPTS, and a shared
+per-minute budget in the cache keeps all workers together under
+NOTIFICATION_RATE_PER_MINUTE.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from students.models import Student
+from .models import NotificationOutbox
+from .utils import absent_email, send_messages_pooled
+
+
+RATE_KEY = "notifications:rate:{minute}"
+
+
+def enqueue_absent_notifications(lecture_ids, target_date):
+    """
+    Queue one EMAIL row per student absent from any of `lecture_ids`.
+    Students already queued or notified for the date are left alone.
+    Returns the number of rows inserted.
+    """
+    outbox = NotificationOutbox._meta.db_table
+    sql = f"""
+        INSERT INTO {outbox}
+            (student_id, date, channel, recipient, status, attempts,
+             next_attempt_at, last_error, created_at)
+        SELECT DISTINCT ON (s.id)
+               s.id, %s, 'EMAIL', s.parent_email,
+               CASE WHEN s.parent_email = '' THEN 'SKIPPED' ELSE 'QUEUED' END,
+               0, now(), '', now()
+        FROM {AttendanceRecord._meta.db_table} r
+        JOIN {Student._meta.db_table} s ON s.id = r.student_id
+        WHERE r.lecture_id = ANY(%s) AND r.status = 'A'
+        ORDER BY s.id
+        ON CONFLICT (student_id, date, channel) DO NOTHING
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [target_date, list(lecture_ids)])
+        return cursor.rowcount
+
+
+def outbox_counts(target_date):
+    """Queued / sent / failed / skipped counts for a date in one aggregate query."""
+    return NotificationOutbox.objects.filter(date=target_date).aggregate(
+        queued=Count("id", filter=Q(status__in=NotificationOutbox.PENDING_STATUSES)),
+        sent=Count("id", filter=Q(status="SENT")),
+        failed=Count("id", filter=Q(status="FAILED")),
+        skipped=Count("id", filter=Q(status="SKIPPED")),
+    )
+
+
+def retry_failed(target_date):
+    """Put FAILED rows for a date back in the queue. Returns rows requeued."""
+    return NotificationOutbox.objects.filter(date=target_date, status="FAILED").update(
+        status="QUEUED",
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        last_error="",
+    )
+
+
+def _rate_key():
+    return RATE_KEY.format(minute=int(time.time() // 60))
+
+
+def reserve_rate(wanted):
+    """
+    Reserve up to `wanted` sends from this minute's shared budget and
+    return how many were granted.
+    """
+    limit = settings.NOTIFICATION_RATE_PER_MINUTE
+    if not limit:
+        return wanted
+
+    key = _rate_key()
+    cache.add(key, 0, timeout=120)
+    try:
+        used = cache.incr(key, wanted)
+    except ValueError:
+        return 0
+    over = max(used - limit, 0)
+    if over:
+        cache.decr(key, min(over, wanted))
+    return max(wanted - over, 0)
+
+
+def release_rate(unused):
+    """Hand back reserved sends that were not used."""
+    if not settings.NOTIFICATION_RATE_PER_MINUTE or not unused:
+        return
+    try:
+        cache.decr(_rate_key(), unused)
+    except ValueError:
+        pass
+
+
+def claim_batch(size):
+    """
+    Claim up to `size` due rows for this worker. Rows stuck in SENDING past
+    the lease (a crashed worker) are claimable again.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.NOTIFICATION_CLAIM_LEASE_SECONDS)
+
+    with transaction.atomic():
+        rows = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status__in=["QUEUED", "RETRY"], next_attempt_at__lte=now)
+                | Q(status="SENDING", claimed_at__lt=lease_expired)
+            )
+            .order_by("next_attempt_at", "id")[:size]
+        )
+        if rows:
+            NotificationOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                status="SENDING",
+                claimed_at=now,
+            )
+    return rows
+
+
+def _absent_sessions(rows):
+    """{(student_id, date): [lecture, ...]} for the claimed rows in one query."""
+    sessions = {}
+    records = (
+        AttendanceRecord.objects
+        .filter(
+            student_id__in={row.student_id for row in rows},
+            lecture__date__in={row.date for row in rows},
+            status="A",
+        )
+        .select_related("lecture__batch")
+        .order_by("lecture__lecture_type")
+    )
+    for record in records:
+        sessions.setdefault((record.student_id, record.lecture.date), []).append(record.lecture)
+    return sessions
+
+
+def _backoff(attempts):
+    base = settings.NOTIFICATION_RETRY_BASE_SECONDS
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def deliver(rows):
+    """Send claimed rows over pooled SMTP connections and record each outcome."""
+    students = Student.objects.in_bulk({row.student_id for row in rows})
+    sessions = _absent_sessions(rows)
+
+    messages = []
+    for row in rows:
+        lectures = sessions.get((row.student_id, row.date))
+        if lectures:
+            messages.append((row.id, absent_email(students[row.student_id], lectures, row.date)))
+
+    outcomes, chunk_stats = send_messages_pooled(messages)
+
+    now = timezone.now()
+    max_attempts = settings.NOTIFICATION_MAX_ATTEMPTS
+    for row in rows:
+        row.attempts += 1
+        row.claimed_at = None
+        if row.id not in outcomes:
+            # Absence was corrected since enqueueing: nothing to say
+            row.status = "SKIPPED"
+            row.last_error = "No absent session"
+        elif not outcomes[row.id]:
+            row.status = "SENT"
+            row.sent_at = now
+            row.last_error = ""
+        else:
+            row.last_error = outcomes[row.id]
+            if row.attempts >= max_attempts:
+                row.status = "FAILED"
+            else:
+                row.status = "RETRY"
+                row.next_attempt_at = now + _backoff(row.attempts)
+
+    NotificationOutbox.objects.bulk_update(
+        rows,
+        ["status", "attempts", "claimed_at", "next_attempt_at", "last_error", "sent_at"],
+    )
+    return chunk_stats
+
+
+def process_outbox(max_batches=None):
+    """
+    Claim and deliver batches until the queue is drained, the rate budget
+    for this minute is spent, or max_batches is reached. Returns stats.
+    """
+    batch_size = settings.NOTIFICATION_EMAIL_CHUNK_SIZE
+    stats = {"claimed": 0, "sent": 0, "failed": 0, "batches": 0, "rate_limited": False}
+    started = time.monotonic()
+
+    while max_batches is None or stats["batches"] < max_batches:
+        allowed = reserve_rate(batch_size)
+        if not allowed:
+            stats["rate_limited"] = True
+            break
+
+        rows = claim_batch(allowed)
+        release_rate(allowed - len(rows))
+        if not rows:
+            break
+
+        for chunk in deliver(rows):
+            stats["sent"] += chunk["sent"]
+            stats["failed"] += chunk["failed"]
+        stats["claimed"] += len(rows)
+        stats["batches"] += 1
+
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["messages_per_second"] = round(stats["sent"] / elapsed, 1) if elapsed else 0
+    return stats
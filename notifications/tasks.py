@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from notifications.outbox import process_outbox
+
+
+@shared_task
+def process_notification_outbox_task(max_batches=None):
+    """
+    Celery task to deliver due notification outbox rows. Several can run at
+    once; rows are claimed with SKIP LOCKED so no message is sent twice.
+    """
+    return process_outbox(max_batches=max_batches)
@@ -1,27 +1,84 @@
+import smtplib
+import time
+
 from django.conf import settings
-from django.core.mail import send_mail
-
-
-def send_absent_emails(absent_records, lecture, date):
-    subject = f"Attendance Alert – {lecture.batch.name} – {date}"
-    TEMP_MAIL = 'example@exmaple.com'
-    for record in absent_records:
-        student = record.student
-        if not student.parent_email:
-            continue
-
-        message = (
-            f"Dear Parent,\n\n"
-            f"Your ward {student.full_name} ({student.roll_number}) "
-            f"was marked ABSENT for the {lecture.get_lecture_type_display()} "
-            f"session on {date}.\n\n"
-            f"Training & Placement Cell"
-        )
-
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [TEMP_MAIL],
-            fail_silently=True,
-        )
+from django.core.mail import EmailMessage, get_connection
+
+
+def absent_email(student, lectures, date):
+    """One email per student per day, listing every session they missed."""
+    batch_name = lectures[0].batch.name
+    sessions = ", ".join(lecture.get_lecture_type_display() for lecture in lectures)
+    subject = f"Attendance Alert – {batch_name} – {date}"
+    message = (
+        f"Dear Parent,\n\n"
+        f"Your ward {student.full_name} ({student.roll_number}) "
+        f"was marked ABSENT for the following session(s) on {date}: {sessions}.\n\n"
+        f"Training & Placement Cell"
+    )
+    # NOTIFICATION_REDIRECT_EMAIL keeps test deployments from mailing parents
+    recipient = settings.NOTIFICATION_REDIRECT_EMAIL or student.parent_email
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])
+
+
+def _error_text(exc):
+    return str(exc) or exc.__class__.__name__
+
+
+def _send_one(connection, message):
+    try:
+        connection.send_messages([message])
+    except smtplib.SMTPServerDisconnected:
+        connection.close()
+        connection.open()
+        connection.send_messages([message])
+
+
+def send_messages_pooled(messages, chunk_size=None, connection_factory=get_connection):
+    """
+    Send (key, EmailMessage) pairs over one SMTP connection per chunk.
+
+    Messages are sent one at a time on the open connection so a rejected
+    recipient fails alone; a dropped connection is reopened and the message
+    retried once.
+    Returns (outcomes, chunk_stats) where outcomes maps key -> error string
+    ("" when sent) and chunk_stats is a list of {"sent", "failed", "seconds"}.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_EMAIL_CHUNK_SIZE
+    outcomes = {}
+    chunk_stats = []
+
+    for start in range(0, len(messages), chunk_size):
+        chunk = messages[start:start + chunk_size]
+        started = time.monotonic()
+        sent = failed = 0
+
+        connection = connection_factory(fail_silently=False)
+        try:
+            connection.open()
+            for key, message in chunk:
+                try:
+                    _send_one(connection, message)
+                except Exception as exc:
+                    outcomes[key] = _error_text(exc)
+                    failed += 1
+                else:
+                    outcomes[key] = ""
+                    sent += 1
+        except Exception as exc:
+            # Could not connect at all: every unsent message in the chunk fails
+            for key, _ in chunk:
+                if key not in outcomes:
+                    outcomes[key] = _error_text(exc)
+                    failed += 1
+        finally:
+            connection.close()
+
+        chunk_stats.append({
+            "sent": sent,
+            "failed": failed,
+            "seconds": round(time.monotonic() - started, 3),
+        })
+
+    return outcomes, chunk_stats
+
@@ -1,16 +1,24 @@
 from datetime import date
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.db import transaction
 from django.utils import timezone
 
 from lectures.models import Lecture
-from attendance.models import AttendanceRecord
 from notifications.models import NotificationLog
-from notifications.utils import send_absent_emails
+from notifications.outbox import enqueue_absent_notifications, outbox_counts, retry_failed
+from notifications.tasks import process_notification_outbox_task
 from auditlog.utils import create_audit_log
 
 
+def _start_outbox_workers():
+    for _ in range(settings.NOTIFICATION_OUTBOX_WORKERS):
+        process_notification_outbox_task.delay()
+
+
 @login_required
 def notifications_view(request):
     selected_date = request.GET.get("date")
@@ -19,40 +27,57 @@ def notifications_view(request):
     else:
         selected_date = timezone.localdate()
 
-    lectures = Lecture.objects.filter(date=selected_date)
+    lectures = Lecture.objects.filter(date=selected_date).select_related("batch")
 
-    sent_lecture_ids = set(
-        NotificationLog.objects.filter(date=selected_date)
-        .values_list("lecture_id", flat=True)
-    )
+    logs = {
+        log.lecture_id: log
+        for log in NotificationLog.objects.filter(date=selected_date)
+    }
 
-    if request.method == "POST":
-        lecture_ids = request.POST.getlist("lectures")
+    if request.method == "POST" and request.POST.get("action") == "retry_failed":
+        requeued = retry_failed(selected_date)
+        if requeued:
+            transaction.on_commit(_start_outbox_workers)
+            messages.success(request, f"{requeued} failed notification(s) queued again.")
+        return redirect(f"{reverse('notifications')}?date={selected_date}")
 
-        for lecture in lectures.filter(id__in=lecture_ids):
-            absent_records = AttendanceRecord.objects.filter(
-                lecture=lecture,
-                status="A",
-            ).select_related("student")
+    if request.method == "POST":
+        lecture_ids = list(
+            lectures.filter(id__in=request.POST.getlist("lectures"))
+            .exclude(id__in=logs.keys())
+            .values_list("id", flat=True)
+        )
 
-            send_absent_emails(absent_records, lecture, selected_date)
+        if lecture_ids:
+            with transaction.atomic():
+                enqueued = enqueue_absent_notifications(lecture_ids, selected_date)
+                NotificationLog.objects.bulk_create([
+                    NotificationLog(
+                        lecture_id=lecture_id,
+                        date=selected_date,
+                        sent_by=request.user,
+                        enqueued_count=enqueued,
+                    )
+                    for lecture_id in lecture_ids
+                ])
+                transaction.on_commit(_start_outbox_workers)
 
-            NotificationLog.objects.create(
-                lecture=lecture,
-                date=selected_date,
-                sent_by=request.user,
+            create_audit_log(
+                request=request,
+                action_type="SYSTEM",
+                description=(
+                    f"Absentee notifications queued for {len(lecture_ids)} lecture(s) "
+                    f"on {selected_date}: {enqueued} student(s)"
+                ),
             )
-        create_audit_log(
-    request=request,
-    action_type="SYSTEM",
-    description=f"Absentee notification sent for {date}",
-)
-
-        messages.success(request, "Notifications sent successfully.")
-        return redirect("notifications")
+            messages.success(request, f"{enqueued} notification(s) queued.")
+        else:
+            messages.error(request, "Notifications were already sent for the selected lectures.")
+        return redirect(f"{reverse('notifications')}?date={selected_date}")
 
     for lec in lectures:
-        lec.notification_sent = lec.id in sent_lecture_ids
+        lec.notification = logs.get(lec.id)
+        lec.notification_sent = lec.notification is not None
 
     return render(
         request,
@@ -60,6 +85,7 @@ def notifications_view(request):
         {
             "lectures": lectures,
             "selected_date": selected_date,
-            "already_sent": bool(sent_lecture_ids),
+            "already_sent": bool(logs),
+            "outbox": outbox_counts(selected_date),
         },
     )
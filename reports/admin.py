@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Register your models here.
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "report_type",
+        "status",
+        "progress_done",
+        "progress_total",
+        "file_size",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("report_type", "status")
+    readonly_fields = ("cache_key", "params", "file", "filename", "file_size", "error", "created_at", "finished_at")
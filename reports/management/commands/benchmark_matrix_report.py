@@ -0,0 +1,58 @@
+import random
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from reports.services import new_matrix_workbook, write_matrix_sheet
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = "Benchmark the streaming lecture attendance matrix engine on synthetic data (no DB access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--lectures", type=int, default=200, help="Sessions per student (MS + AS)")
+        parser.add_argument("--present-ratio", type=float, default=0.8)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        n_students = options["students"]
+        n_days = max(options["lectures"] // 2, 1)
+
+        dates = [date(2025, 12, 15) + timedelta(days=i) for i in range(n_days)]
+        lecture_map = {d: {"MS": i * 2, "AS": i * 2 + 1} for i, d in enumerate(dates)}
+        students = [
+            (sid, f"23CE{sid:04d}", f"Student {sid}", "Computer Engineering")
+            for sid in range(n_students)
+        ]
+        attendance_lookup = {
+            (sid, lid): "P" if rng.random() < options["present_ratio"] else "A"
+            for sid in range(n_students)
+            for lid in range(n_days * 2)
+        }
+
+        rss_before = _peak_rss_mb()
+        started = time.monotonic()
+
+        wb = new_matrix_workbook()
+        write_matrix_sheet(wb, "Benchmark", dates, lecture_map, students, attendance_lookup)
+        with tempfile.TemporaryFile() as tmp:
+            wb.save(tmp)
+            size_mb = tmp.tell() / (1024 * 1024)
+
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS("MATRIX REPORT BENCHMARK"))
+        self.stdout.write(f"Students × sessions: {n_students} × {n_days * 2}")
+        self.stdout.write(f"Elapsed:             {elapsed:.2f}s")
+        self.stdout.write(f"Peak RSS:            {_peak_rss_mb():.1f} MB (before: {rss_before:.1f} MB)")
+        self.stdout.write(f"Output size:         {size_mb:.2f} MB")
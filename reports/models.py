@@ -1,3 +1,46 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReportJob(models.Model):
+    """A report generated in the background and cached as a file under MEDIA_ROOT."""
+
+    TYPE_CHOICES = [("LECTURE_MATRIX", "Lecture Attendance Matrix")]
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    report_type = models.CharField(max_length=30, choices=TYPE_CHOICES)
+    params = models.JSONField(default=dict)
+    cache_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING", db_index=True)
+
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+
+    file = models.FileField(upload_to="reports/", blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["cache_key", "status"]),
+        ]
+
+    @property
+    def progress_percent(self):
+        if self.progress_total == 0:
+            return 0
+        return round((self.progress_done / self.progress_total) * 100)
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} [{self.status}] {self.created_at:%Y-%m-%d %H:%M}"
@@ -1,16 +1,28 @@
+import hashlib
+import json
+import tempfile
+import uuid
+from copy import copy
+from datetime import timedelta
 from io import BytesIO
 from urllib.parse import quote
 
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
 from django.http import HttpResponse
 from django.utils.text import slugify
 from collections import defaultdict
 
-from lectures.models import Lecture
+from core.cache import get_attendance_version
+from lectures.models import Batch, Lecture
 from students.models import Student
 from attendance.models import AttendanceRecord
+from .models import ReportJob
 
 from django.utils import timezone
 
@@ -115,161 +127,269 @@ def generate_student_attendance_excel(student):
     response["X-Content-Type-Options"] = "nosniff"
     return response
 
-def generate_lecture_attendance_matrix_excel(batches, start_date, end_date):
-    wb = Workbook()
-    wb.remove(wb.active)
-
-    for batch in batches:
-        ws = wb.create_sheet(title=batch.name[:31])
+MATRIX_FIXED_HEADERS = ["Roll No", "Name", "Branch", "Attendance %"]
+MATRIX_SESSIONS = (("MS", "Morning"), ("AS", "Afternoon"))
+MATRIX_WIDTHS = {1: 10, 2: 28, 3: 14, 4: 14}
+CENTER = Alignment(horizontal="center", vertical="center")
+
+
+def _matrix_named_styles():
+    """Shared styles so every cell references one registered xf record."""
+    return [
+        NamedStyle(name="matrix_header", font=Font(bold=True), alignment=CENTER, fill=HEADER_FILL, border=THIN_BORDER),
+        NamedStyle(name="matrix_session", alignment=CENTER, fill=HEADER_FILL, border=THIN_BORDER),
+        NamedStyle(name="matrix_center", alignment=Alignment(horizontal="center"), border=THIN_BORDER),
+        NamedStyle(name="matrix_left", alignment=Alignment(horizontal="left"), border=THIN_BORDER),
+        NamedStyle(name="matrix_present", alignment=Alignment(horizontal="center"), fill=PRESENT_FILL, border=THIN_BORDER),
+        NamedStyle(name="matrix_absent", alignment=Alignment(horizontal="center"), fill=ABSENT_FILL, border=THIN_BORDER),
+        NamedStyle(
+            name="matrix_percent",
+            alignment=Alignment(horizontal="center"),
+            border=THIN_BORDER,
+            number_format="0.00%",
+        ),
+    ]
 
-        lectures = (
-            Lecture.objects
-            .filter(batch=batch, date__range=(start_date, end_date))
-            .order_by("date", "lecture_type")
-        )
 
-        if not lectures.exists():
-            continue
+def new_matrix_workbook():
+    wb = Workbook(write_only=True)
+    for style in _matrix_named_styles():
+        wb.add_named_style(style)
+    return wb
+
+
+def write_matrix_sheet(wb, title, dates, lecture_map, students, attendance_lookup):
+    """
+    Append one batch sheet to a write-only workbook.
+
+    dates: sorted lecture dates; lecture_map: {date: {"MS": lecture_id, ...}};
+    students: iterable of (student_id, roll_number, full_name, branch_name);
+    attendance_lookup: {(student_id, lecture_id): status}.
+    Rows are streamed to disk as they are appended.
+    """
+    ws = wb.create_sheet(title=title[:31])
+
+    # Resolve each named style once; cells then share a copied StyleArray
+    style_arrays = {}
+    for style in wb.named_styles:
+        template = WriteOnlyCell(ws)
+        template.style = style
+        style_arrays[style] = template._style
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell._style = copy(style_arrays[style])
+        return cell
+
+    fixed = len(MATRIX_FIXED_HEADERS)
+    max_col = fixed + 2 * len(dates)
+
+    # Sheet-top settings must be in place before the first row is written
+    for i in range(1, max_col + 1):
+        ws.column_dimensions[get_column_letter(i)].width = MATRIX_WIDTHS.get(i, 12)
+    ws.freeze_panes = "E3"
+
+    # ----- HEADER ROWS -----
+    top = [styled(h, "matrix_header") for h in MATRIX_FIXED_HEADERS]
+    bottom = [None] * fixed
+    for d in dates:
+        top.append(styled(d.strftime("%d-%b-%Y"), "matrix_header"))
+        top.append(None)
+        bottom.extend(styled(label, "matrix_session") for _, label in MATRIX_SESSIONS)
+    ws.append(top)
+    ws.append(bottom)
+
+    for col in range(1, fixed + 1):
+        letter = get_column_letter(col)
+        ws.merged_cells.add(f"{letter}1:{letter}2")
+    for col in range(fixed + 1, max_col + 1, 2):
+        ws.merged_cells.add(f"{get_column_letter(col)}1:{get_column_letter(col + 1)}1")
+
+    row_count = 2
+    for student_id, roll_number, full_name, branch_name in students:
+        present_count = 0
+        total_sessions = 0
+        session_cells = []
 
-        lecture_map = defaultdict(dict)
-        for lec in lectures:
-            lecture_map[lec.date][lec.lecture_type] = lec
-
-        dates = sorted(lecture_map.keys())
-
-        students = (
-            Student.objects
-            .filter(batch=batch, is_active=True)
-            .order_by("roll_number")
-        )
-
-        fixed_headers = ["Roll No", "Name", "Branch", "Attendance %"]
-
-        # ----- HEADER ROWS -----
-        ws.append(fixed_headers)  # Row 1
-        ws.append([None] * len(fixed_headers))  # Row 2 placeholder for merged headers
-
-        # Merge the first 4 header cells over two rows and style them
-        for col in range(1, len(fixed_headers) + 1):
-            ws.merge_cells(start_row=1, start_column=col, end_row=2, end_column=col)
-            c = ws.cell(row=1, column=col)
-            c.value = fixed_headers[col - 1]
-            c.font = Font(bold=True)
-            c.alignment = Alignment(horizontal="center", vertical="center")
-            c.fill = HEADER_FILL
-            c.border = THIN_BORDER
-
-        col = len(fixed_headers) + 1
         for d in dates:
-            ws.merge_cells(
-                start_row=1,
-                start_column=col,
-                end_row=1,
-                end_column=col + 1,
-            )
-            ws.cell(row=1, column=col).value = d.strftime("%d-%b-%Y")
-            ws.cell(row=2, column=col).value = "Morning"
-            ws.cell(row=2, column=col + 1).value = "Afternoon"
-            col += 2
-
-        # Style date headers and session headers
-        for c in range(len(fixed_headers) + 1, ws.max_column + 1):
-            top = ws.cell(row=1, column=c)
-            bottom = ws.cell(row=2, column=c)
-            if top.value:  # date cell
-                top.font = Font(bold=True)
-                top.alignment = Alignment(horizontal="center", vertical="center")
-                top.fill = HEADER_FILL
-                top.border = THIN_BORDER
-            bottom.alignment = Alignment(horizontal="center", vertical="center")
-            bottom.fill = HEADER_FILL
-            bottom.border = THIN_BORDER
-
-        ws.freeze_panes = "E3"
-
-        attendance_lookup = {
-            (r.student_id, r.lecture_id): r.status
-            for r in AttendanceRecord.objects.filter(
-                lecture__batch=batch,
-                lecture__date__range=(start_date, end_date)
-            )
-        }
-
-        row = 3
-        for student in students:
-            ws.append([student.roll_number, student.full_name, student.branch.name, ""])  # Row added
-            # Style fixed columns for the row
-            for col in range(1, 5):
-                cell = ws.cell(row=row, column=col)
-                cell.border = THIN_BORDER
-                if col in (1, 4):
-                    cell.alignment = Alignment(horizontal="center")
+            sessions = lecture_map[d]
+            for session, _ in MATRIX_SESSIONS:
+                lecture_id = sessions.get(session)
+                if lecture_id is None:
+                    session_cells.append(styled("-", "matrix_center"))
+                    continue
+                status = attendance_lookup.get((student_id, lecture_id), "A")
+                total_sessions += 1
+                if status == "P":
+                    present_count += 1
+                    session_cells.append(styled(status, "matrix_present"))
                 else:
-                    cell.alignment = Alignment(horizontal="left")
-
-            present_count = 0
-            total_sessions = 0
-
-            col = len(fixed_headers) + 1
-            for d in dates:
-                for session in ["MS", "AS"]:
-                    lec = lecture_map[d].get(session)
-                    cell = ws.cell(row=row, column=col)
-
-                    if lec:
-                        status = attendance_lookup.get(
-                            (student.id, lec.id), "A"
-                        )
-                        cell.value = status
-                        cell.fill = PRESENT_FILL if status == "P" else ABSENT_FILL
-                        cell.alignment = Alignment(horizontal="center")
-                        cell.border = THIN_BORDER
-
-                        total_sessions += 1
-                        if status == "P":
-                            present_count += 1
-                    else:
-                        cell.value = "-"
-                        cell.alignment = Alignment(horizontal="center")
-                        cell.border = THIN_BORDER
-
-                    col += 1
-
-            # Use a true percentage value and number format
-            percent_cell = ws.cell(row=row, column=4)
-            if total_sessions > 0:
-                percent_cell.value = present_count / total_sessions
-            else:
-                percent_cell.value = None
-            percent_cell.number_format = "0.00%"
-            percent_cell.alignment = Alignment(horizontal="center")
-            percent_cell.border = THIN_BORDER
-
-            row += 1
-
-        # Column widths: fixed columns specific, others moderate
-        widths = {1: 10, 2: 28, 3: 14, 4: 14}
-        for i in range(1, ws.max_column + 1):
-            ws.column_dimensions[get_column_letter(i)].width = widths.get(i, 12)
-
-        # Autofilter across the sheet
-        ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
-
-    # Prepare response via BytesIO and safe filename
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+                    session_cells.append(styled(status, "matrix_absent"))
+
+        percent = present_count / total_sessions if total_sessions > 0 else None
+        ws.append([
+            styled(roll_number, "matrix_center"),
+            styled(full_name, "matrix_left"),
+            styled(branch_name, "matrix_left"),
+            styled(percent, "matrix_percent"),
+            *session_cells,
+        ])
+        row_count += 1
 
+    # Autofilter across the sheet
+    ws.auto_filter.ref = f"A1:{get_column_letter(max_col)}{row_count}"
+    return ws
+
+
+def matrix_report_filename(batches, start_date, end_date):
     safe_batch = slugify("_".join(batch.name for batch in batches)) or "batches"
     safe_range = slugify(f"{start_date}_to_{end_date}") or "range"
-    filename = f"{safe_range}_{safe_batch}_attendance_report.xlsx"
+    return f"{safe_range}_{safe_batch}_attendance_report.xlsx"
 
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+def build_lecture_attendance_matrix(batches, start_date, end_date, fileobj, progress=None):
+    """
+    Write the lecture attendance matrix for `batches` into `fileobj`.
+    `progress(done, total)` is called after each batch sheet.
+    """
+    wb = new_matrix_workbook()
+    batches = list(batches)
+
+    for done, batch in enumerate(batches, start=1):
+        lecture_map = defaultdict(dict)
+        for lecture_id, lecture_date, lecture_type in (
+            Lecture.objects
+            .filter(batch=batch, date__range=(start_date, end_date))
+            .values_list("id", "date", "lecture_type")
+        ):
+            lecture_map[lecture_date][lecture_type] = lecture_id
+
+        if not lecture_map:
+            wb.create_sheet(title=batch.name[:31])
+        else:
+            students = (
+                Student.objects
+                .filter(batch=batch, is_active=True)
+                .order_by("roll_number")
+                .values_list("id", "roll_number", "full_name", "branch__name")
+            )
+
+            attendance_lookup = {
+                (student_id, lecture_id): status
+                for student_id, lecture_id, status in AttendanceRecord.objects.filter(
+                    lecture__batch=batch,
+                    lecture__date__range=(start_date, end_date),
+                ).values_list("student_id", "lecture_id", "status").iterator(chunk_size=5000)
+            }
+
+            write_matrix_sheet(
+                wb,
+                batch.name,
+                sorted(lecture_map),
+                lecture_map,
+                students.iterator(chunk_size=2000),
+                attendance_lookup,
+            )
+
+        if progress:
+            progress(done, len(batches))
+
+    wb.save(fileobj)
+
+
+# ----- BACKGROUND REPORT JOBS -----
+
+def report_cache_key(report_type, batch_ids, start_date, end_date):
+    """Artifacts are reusable until attendance data changes."""
+    version = get_attendance_version()
+    if version is None:
+        # Without the cache the data version is unknown: never reuse an artifact
+        version = f"unversioned-{uuid.uuid4()}"
+    raw = json.dumps(
+        [report_type, sorted(int(b) for b in batch_ids), str(start_date), str(end_date), version]
     )
-    response["Content-Disposition"] = (
-        f"attachment; filename={filename}; filename*=UTF-8''{quote(filename)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def request_matrix_report(batch_ids, start_date, end_date, user):
+    """
+    Return (job, created). An existing finished artifact or an in-flight job
+    for the same report and data version is reused instead of queueing.
+    """
+    from .tasks import generate_report_task
+
+    key = report_cache_key("LECTURE_MATRIX", batch_ids, start_date, end_date)
+    existing = (
+        ReportJob.objects
+        .filter(cache_key=key, status__in=["PENDING", "RUNNING", "DONE"])
+        .order_by("-created_at")
+        .first()
     )
-    response["X-Content-Type-Options"] = "nosniff"
-    return response
+    if existing and (existing.status != "DONE" or (existing.file and existing.file.storage.exists(existing.file.name))):
+        return existing, False
+
+    job = ReportJob.objects.create(
+        report_type="LECTURE_MATRIX",
+        params={
+            "batch_ids": sorted(int(b) for b in batch_ids),
+            "start_date": str(start_date),
+            "end_date": str(end_date),
+        },
+        cache_key=key,
+        progress_total=len(batch_ids),
+        requested_by=user,
+    )
+    transaction.on_commit(lambda: generate_report_task.delay(job.id))
+    return job, True
+
+
+def run_report_job(job):
+    """Generate the artifact for `job`, recording progress as batches finish."""
+    batches = Batch.objects.filter(id__in=job.params["batch_ids"]).order_by("name")
+    start_date = job.params["start_date"]
+    end_date = job.params["end_date"]
+
+    ReportJob.objects.filter(id=job.id).update(status="RUNNING", progress_total=batches.count())
+
+    def progress(done, total):
+        ReportJob.objects.filter(id=job.id).update(progress_done=done, progress_total=total)
+
+    with tempfile.TemporaryFile() as tmp:
+        build_lecture_attendance_matrix(batches, start_date, end_date, tmp, progress=progress)
+        tmp.seek(0)
+        job.file.save(f"{job.cache_key}.xlsx", File(tmp), save=False)
+
+    job.filename = matrix_report_filename(batches, start_date, end_date)
+    job.file_size = job.file.size
+    job.status = "DONE"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "filename", "file_size", "status", "finished_at"])
+
+
+def evict_report_artifacts(max_age_days=None, max_total_mb=None):
+    """
+    Delete artifacts older than max_age_days, then the oldest remaining ones
+    until the total size fits in max_total_mb. Returns the number evicted.
+    """
+    if max_age_days is None:
+        max_age_days = settings.REPORT_ARTIFACT_MAX_AGE_DAYS
+    if max_total_mb is None:
+        max_total_mb = settings.REPORT_ARTIFACT_MAX_TOTAL_MB
+
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    budget = max_total_mb * 1024 * 1024
+    evicted = 0
+    total = 0
+
+    for job in ReportJob.objects.filter(status="DONE").exclude(file="").order_by("-finished_at"):
+        total += job.file_size
+        if job.finished_at and job.finished_at >= cutoff and total <= budget:
+            continue
+        job.file.delete(save=False)
+        job.file_size = 0
+        job.save(update_fields=["file", "file_size"])
+        evicted += 1
+
+    # Failed jobs keep no artifact; drop their rows once they age out
+    ReportJob.objects.filter(status="FAILED", created_at__lt=cutoff).delete()
+    return evicted
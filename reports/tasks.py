@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.utils import timezone
+
+from reports.models import ReportJob
+from reports.services import evict_report_artifacts, run_report_job
+
+
+@shared_task(bind=True)
+def generate_report_task(self, job_id):
+    """
+    Celery task to generate a queued report into MEDIA_ROOT.
+    """
+    job = ReportJob.objects.get(id=job_id)
+
+    try:
+        run_report_job(job)
+    except Exception as exc:
+        ReportJob.objects.filter(id=job_id).update(
+            status="FAILED",
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        raise
+
+    evict_report_artifacts()
+
+
+@shared_task
+def evict_report_artifacts_task():
+    """
+    Celery task to drop report artifacts past their age or size budget.
+    """
+    return evict_report_artifacts()
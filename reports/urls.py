@@ -17,4 +17,7 @@ urlpatterns = [
         views.lecture_attendance_report,
         name="lecture_attendance_report",
     ),
+    path("jobs/<int:job_id>/", views.report_job_status, name="report_job_status"),
+    path("jobs/<int:job_id>/progress/", views.report_job_progress, name="report_job_progress"),
+    path("jobs/<int:job_id>/download/", views.report_job_download, name="report_job_download"),
 ]
\ No newline at end of file
@@ -2,7 +2,10 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
 from students.models import Student
 from .services import generate_student_attendance_excel
-from .services import generate_lecture_attendance_matrix_excel
+from .services import request_matrix_report
+from .models import ReportJob
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
 from django.shortcuts import render, redirect
 from lectures.models import Batch
 from django.http import HttpRequest
@@ -39,16 +42,64 @@ def lecture_attendance_report(request: HttpRequest):
         start_date = request.POST.get("start_date")
         end_date = request.POST.get("end_date")
 
-        batches = Batch.objects.filter(id__in=batch_ids)
+        batch_ids = list(Batch.objects.filter(id__in=batch_ids).values_list("id", flat=True))
+        if not batch_ids or not start_date or not end_date:
+            messages.error(request, "Select at least one batch and a date range.")
+            return redirect("lecture_report_page")
 
-        return generate_lecture_attendance_matrix_excel(
-            batches=batches,
-            start_date=start_date,
-            end_date=end_date,
-        )
+        job, created = request_matrix_report(batch_ids, start_date, end_date, request.user)
+        if job.status == "DONE":
+            messages.success(request, "Report is ready (served from cache).")
+
+        return redirect("report_job_status", job_id=job.id)
 
     return render(request, "reports/lecture_report_form.html")
 
+
+@login_required
+def report_job_status(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id)
+    return render(request, "reports/report_job.html", {"job": job})
+
+
+@login_required
+def report_job_progress(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id)
+    return JsonResponse({
+        "status": job.status,
+        "progress_done": job.progress_done,
+        "progress_total": job.progress_total,
+        "progress_percent": job.progress_percent,
+        "error": job.error,
+        "download_url": reverse("report_job_download", args=[job.id]) if job.status == "DONE" else None,
+    })
+
+
+@login_required
+def report_job_download(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, status="DONE")
+    if not job.file:
+        messages.error(request, "This report has expired. Please generate it again.")
+        return redirect("lecture_report_page")
+
+    try:
+        artifact = job.file.open("rb")
+    except FileNotFoundError:
+        # Removed behind the row's back: expire it the way eviction does
+        job.file = ""
+        job.file_size = 0
+        job.save(update_fields=["file", "file_size"])
+        messages.error(request, "This report has expired. Please generate it again.")
+        return redirect("lecture_report_page")
+
+    return FileResponse(
+        artifact,
+        as_attachment=True,
+        filename=job.filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
 @login_required
 def reports_index(request):
     return render(request, "reports/reports.html")
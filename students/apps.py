@@ -1,5 +1,20 @@
 from django.apps import AppConfig
 
 
+def _student_changed(**kwargs):
+    from core.cache import attendance_changed
+    attendance_changed()
+
+
 class StudentsConfig(AppConfig):
     name = 'students'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import Student
+
+        # Tiles count active students per batch; is_active and batch edits
+        # through the admin or ORM must invalidate them like attendance writes
+        post_save.connect(_student_changed, sender=Student, weak=False)
+        post_delete.connect(_student_changed, sender=Student, weak=False)
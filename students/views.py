@@ -5,6 +5,8 @@ from django.shortcuts import get_object_or_404, render, redirect
 from students.models import Student
 from lectures.models import Lecture
 from attendance.models import AttendanceRecord
+from attendance.services import get_attendance_summary
+from core.cache import attendance_changed
 from auditlog.utils import create_audit_log
 
 
@@ -47,6 +49,8 @@ def student_profile(request, student_id):
             )
             updated_count += 1
 
+        attendance_changed()
+
         create_audit_log(
             request=request,
             action_type="ATTENDANCE",
@@ -60,35 +64,27 @@ def student_profile(request, student_id):
         messages.success(request, f"Updated {updated_count} lecture(s) to {status}.")
         return redirect("student_profile", student_id=student.id)
 
+    # Both counts cover the student's current batch; the total is live so
+    # it matches the lecture list below on every day
+    summary = get_attendance_summary(student)
     total_lectures = lectures_qs.count()
+    present_count = summary.present_count
 
     attendance_qs = AttendanceRecord.objects.filter(
         student=student,
         lecture__in=lectures_qs,
     )
 
-    present_count = attendance_qs.filter(status="P").count()
-
-    attendance_percent = (
-        round((present_count / total_lectures) * 100, 2)
-        if total_lectures > 0 else 0
-    )
+    attendance_percent = summary.attendance_percent(total_lectures)
     absent_count = max(total_lectures - present_count, 0)
     absent_percent = (
         round((absent_count / total_lectures) * 100, 2)
         if total_lectures > 0 else 0
     )
 
-    last_attended_record = (
-        attendance_qs.filter(status="P")
-        .select_related("lecture")
-        .order_by("-lecture__date")
-        .first()
-    )
-
     last_attended = None
-    if last_attended_record:
-        lec = last_attended_record.lecture
+    if summary.last_attended_lecture:
+        lec = summary.last_attended_lecture
         last_attended = f"{lec.date} ({lec.get_lecture_type_display()})"
 
     recent_lectures = (
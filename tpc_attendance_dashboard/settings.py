@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
 
     'accounts',
@@ -87,6 +88,35 @@ CACHES = {
     }
 }
 
+# Attendance defaulters (admin dashboard)
+ATTENDANCE_DEFAULTER_THRESHOLD = float(os.getenv('ATTENDANCE_DEFAULTER_THRESHOLD', 75))
+ATTENDANCE_DEFAULTER_LIMIT = int(os.getenv('ATTENDANCE_DEFAULTER_LIMIT', 5))
+
+# Background report artifacts (MEDIA_ROOT/reports)
+REPORT_ARTIFACT_MAX_AGE_DAYS = int(os.getenv('REPORT_ARTIFACT_MAX_AGE_DAYS', 7))
+REPORT_ARTIFACT_MAX_TOTAL_MB = int(os.getenv('REPORT_ARTIFACT_MAX_TOTAL_MB', 500))
+
+# Audit log writes (auditlog.writer): buffered in-process and bulk inserted
+AUDIT_LOG_ASYNC = os.getenv('AUDIT_LOG_ASYNC', 'True') == 'True'
+AUDIT_LOG_BUFFER_SIZE = int(os.getenv('AUDIT_LOG_BUFFER_SIZE', 100))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_SECONDS', 1.0))
+AUDIT_LOG_QUEUE_MAX = int(os.getenv('AUDIT_LOG_QUEUE_MAX', 10000))
+
+# Audit log partitions (auditlog.partitions): monthly, archived to MEDIA_ROOT/audit_archive
+AUDIT_LOG_PARTITIONS_AHEAD = int(os.getenv('AUDIT_LOG_PARTITIONS_AHEAD', 2))
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv('AUDIT_LOG_RETENTION_MONTHS', 12))
+
+# Background attendance imports: RUNNING jobs without a heartbeat for this long are failed
+ATTENDANCE_IMPORT_STALE_SECONDS = int(os.getenv('ATTENDANCE_IMPORT_STALE_SECONDS', 1800))
+
+# Request profiling (core.profiling.ProfilingMiddleware, off unless enabled)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.1))
+PROFILING_WINDOW_SECONDS = int(os.getenv('PROFILING_WINDOW_SECONDS', 300))
+PROFILING_WINDOWS = int(os.getenv('PROFILING_WINDOWS', 12))
+PROFILING_SLOW_SQL_LIMIT = int(os.getenv('PROFILING_SLOW_SQL_LIMIT', 5))
+PROFILING_METRICS_TOKEN = os.getenv('PROFILING_METRICS_TOKEN', '')
+
 
 # CELERY CONFIGURATION
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -99,12 +129,31 @@ CELERY_BEAT_SCHEDULE = {
         "task": "attendance.tasks.mark_absent_for_date_task",
         "schedule": crontab(hour=23, minute=59),
     },
+    "evict-report-artifacts": {
+        "task": "reports.tasks.evict_report_artifacts_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "ensure-audit-partitions": {
+        "task": "auditlog.tasks.ensure_audit_partitions_task",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "fail-stale-attendance-imports": {
+        "task": "attendance.tasks.fail_stale_imports_task",
+        "schedule": crontab(minute="*/10"),
+    },
+    # Picks up retries and anything left over once the rate limit resets
+    "process-notification-outbox": {
+        "task": "notifications.tasks.process_notification_outbox_task",
+        "schedule": crontab(),
+    },
 }
 CELERY_TIMEZONE = "Asia/Kolkata"
 CELERY_ENABLE_UTC = True
 
 
 MIDDLEWARE = [
+    # Outermost so sampled timings cover the whole middleware stack
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -156,6 +205,19 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', 'APP_PASSWORD_FROM_GOOGLE
 
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Training & Placement Cell <yourgmail@gmail.com>')
 
+# Absentee notifications: messages per pooled SMTP connection, and an optional
+# address that receives every notification instead of parents (test deployments)
+NOTIFICATION_EMAIL_CHUNK_SIZE = int(os.getenv('NOTIFICATION_EMAIL_CHUNK_SIZE', 50))
+NOTIFICATION_REDIRECT_EMAIL = os.getenv('NOTIFICATION_REDIRECT_EMAIL', 'example@exmaple.com')
+
+# Notification outbox workers (notifications.outbox); 0 disables the rate limit
+NOTIFICATION_RATE_PER_MINUTE = int(os.getenv('NOTIFICATION_RATE_PER_MINUTE', 60))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 5))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv('NOTIFICATION_RETRY_BASE_SECONDS', 60))
+NOTIFICATION_CLAIM_LEASE_SECONDS = int(os.getenv('NOTIFICATION_CLAIM_LEASE_SECONDS', 600))
+NOTIFICATION_OUTBOX_WORKERS = int(os.getenv('NOTIFICATION_OUTBOX_WORKERS', 2))
+
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
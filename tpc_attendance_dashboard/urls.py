@@ -40,5 +40,6 @@ urlpatterns = [
     path('attendance/', include('attendance.urls')),
     path('students/', include('students.urls')),
     path('reports/', include('reports.urls')),
-    path('notifications/', include('notifications.urls'))
+    path('notifications/', include('notifications.urls')),
+    path('profiling/', include('core.urls')),
 ]